@@ -1,10 +1,21 @@
+import io
+import json
 import os
+import queue
 import re
+import sys
 import tempfile
+import threading
 import time
+import uuid
+
+_import_started = time.perf_counter()
+
+from contextlib import contextmanager
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait as wait_futures
 from glob import glob
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 import logging
 
 try:
@@ -12,7 +23,8 @@ try:
 except Exception:
     site = None
 
-from flask import Flask, jsonify, render_template, request, send_file
+from flask import Flask, Request, Response, jsonify, render_template, request, send_file, stream_with_context
+from werkzeug.exceptions import RequestEntityTooLarge
 from werkzeug.utils import secure_filename, safe_join
 from dotenv import load_dotenv
 
@@ -26,14 +38,13 @@ os.environ.setdefault("CT2_USE_CUDNN", _ct2_use_cudnn_default)
 _diagnostic_notes: List[str] = []
 _app_start_time = time.time()
 
-try:
+if TYPE_CHECKING:
+    # Imported on first local transcription (see utils.local_backend.load_whisper_model)
     from faster_whisper import WhisperModel
-except ImportError as exc:
-    raise SystemExit(
-        "faster-whisper is required. Install dependencies with `pip install -r requirements.txt`."
-    ) from exc
 
 # Import our utility modules
+from utils import chunked, diarization, metrics
+from utils.env_probe import cached_probe, environment_fingerprint
 from utils.diarization import (
     diarize_audio,
     assign_speakers_to_segments,
@@ -41,13 +52,43 @@ from utils.diarization import (
     get_vram_usage,
     is_model_loaded as is_diarization_loaded
 )
-from utils.api_backends import transcribe_with_openai, diarize_with_assemblyai
-from utils.formatters import (
-    segments_to_markdown,
-    segments_to_plain_text,
-    segments_to_srt
+from utils.api_backends import (
+    api_backend_stats,
+    diarize_with_assemblyai,
+    openai_needs_chunking,
+    transcribe_with_openai,
 )
+from utils.formatters import FORMAT_EXTENSIONS, render_transcript
+from utils.audio import SAMPLE_RATE as AUDIO_SAMPLE_RATE, load_audio, probe_duration
+from utils.batching import batching_enabled, get_batch_scheduler
+from utils.chunked import long_audio_settings, shutdown_pool as shutdown_long_audio_pool, transcribe_long_audio
 from utils.gpu_monitor import get_full_gpu_status, get_gpu_processes
+from utils.local_backend import load_whisper_model, transcribe_with_model
+from utils.model_cache import ModelCache, parse_size
+from utils.model_server import ModelServerClient, ModelServerError
+from utils.result_cache import ResultCache, make_cache_key
+from utils.scheduler import PRIORITIES, QueueFull, QueueTimeout, Scheduler, Ticket
+from utils.segments import SegmentTable
+from utils.warmup import Preloader, parse_preload_list, warm_up_model
+from utils.transcript_store import CANONICAL_SUFFIX, RenderCache, resolve_download, save_transcript
+from utils.spool import (
+    SpoolFile,
+    copy_to_spool,
+    has_free_space,
+    spool_zip_members,
+    sweep_orphans as sweep_spool_orphans,
+)
+from utils.jobs import (
+    FINISHED_STATES as FINISHED_JOB_STATES,
+    configure as configure_jobs,
+    get_job,
+    get_job_stats,
+    report_progress as report_job_progress,
+    submit_job,
+    wait_for_job,
+)
+
+_startup_timings: Dict[str, Any] = {"imports_seconds": round(time.perf_counter() - _import_started, 3)}
 
 # Configuration
 DEFAULT_LANGUAGES: List[tuple[str, str]] = [
@@ -80,14 +121,32 @@ HF_TOKEN = os.getenv("HF_TOKEN")
 ENABLE_ONDEMAND_DIARIZATION = os.getenv("ENABLE_ONDEMAND_DIARIZATION", "true").lower() in {"1", "true", "yes"}
 MIN_SPEAKERS = int(os.getenv("MIN_SPEAKERS", "1"))
 MAX_SPEAKERS = int(os.getenv("MAX_SPEAKERS", "10"))
+# Run pyannote alongside Whisper instead of after it (one diarization at a time per worker)
+DIARIZATION_CONCURRENT = os.getenv("DIARIZATION_CONCURRENT", "true").lower() in {"1", "true", "yes"}
+
+# Optional shared model server (see utils/model_server.py); empty = load models in-process
+MODEL_SERVER_SOCKET = os.getenv("TRANSCRIBER_MODEL_SERVER", "").strip()
+MODEL_SERVER_AUTHKEY = os.getenv("TRANSCRIBER_MODEL_SERVER_AUTHKEY") or None
+
+# Models loaded at worker start: model[:device[:compute_type]],... (device cpu or gpu)
+PRELOAD_SPEC = os.getenv("WHISPER_PRELOAD", "")
+PRELOAD_WARMUP = os.getenv("WHISPER_PRELOAD_WARMUP", "true").lower() in {"1", "true", "yes"}
+
+# GPU/cuDNN probe results are reused across restarts until the environment changes
+_ENV_PROBE_CACHE = os.getenv(
+    "TRANSCRIBER_ENV_PROBE_CACHE", str(Path(tempfile.gettempdir()) / "transcriber-env-probe.json")
+).strip()
+ENV_PROBE_CACHE_PATH = (
+    Path(_ENV_PROBE_CACHE) if _ENV_PROBE_CACHE.lower() not in {"", "0", "off", "false"} else None
+)
 
 
-def _detect_cuda_device_count() -> int:
+def _detect_cuda_device_count(notes: List[str]) -> int:
     try:
         import ctranslate2
         return int(ctranslate2.get_cuda_device_count())
     except Exception as exc:
-        _diagnostic_notes.append(f"CUDA device probe failed: {exc}")
+        notes.append(f"CUDA device probe failed: {exc}")
         return 0
 
 
@@ -99,7 +158,26 @@ def _unique_dirs(paths: Sequence[str]) -> List[str]:
     return seen
 
 
-def _cudnn_libraries_present() -> bool:
+def _site_package_dirs() -> List[str]:
+    site_dirs: List[str] = []
+    if site is None:
+        return site_dirs
+    try:
+        site_dirs.extend(site.getsitepackages())
+    except Exception:
+        pass
+    try:
+        user_site = site.getusersitepackages()
+        if isinstance(user_site, str):
+            site_dirs.append(user_site)
+        else:
+            site_dirs.extend(user_site)
+    except Exception:
+        pass
+    return site_dirs
+
+
+def _cudnn_candidate_dirs() -> List[str]:
     candidate_dirs: List[str] = [
         "/lib/x86_64-linux-gnu",
         "/usr/lib/x86_64-linux-gnu",
@@ -115,32 +193,21 @@ def _cudnn_libraries_present() -> bool:
     if conda_prefix:
         candidate_dirs.append(os.path.join(conda_prefix, "lib"))
 
-    if site is not None:
-        site_dirs: List[str] = []
-        try:
-            site_dirs.extend(site.getsitepackages())
-        except Exception:
-            pass
-        try:
-            user_site = site.getusersitepackages()
-            if isinstance(user_site, str):
-                site_dirs.append(user_site)
-            else:
-                site_dirs.extend(user_site)
-        except Exception:
-            pass
-
-        candidate_dirs.extend(
-            os.path.join(base, "nvidia", "cudnn", "lib") for base in site_dirs
-        )
+    candidate_dirs.extend(
+        os.path.join(base, "nvidia", "cudnn", "lib") for base in _site_package_dirs()
+    )
 
     extra_dirs = os.getenv("CUDNN_EXTRA_LIB_DIRS")
     if extra_dirs:
         candidate_dirs.extend(part.strip() for part in extra_dirs.split(":") if part.strip())
 
+    return _unique_dirs(candidate_dirs)
+
+
+def _cudnn_libraries_present(candidate_dirs: List[str]) -> bool:
     patterns = ("libcudnn.so*", "libcudnn_ops_infer.so*", "libcudnn_ops_train.so*")
     search_patterns: List[str] = []
-    for directory in _unique_dirs(candidate_dirs):
+    for directory in candidate_dirs:
         if not directory or not os.path.isdir(directory):
             continue
         search_patterns.extend(os.path.join(directory, pattern) for pattern in patterns)
@@ -148,8 +215,27 @@ def _cudnn_libraries_present() -> bool:
     return any(glob(pattern) for pattern in search_patterns)
 
 
-_cuda_device_count = _detect_cuda_device_count()
-_cudnn_available = _cudnn_libraries_present()
+def _probe_gpu_environment(candidate_dirs: List[str]) -> Dict[str, Any]:
+    notes: List[str] = []
+    return {
+        "cuda_device_count": _detect_cuda_device_count(notes),
+        "cudnn_available": _cudnn_libraries_present(candidate_dirs),
+        "notes": notes,
+    }
+
+
+_probe_started = time.perf_counter()
+_cudnn_dirs = _cudnn_candidate_dirs()
+_gpu_probe, _gpu_probe_cached = cached_probe(
+    ENV_PROBE_CACHE_PATH,
+    environment_fingerprint(_cudnn_dirs + _site_package_dirs()),
+    lambda: _probe_gpu_environment(_cudnn_dirs),
+)
+_diagnostic_notes.extend(_gpu_probe["notes"])
+_cuda_device_count = _gpu_probe["cuda_device_count"]
+_cudnn_available = _gpu_probe["cudnn_available"]
+_startup_timings["env_probe_seconds"] = round(time.perf_counter() - _probe_started, 3)
+_startup_timings["env_probe_cached"] = _gpu_probe_cached
 _gpu_supported = _cuda_device_count > 0 and _cudnn_available
 
 if not _gpu_supported and GPU_DEVICE.lower() != "cpu":
@@ -171,6 +257,9 @@ if not _cudnn_available and "float16" in GPU_COMPUTE_TYPE.lower():
     GPU_COMPUTE_TYPE = fallback_compute
 
 VAD_ENABLED = os.getenv("WHISPER_VAD", "true").lower() in {"1", "true", "yes"}
+DEFAULT_WORD_TIMESTAMPS = os.getenv("WHISPER_WORD_TIMESTAMPS", "false").lower() in {"1", "true", "yes"}
+# Cross-request batching (see utils/batching.py); tuned by WHISPER_BATCH_* settings
+BATCHING_ENABLED = batching_enabled()
 DEFAULT_BEAM_SIZE = int(os.getenv("WHISPER_BEAM_SIZE", "5"))
 DEFAULT_TEMPERATURE = float(os.getenv("WHISPER_TEMPERATURE", "0.0"))
 DEFAULT_LANGUAGE = os.getenv("WHISPER_DEFAULT_LANGUAGE", "auto")
@@ -222,14 +311,131 @@ DEFAULT_USER_IDENTIFIER = os.getenv("TRANSCRIBER_DEFAULT_USER", "shared") or "sh
 
 _USER_SLUG_PATTERN = re.compile(r"[^a-z0-9._-]+")
 
+# Called with (segment, progress) as the local backend decodes each segment
+SegmentCallback = Callable[[Dict[str, Any], Optional[float]], None]
+
+# Background job settings (async /transcribe and /jobs)
+JOB_WORKERS = int(os.getenv("TRANSCRIBER_JOB_WORKERS", "0"))
+JOB_STATE_DIR = Path(os.getenv("TRANSCRIBER_JOB_DIR", str(OUTPUT_DIR / ".jobs"))).resolve()
+JOB_RETENTION_SECONDS = float(os.getenv("TRANSCRIBER_JOB_RETENTION_SECONDS", "86400"))
+JOB_MAX_WAIT_SECONDS = float(os.getenv("TRANSCRIBER_JOB_MAX_WAIT", "30"))
+STREAM_HEARTBEAT_SECONDS = float(os.getenv("TRANSCRIBER_STREAM_HEARTBEAT", "10"))
+
+# Batch uploads (/transcribe/batch): many files or zip archives in one request
+BATCH_MAX_FILES = int(os.getenv("TRANSCRIBER_BATCH_MAX_FILES", "50"))
+BATCH_CONCURRENCY = max(1, int(os.getenv("TRANSCRIBER_BATCH_CONCURRENCY", "1")))
+# Zip members with other extensions are skipped
+BATCH_AUDIO_EXTENSIONS = {
+    ".wav", ".mp3", ".m4a", ".mp4", ".aac", ".flac", ".ogg", ".oga", ".opus",
+    ".webm", ".wma", ".mkv", ".mov", ".mpeg", ".mpga", ".aiff", ".aif",
+}
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+
+# Download formats linked per transcription (markdown is always included; it is returned inline).
+# Jobs store one canonical transcript; these files are rendered from it on download.
+OUTPUT_FORMATS = ["markdown"] + [
+    fmt for fmt in (
+        name.strip().lower()
+        for name in os.getenv("TRANSCRIBER_OUTPUT_FORMATS", "text,markdown,srt,vtt,json").split(",")
+    )
+    if fmt in FORMAT_EXTENSIONS and fmt != "markdown"
+]
+
+# Content-addressed result cache (upload hash + output-affecting settings)
+RESULT_CACHE_DIR = Path(os.getenv("TRANSCRIBER_RESULT_CACHE_DIR", str(OUTPUT_DIR / ".cache"))).resolve()
+RESULT_CACHE_MAX_BYTES = parse_size(os.getenv("TRANSCRIBER_RESULT_CACHE_BYTES", "1G"))
+_result_cache = ResultCache(RESULT_CACHE_DIR, RESULT_CACHE_MAX_BYTES)
+
+# Rendered downloads (keyed by canonical transcript + format, also used as the ETag)
+RENDER_CACHE_DIR = Path(os.getenv("TRANSCRIBER_RENDER_CACHE_DIR", str(OUTPUT_DIR / ".render-cache"))).resolve()
+RENDER_CACHE_MAX_BYTES = parse_size(os.getenv("TRANSCRIBER_RENDER_CACHE_BYTES", "64M"))
+_render_cache = RenderCache(RENDER_CACHE_DIR, RENDER_CACHE_MAX_BYTES)
+
+# Upload spooling: multipart bodies are written once, straight into SPOOL_DIR
+SPOOL_DIR = Path(
+    os.getenv("TRANSCRIBER_SPOOL_DIR", str(Path(tempfile.gettempdir()) / "transcriber-spool"))
+).resolve()
+SPOOL_DIR.mkdir(parents=True, exist_ok=True)
+MAX_UPLOAD_BYTES = parse_size(os.getenv("TRANSCRIBER_MAX_UPLOAD_BYTES", "2G"))
+SPOOL_MIN_FREE_BYTES = parse_size(os.getenv("TRANSCRIBER_SPOOL_MIN_FREE_BYTES", "1G"))
+sweep_spool_orphans(SPOOL_DIR)
+
+# Admission control: local transcriptions take a per-device slot shared by all
+# workers and wait in a bounded priority queue (429 + Retry-After when full)
+SLOT_DIR = Path(
+    os.getenv("TRANSCRIBER_SLOT_DIR", str(Path(tempfile.gettempdir()) / "transcriber-slots"))
+).resolve()
+QUEUE_TIMEOUT_SECONDS = float(os.getenv("TRANSCRIBER_QUEUE_TIMEOUT", "120"))
+# Requests are only batched together while each holds a slot, so with batching on
+# a device defaults to as many slots as one batched run merges
+DEFAULT_DEVICE_SLOTS = os.getenv("WHISPER_BATCH_MAX_REQUESTS", "8") if BATCHING_ENABLED else "1"
+_scheduler = Scheduler(
+    SLOT_DIR,
+    cpu_slots=int(os.getenv("TRANSCRIBER_CPU_SLOTS") or DEFAULT_DEVICE_SLOTS),
+    gpu_slots=int(os.getenv("TRANSCRIBER_GPU_SLOTS") or DEFAULT_DEVICE_SLOTS),
+    max_queue=int(os.getenv("TRANSCRIBER_MAX_QUEUE", "8")),
+    user_max_running=int(os.getenv("TRANSCRIBER_USER_MAX_RUNNING", "0")),
+    user_max_queued=int(os.getenv("TRANSCRIBER_USER_MAX_QUEUED", "0")),
+    quantum=float(os.getenv("TRANSCRIBER_FAIR_QUANTUM_SECONDS", "300")),
+)
+# Devices local transcriptions can be scheduled on
+SCHEDULED_DEVICES = [CPU_DEVICE] + ([GPU_DEVICE] if _gpu_supported and GPU_DEVICE.lower() != "cpu" else [])
+if JOB_WORKERS <= 0:
+    # Enough job threads for every admitted job to wait in the fair-share queue;
+    # the device slots, not the thread count, limit how many actually run
+    slots = max(_scheduler.cpu_slots, _scheduler.gpu_slots)
+    JOB_WORKERS = (_scheduler.max_queue + slots) * len(SCHEDULED_DEVICES) if slots else 1
+
+configure_jobs(JOB_STATE_DIR, max_workers=JOB_WORKERS, retention_seconds=JOB_RETENTION_SECONDS)
+
+# Per-worker metrics files merged by /metrics (see utils/metrics.py)
+METRICS_DIR = Path(os.getenv("TRANSCRIBER_METRICS_DIR", str(OUTPUT_DIR / ".metrics"))).resolve()
+metrics.configure(METRICS_DIR, flush_interval=float(os.getenv("TRANSCRIBER_METRICS_FLUSH_SECONDS", "2")))
+
+class SpoolingRequest(Request):
+    """Request that streams uploaded files into SPOOL_DIR instead of /tmp."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        spool = SpoolFile(SPOOL_DIR)
+        if not hasattr(self, "_spool_files"):
+            self._spool_files = []
+        self._spool_files.append(spool)
+        return spool
+
+
 app = Flask(__name__)
+app.request_class = SpoolingRequest
+app.config["MAX_CONTENT_LENGTH"] = MAX_UPLOAD_BYTES or None
 logging.basicConfig(level=logging.INFO)
 
 if _diagnostic_notes:
     for note in _diagnostic_notes:
         app.logger.warning("[startup] %s", note)
 
-_MODEL_CACHE: Dict[Tuple[str, str, str], WhisperModel] = {}
+_model_cache = ModelCache.from_env(load_whisper_model, default_pinned=MODEL_NAME)
+
+
+def _record_model_load(key: Tuple[str, str, str], load_seconds: float):
+    model_name, device, compute_type = key
+    labels = {"model": model_name, "device": device, "compute_type": compute_type}
+    metrics.inc("transcriber_model_loads_total", **labels)
+    metrics.observe("transcriber_model_load_seconds", load_seconds, **labels)
+
+
+_model_cache.on_load = _record_model_load
+
+
+def _record_diarization_load(model_name: str, device: str, load_seconds: float):
+    _record_model_load((model_name, device, "default"), load_seconds)
+
+
+diarization.on_load = _record_diarization_load
+# Long-audio pool processes hold their own model copies; count them in the budget
+chunked.on_pool_start = _model_cache.reserve
+chunked.on_pool_stop = _model_cache.release_reservation
+_model_server: Optional[ModelServerClient] = (
+    ModelServerClient(MODEL_SERVER_SOCKET, MODEL_SERVER_AUTHKEY) if MODEL_SERVER_SOCKET else None
+)
 
 
 def _resolve_device_choice(use_gpu: bool) -> Tuple[str, str]:
@@ -238,20 +444,120 @@ def _resolve_device_choice(use_gpu: bool) -> Tuple[str, str]:
     return CPU_DEVICE, CPU_COMPUTE_TYPE
 
 
-def _get_model(model_name: str, device: str, compute_type: str) -> WhisperModel:
-    """Initialise Whisper model lazily and cache per (model, device, compute)."""
-    cache_key = (model_name, device, compute_type)
-    model = _MODEL_CACHE.get(cache_key)
-    if model is None:
-        app.logger.info(
-            "Loading faster-whisper model '%s' on device=%s (compute_type=%s)",
-            model_name,
-            device,
-            compute_type,
-        )
-        model = WhisperModel(model_name, device=device, compute_type=compute_type)
-        _MODEL_CACHE[cache_key] = model
-    return model
+def _get_model(model_name: str, device: str, compute_type: str) -> "WhisperModel":
+    """Initialise Whisper model lazily via the budgeted LRU cache."""
+    return _model_cache.get(model_name, device, compute_type)
+
+
+def _load_whisper(model_name: str, device: str, compute_type: str) -> Optional["WhisperModel"]:
+    """Make sure a model is loaded, in-process or on the model server.
+
+    Returns the in-process model, or None when the model server owns it.
+    """
+    if _model_server is not None:
+        _model_server.load_model(model_name, device, compute_type)
+        return None
+    return _get_model(model_name, device, compute_type)
+
+
+def _preload_entries() -> List[Tuple[str, str, str]]:
+    """WHISPER_PRELOAD resolved to the (model, device, compute_type) keys requests will use."""
+    entries = []
+    for model_name, device, compute_type in parse_preload_list(PRELOAD_SPEC, "", ""):
+        use_gpu = device.lower() != "cpu" if device else DEFAULT_USE_GPU
+        resolved_device, resolved_compute = _resolve_device_choice(use_gpu)
+        entry = (model_name, resolved_device, compute_type or resolved_compute)
+        if entry not in entries:
+            entries.append(entry)
+    return entries
+
+
+def _preload_model(model_name: str, device: str, compute_type: str) -> Optional[float]:
+    """Load one preload entry and run the synthetic warm-up decode; returns warm-up seconds."""
+    if _model_server is not None:
+        result = _model_server.load_model(model_name, device, compute_type, warm_up=PRELOAD_WARMUP)
+        return result.get("warmup_seconds")
+    model = _get_model(model_name, device, compute_type)
+    return warm_up_model(model) if PRELOAD_WARMUP else None
+
+
+_preloader = Preloader(_preload_entries(), _preload_model)
+if _model_server is None:
+    # Preloaded models stay resident like the default model
+    _model_cache.pinned.update(model_name for model_name, _, _ in _preloader.entries)
+_preloader.start()
+
+
+_diarization_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="diarization")
+
+# Batch uploads decode the next file here while the current one is transcribed
+_prefetch_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="audio-prefetch")
+_prefetched_audio: Dict[str, Future] = {}
+_prefetch_lock = threading.Lock()
+
+
+def _prefetch_audio(audio_path: Path):
+    """Start decoding a file that _decode_upload will be asked for soon."""
+    def _decode():
+        with metrics.timed("decode", backend="local"):
+            return load_audio(str(audio_path), spill_dir=str(SPOOL_DIR))
+
+    with _prefetch_lock:
+        if str(audio_path) not in _prefetched_audio:
+            _prefetched_audio[str(audio_path)] = _prefetch_executor.submit(_decode)
+
+
+def _discard_prefetched_audio(audio_path: Path):
+    with _prefetch_lock:
+        future = _prefetched_audio.pop(str(audio_path), None)
+    if future is not None:
+        future.cancel()
+
+
+def _decode_upload(audio_path: Path):
+    """Decoded PCM for an upload, reusing a prefetched decode when there is one."""
+    with _prefetch_lock:
+        future = _prefetched_audio.pop(str(audio_path), None)
+    if future is not None and not future.cancelled():
+        try:
+            return future.result()
+        except Exception as exc:
+            app.logger.warning("Prefetched decode of %s failed, retrying: %s", audio_path, exc)
+    with metrics.timed("decode", backend="local"):
+        # Large decodes spill into the spool dir, whose free space admission checks
+        return load_audio(str(audio_path), spill_dir=str(SPOOL_DIR))
+
+
+def _diarize(audio_path: Path, audio=None, **params) -> List[Dict[str, Any]]:
+    with metrics.timed("diarization", backend="local"):
+        return diarize_audio(str(audio_path), HF_TOKEN, waveform=audio, **params)
+
+
+def _remote_diarization_segments(whisper_result: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Speaker turns the model server computed alongside a transcription."""
+    remote = whisper_result["diarization"]
+    if "error" in remote:
+        raise RuntimeError(remote["error"])
+    metrics.observe("transcriber_stage_seconds", remote["seconds"], stage="diarization", backend="local")
+    return remote["segments"]
+
+
+def _loaded_whisper_model_count() -> int:
+    if _model_server is not None:
+        try:
+            return len(_model_server.status()["whisper_models"])
+        except ModelServerError:
+            return 0
+    return len(_model_cache)
+
+
+def _diarization_loaded() -> bool:
+    if _model_server is not None:
+        try:
+            return bool(_model_server.status()["diarization_loaded"])
+        except ModelServerError:
+            return False
+    return is_diarization_loaded()
 
 
 @app.route("/favicon.ico")
@@ -281,13 +587,424 @@ def index():
     )
 
 
-@app.post("/transcribe")
-def transcribe():
+def _parse_transcription_options(form) -> Dict[str, Any]:
+    """Read transcription settings from a submitted form."""
+    return {
+        "backend": form.get("backend", "local").strip(),
+        "diarization_mode": form.get("diarization", "off").strip(),
+        "min_speakers": int(form.get("min_speakers", MIN_SPEAKERS)),
+        "max_speakers": int(form.get("max_speakers", MAX_SPEAKERS)),
+        "model_name": form.get("model", MODEL_NAME).strip() or MODEL_NAME,
+        "translate": form.get("translate", "false").lower() == "true",
+        "language": form.get("language", DEFAULT_LANGUAGE),
+        "temperature": float(form.get("temperature", DEFAULT_TEMPERATURE)),
+        "beam_size": int(form.get("beam_size", DEFAULT_BEAM_SIZE)),
+        "use_gpu": _str_to_bool(form.get("use_gpu"), default=DEFAULT_USE_GPU),
+        "word_timestamps": _str_to_bool(form.get("word_timestamps"), default=DEFAULT_WORD_TIMESTAMPS),
+    }
+
+
+def _save_upload(audio_file, suffix: str) -> Tuple[Path, str]:
+    """Take ownership of an uploaded file in the spool directory.
+
+    Returns the file path and the hex SHA-256 of its content. Uploads already
+    spooled during parsing are just renamed; anything else is copied once.
+    """
+    if isinstance(audio_file.stream, SpoolFile):
+        return audio_file.stream.claim(suffix)
+    return copy_to_spool(audio_file.stream, SPOOL_DIR, suffix, UPLOAD_CHUNK_BYTES)
+
+
+@app.teardown_request
+def _discard_unclaimed_uploads(_exc=None):
+    # Extra file fields, rejected requests and aborted uploads leave spool files behind
+    for spool in getattr(request, "_spool_files", ()):
+        spool.discard()
+
+
+@app.errorhandler(RequestEntityTooLarge)
+def _upload_too_large(_exc):
+    return jsonify({"error": f"Upload exceeds the {MAX_UPLOAD_BYTES // 1024**2} MB limit."}), 413
+
+
+def _effective_backend(options: Dict[str, Any]) -> str:
+    if options["backend"] == "openai":
+        return "openai"
+    if options["diarization_mode"] == "assemblyai":
+        return "assemblyai"
+    return "local"
+
+
+def _result_cache_params(options: Dict[str, Any]) -> Dict[str, Any]:
+    """Settings that change a transcript, used in the result cache key."""
+    backend = _effective_backend(options)
+    params: Dict[str, Any] = {"backend": backend, "language": options["language"]}
+    if backend == "openai":
+        params.update(model="whisper-1", temperature=options["temperature"])
+    elif backend == "assemblyai":
+        params.update(min_speakers=options["min_speakers"], max_speakers=options["max_speakers"])
+    else:
+        params.update(
+            model=options["model_name"],
+            task="translate" if options["translate"] else "transcribe",
+            beam_size=options["beam_size"],
+            temperature=options["temperature"],
+            vad=VAD_ENABLED,
+            word_timestamps=options["word_timestamps"],
+            diarization=options["diarization_mode"] if HF_TOKEN else "off",
+        )
+        if params["diarization"] == "local":
+            params.update(min_speakers=options["min_speakers"], max_speakers=options["max_speakers"])
+    return params
+
+
+def _run_backend(
+    audio_path: Path,
+    user_identifier: str,
+    options: Dict[str, Any],
+    on_segment: Optional[SegmentCallback] = None,
+    ticket: Optional[Ticket] = None,
+) -> Dict[str, Any]:
+    """Dispatch to the selected transcription backend (and record its real-time factor)."""
+    started = time.perf_counter()
+    result = _dispatch_backend(audio_path, user_identifier, options, on_segment, ticket)
+    _record_realtime_factor(result, time.perf_counter() - started)
+    return result
+
+
+def _record_realtime_factor(result: Dict[str, Any], processing_seconds: float):
+    metadata = result.get("metadata", {})
+    audio_seconds = metadata.get("duration") or 0
+    if not audio_seconds:
+        # AssemblyAI reports no duration; the last segment end is close enough
+        segments = SegmentTable.coerce(result.get("segments"))
+        audio_seconds = segments.ends[-1] if len(segments) else 0
+    labels = {
+        "backend": metadata.get("backend", "unknown"),
+        "model": metadata.get("model", "default"),
+        "compute_type": metadata.get("compute_type", "remote"),
+    }
+    metrics.inc("transcriber_processing_seconds_total", processing_seconds, **labels)
+    if audio_seconds > 0:
+        metrics.inc("transcriber_audio_seconds_total", audio_seconds, **labels)
+        metrics.observe("transcriber_realtime_factor", processing_seconds / audio_seconds, **labels)
+
+
+def _dispatch_backend(
+    audio_path: Path,
+    user_identifier: str,
+    options: Dict[str, Any],
+    on_segment: Optional[SegmentCallback] = None,
+    ticket: Optional[Ticket] = None,
+) -> Dict[str, Any]:
+    backend = _effective_backend(options)
+    if backend == "openai":
+        with metrics.timed("transcribe", backend=backend):
+            return _transcribe_openai(audio_path, options["language"], options["temperature"], ticket)
+    if backend == "assemblyai":
+        # Use AssemblyAI for both transcription and diarization
+        with metrics.timed("transcribe", backend=backend):
+            return _transcribe_assemblyai(audio_path, options["min_speakers"], options["max_speakers"])
+    with _device_slot(ticket):
+        return _transcribe_local(
+            audio_path,
+            options["model_name"],
+            options["language"],
+            options["temperature"],
+            options["beam_size"],
+            options["translate"],
+            options["use_gpu"],
+            options["diarization_mode"],
+            options["min_speakers"],
+            options["max_speakers"],
+            user_identifier=user_identifier,
+            word_timestamps=options["word_timestamps"],
+            on_segment=on_segment,
+        )
+
+
+def _admit(
+    options: Dict[str, Any], priority: str, timeout: Optional[float], user_identifier: str
+) -> Optional[Ticket]:
+    """Queue a local transcription for its device slot
+
+    OpenAI uploads queue for a CPU slot, which they only take if the file has
+    to be decoded and chunked (see _drop_unneeded_ticket); AssemblyAI is not
+    scheduled.
+
+    Raises:
+        QueueFull: The device queue, or the user's share of it, is full
+    """
+    backend = _effective_backend(options)
+    if backend == "openai":
+        device = CPU_DEVICE
+    elif backend == "local":
+        device, _ = _resolve_device_choice(options["use_gpu"])
+    else:
+        return None
+    try:
+        return _scheduler.admit(device, priority, timeout, user=user_identifier.lower())
+    except QueueFull as exc:
+        metrics.inc("transcriber_admission_rejections_total", device=device, reason=exc.reason)
+        raise
+
+
+def _drop_unneeded_ticket(ticket: Optional[Ticket], options: Dict[str, Any], audio_path: Path) -> Optional[Ticket]:
+    """Give up the queue place of an OpenAI upload that is sent whole (no local decode)."""
+    if ticket is not None and _effective_backend(options) == "openai" and not openai_needs_chunking(str(audio_path)):
+        ticket.cancel()
+        return None
+    return ticket
+
+
+def _audio_cost_seconds(audio_path: Path) -> float:
+    """Audio length for fair-share accounting, from the header or else the file size."""
+    duration = probe_duration(str(audio_path))
+    if duration:
+        return duration
+    # Roughly 128 kbit/s compressed audio
+    return audio_path.stat().st_size / 16000
+
+
+@contextmanager
+def _device_slot(ticket: Optional[Ticket], backend: str = "local") -> Iterator[None]:
+    if ticket is None:
+        yield
+        return
+    try:
+        with ticket.slot():
+            metrics.observe(
+                "transcriber_stage_seconds", ticket.started_at - ticket.admitted_at, stage="queue_wait", backend=backend
+            )
+            yield
+    except QueueTimeout as exc:
+        metrics.inc("transcriber_admission_rejections_total", device=ticket.device, reason=exc.reason)
+        raise
+
+
+def _queue_full_response(exc: QueueFull):
+    response = jsonify({"error": f"{exc}. Try again later.", "retry_after": exc.retry_after})
+    # A request that queued and timed out is a server-side delay, not a client being too eager
+    response.status_code = 503 if isinstance(exc, QueueTimeout) else 429
+    response.headers["Retry-After"] = str(exc.retry_after)
+    return response
+
+
+def _run_backend_cached(
+    audio_path: Path,
+    audio_digest: Optional[str],
+    user_identifier: str,
+    options: Dict[str, Any],
+    on_segment: Optional[SegmentCallback] = None,
+    ticket: Optional[Ticket] = None,
+) -> Dict[str, Any]:
+    """Return a cached result for identical audio + settings, or run the backend."""
+    if audio_digest is None or not _result_cache.enabled:
+        return _run_backend(audio_path, user_identifier, options, on_segment, ticket)
+
+    cache_key = make_cache_key(audio_digest, _result_cache_params(options))
+    cached = _result_cache.get(cache_key)
+    metrics.inc("transcriber_result_cache_requests_total", result="miss" if cached is None else "hit")
+    if cached is None:
+        result = _run_backend(audio_path, user_identifier, options, on_segment, ticket)
+        # Segments are stored column-wise: smaller files, cheaper (de)serialisation
+        segments = SegmentTable.coerce(result.get("segments"))
+        _result_cache.put(cache_key, {**result, "segments": segments.to_columns()})
+        return {**result, "segments": segments}
+
+    app.logger.info("Result cache hit for %s", audio_digest[:12])
+    segments = cached.get("segments")
+    segments = SegmentTable.from_columns(segments) if isinstance(segments, dict) else SegmentTable.coerce(segments)
+    result = {**cached, "segments": segments}
+    if on_segment is not None:
+        duration = result.get("metadata", {}).get("duration") or 0
+        for segment in result["segments"]:
+            on_segment(segment, min(segment["end"] / duration, 1.0) if duration else None)
+    metadata = dict(result.get("metadata", {}))
+    if "user" in metadata:
+        metadata["user"] = user_identifier
+    metadata["cached"] = True
+    return {**result, "metadata": metadata}
+
+
+def _process_transcription(
+    audio_path: Path,
+    filename: str,
+    user_identifier: str,
+    user_output_dir: Path,
+    options: Dict[str, Any],
+    on_segment: Optional[SegmentCallback] = None,
+    audio_digest: Optional[str] = None,
+    ticket: Optional[Ticket] = None,
+) -> Dict[str, Any]:
+    """Run the selected backend (or reuse a cached result) and store the transcript.
+
+    Runs without a request context so it can be used from background jobs.
+    Download links are returned as file names; see ``_download_urls``.
+    ``ticket`` is the request's admission ticket; local transcription waits
+    for its device slot.
+    """
+    backend = _effective_backend(options)
+    metrics.inc("transcriber_jobs_in_flight", backend=backend)
+    try:
+        result = _run_backend_cached(audio_path, audio_digest, user_identifier, options, on_segment, ticket)
+    except Exception:
+        metrics.inc("transcriber_transcriptions_total", backend=backend, outcome="failed")
+        raise
+    finally:
+        metrics.inc("transcriber_jobs_in_flight", -1, backend=backend)
+    outcome = "cached" if result.get("metadata", {}).get("cached") else "ok"
+    metrics.inc("transcriber_transcriptions_total", backend=backend, outcome=outcome)
+
+    # Save outputs in multiple formats
+    timestamp = time.strftime("%Y%m%d-%H%M%S")
+    base_name = f"{timestamp}_{Path(filename).stem or 'audio'}"
+
+    # Only the canonical transcript is written; download formats are rendered on request
+    segments = SegmentTable.coerce(result.get("segments"))
+    metadata = result.get("metadata", {})
+    with metrics.timed("output_write", backend=backend):
+        save_transcript(
+            user_output_dir / f"{base_name}{CANONICAL_SUFFIX}", result.get("text", ""), segments, metadata
+        )
+    with metrics.timed("format", backend=backend):
+        md_content = render_transcript(segments, "markdown", metadata).rstrip("\n")
+
+    return {
+        "transcript": result.get("text", ""),
+        "markdown": md_content,
+        "metadata": metadata,
+        "files": {fmt: f"{base_name}{FORMAT_EXTENSIONS[fmt]}" for fmt in OUTPUT_FORMATS},
+    }
+
+
+def _run_transcription_job(
+    audio_path: Path,
+    filename: str,
+    user_identifier: str,
+    user_output_dir: Path,
+    options: Dict[str, Any],
+    on_segment: Optional[SegmentCallback] = None,
+    audio_digest: Optional[str] = None,
+    ticket: Optional[Ticket] = None,
+) -> Dict[str, Any]:
+    """Background job wrapper that owns (and removes) the uploaded temp file and ticket."""
+
+    def _on_segment(segment: Dict[str, Any], progress: Optional[float]):
+        report_job_progress(progress)
+        if on_segment is not None:
+            on_segment(segment, progress)
+
+    try:
+        return _process_transcription(
+            audio_path,
+            filename,
+            user_identifier,
+            user_output_dir,
+            options,
+            on_segment=_on_segment,
+            audio_digest=audio_digest,
+            ticket=ticket,
+        )
+    finally:
+        audio_path.unlink(missing_ok=True)
+        if ticket is not None:
+            ticket.cancel()
+
+
+def _download_urls(files: Dict[str, str]) -> Dict[str, str]:
+    return {
+        kind: request.host_url.rstrip("/") + app.url_for("download_file", filename=name)
+        for kind, name in files.items()
+    }
+
+
+def _public_result(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Shape a processed transcription into the /transcribe response body."""
+    response = {key: value for key, value in payload.items() if key != "files"}
+    response["downloads"] = _download_urls(payload.get("files", {}))
+    return response
+
+
+def _public_job(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Shape a job record for API responses."""
+    job = {
+        "job_id": record["id"],
+        "state": record["state"],
+        "filename": record.get("filename"),
+        "backend": record.get("backend"),
+        "created_at": record.get("created_at"),
+        "started_at": record.get("started_at"),
+        "finished_at": record.get("finished_at"),
+        "progress": record.get("progress"),
+        "status_url": request.host_url.rstrip("/") + app.url_for("job_status", job_id=record["id"]),
+        "result_url": request.host_url.rstrip("/") + app.url_for("job_result", job_id=record["id"]),
+    }
+    if record.get("error"):
+        job["error"] = record["error"]
+    return job
+
+
+def _get_owned_job(job_id: str, user_identifier: str) -> Optional[Dict[str, Any]]:
+    record = get_job(job_id)
+    if record is None or record.get("owner") != user_identifier:
+        return None
+    return record
+
+
+def _stream_job_events(
+    record: Dict[str, Any], events: "queue.Queue[Dict[str, Any]]"
+) -> Iterator[str]:
+    """Yield NDJSON lines for a running job: segments as decoded, then the result."""
+    job_id = record["id"]
+    yield json.dumps({"type": "job", **_public_job(record)}) + "\n"
+
+    last_sent = time.monotonic()
+    while True:
+        try:
+            event = events.get(timeout=1.0)
+        except queue.Empty:
+            record = get_job(job_id) or record
+            if record["state"] in FINISHED_JOB_STATES and events.empty():
+                break
+            # Keep proxies from closing an idle stream (e.g. during diarization)
+            if time.monotonic() - last_sent >= STREAM_HEARTBEAT_SECONDS:
+                status = {"type": "status", "state": record["state"], "progress": record.get("progress")}
+                yield json.dumps(status) + "\n"
+                last_sent = time.monotonic()
+            continue
+        yield json.dumps(event) + "\n"
+        last_sent = time.monotonic()
+
+    if record["state"] == "completed":
+        yield json.dumps({"type": "result", **_public_result(record["result"])}) + "\n"
+    else:
+        yield json.dumps({"type": "error", "error": f"Transcription failed: {record.get('error')}"}) + "\n"
+
+
+def _handle_transcription_upload(mode: str = "sync"):
+    """Shared upload handling for /transcribe, /jobs and /transcribe/stream.
+
+    ``mode`` is "sync" (respond with the result), "async" (respond 202 with a
+    job) or "stream" (run as a job and stream NDJSON events while it runs).
+    """
     try:
         user_identifier, user_output_dir = _resolve_current_user_dir(create=True)
     except PermissionError as exc:
         return jsonify({"error": str(exc)}), 401
 
+    # Checked before the body is read, so a full disk rejects the upload up front
+    if not has_free_space(SPOOL_DIR, request.content_length, SPOOL_MIN_FREE_BYTES):
+        return jsonify({"error": "Not enough free space to accept this upload. Try again later."}), 507
+
+    # Refuse before reading the body if no device could take the request anyway
+    retry_after = _scheduler.all_full(SCHEDULED_DEVICES)
+    if retry_after is not None:
+        metrics.inc("transcriber_admission_rejections_total", device="any", reason="queue_full")
+        return _queue_full_response(QueueFull("Too many transcriptions waiting", retry_after))
+
+    # Parsing the form streams the body into the spool directory
+    upload_started = time.perf_counter()
     if "audio" not in request.files:
         return jsonify({"error": "No audio file provided."}), 400
 
@@ -298,93 +1015,386 @@ def transcribe():
     filename = secure_filename(audio_file.filename) or "recording.wav"
     suffix = Path(filename).suffix or ".wav"
 
-    # Get transcription backend
-    backend = request.form.get("backend", "local").strip()
-    
-    # Get diarization settings
-    diarization_mode = request.form.get("diarization", "off").strip()
-    min_speakers = int(request.form.get("min_speakers", MIN_SPEAKERS))
-    max_speakers = int(request.form.get("max_speakers", MAX_SPEAKERS))
-    
-    # Get other settings
-    requested_model = request.form.get("model", MODEL_NAME).strip() or MODEL_NAME
-    translate = request.form.get("translate", "false").lower() == "true"
-    language = request.form.get("language", DEFAULT_LANGUAGE)
-    temperature = float(request.form.get("temperature", DEFAULT_TEMPERATURE))
-    beam_size = int(request.form.get("beam_size", DEFAULT_BEAM_SIZE))
-    use_gpu_requested = _str_to_bool(
-        request.form.get("use_gpu"), default=DEFAULT_USE_GPU
-    )
+    options = _parse_transcription_options(request.form)
+
+    # Someone waiting on the response is served first; clients may only lower their priority
+    priority = "interactive" if mode in {"sync", "stream"} else "normal"
+    requested_priority = request.form.get("priority", "").strip().lower()
+    if PRIORITIES.get(requested_priority, -1) > PRIORITIES[priority]:
+        priority = requested_priority
+    try:
+        # Streams send heartbeats and jobs hold no request open, so only sync requests time out
+        ticket = _admit(options, priority, QUEUE_TIMEOUT_SECONDS if mode == "sync" else None, user_identifier)
+    except QueueFull as exc:
+        return _queue_full_response(exc)
 
     tmp_path: Optional[Path] = None
     try:
         # Save uploaded file
-        with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp:
-            audio_file.save(tmp)
-            tmp_path = Path(tmp.name)
-
-        # Process based on backend and diarization
-        if backend == "openai":
-            result = _transcribe_openai(tmp_path, language, temperature)
-        elif diarization_mode == "assemblyai":
-            # Use AssemblyAI for both transcription and diarization
-            result = _transcribe_assemblyai(tmp_path, min_speakers, max_speakers)
-        else:  # local
-            result = _transcribe_local(
+        tmp_path, audio_digest = _save_upload(audio_file, suffix)
+        ticket = _drop_unneeded_ticket(ticket, options, tmp_path)
+        if ticket is not None:
+            # Fair share is accounted in audio seconds
+            ticket.cost = _audio_cost_seconds(tmp_path)
+        metrics.observe(
+            "transcriber_stage_seconds",
+            time.perf_counter() - upload_started,
+            stage="upload_save",
+            backend=_effective_backend(options),
+        )
+
+        if mode in {"async", "stream"}:
+            events: "queue.Queue[Dict[str, Any]]" = queue.Queue()
+            on_segment = None
+            if mode == "stream":
+                def on_segment(segment, progress):
+                    events.put({"type": "segment", "segment": segment, "progress": progress})
+
+            record = submit_job(
+                _run_transcription_job,
                 tmp_path,
-                requested_model,
-                language,
-                temperature,
-                beam_size,
-                translate,
-                use_gpu_requested,
-                diarization_mode,
-                min_speakers,
-                max_speakers
+                filename,
+                user_identifier,
+                user_output_dir,
+                options,
+                on_segment=on_segment,
+                audio_digest=audio_digest,
+                ticket=ticket,
+                owner=user_identifier,
+                description={"filename": filename, "backend": options["backend"]},
             )
+            # The job now owns the temp file and the ticket
+            tmp_path = None
+            ticket = None
+
+            if mode == "stream":
+                return Response(
+                    stream_with_context(_stream_job_events(record, events)),
+                    mimetype="application/x-ndjson",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+                )
 
-        # Save outputs in multiple formats
-        timestamp = time.strftime("%Y%m%d-%H%M%S")
-        base_name = f"{timestamp}_{Path(filename).stem or 'audio'}"
-        
-        # Generate all formats
-        txt_path = user_output_dir / f"{base_name}.txt"
-        md_path = user_output_dir / f"{base_name}.md"
-        srt_path = user_output_dir / f"{base_name}.srt"
-        
-        segments = result.get("segments", [])
-        has_speakers = any("speaker" in seg for seg in segments)
-        
-        # Plain text - NO timestamps for non-diarized
-        txt_content = segments_to_plain_text(segments, include_timestamps=False, include_speakers=has_speakers)
-        txt_path.write_text(txt_content + "\n", encoding="utf-8")
-        
-        # Markdown - timestamps only for diarized
-        md_content = segments_to_markdown(segments, include_timestamps=has_speakers, include_speakers=has_speakers)
-        md_path.write_text(md_content + "\n", encoding="utf-8")
-        
-        # SRT subtitles
-        srt_content = segments_to_srt(segments)
-        srt_path.write_text(srt_content, encoding="utf-8")
-
-        response = {
-            "transcript": result.get("text", ""),
-            "markdown": md_content,
-            "metadata": result.get("metadata", {}),
-            "downloads": {
-                "text": request.host_url.rstrip("/") + app.url_for("download_file", filename=txt_path.name),
-                "markdown": request.host_url.rstrip("/") + app.url_for("download_file", filename=md_path.name),
-                "srt": request.host_url.rstrip("/") + app.url_for("download_file", filename=srt_path.name),
-            },
-        }
-        return jsonify(response)
-        
+            response = jsonify(_public_job(record))
+            response.status_code = 202
+            response.headers["Location"] = app.url_for("job_status", job_id=record["id"])
+            return response
+
+        payload = _process_transcription(
+            tmp_path, filename, user_identifier, user_output_dir, options, audio_digest=audio_digest, ticket=ticket
+        )
+        return jsonify(_public_result(payload))
+
+    except QueueFull as exc:
+        return _queue_full_response(exc)
     except Exception as exc:
         app.logger.exception("Transcription failed")
         return jsonify({"error": f"Transcription failed: {exc}"}), 500
     finally:
         if tmp_path and tmp_path.exists():
             tmp_path.unlink(missing_ok=True)
+        if ticket is not None:
+            ticket.cancel()
+
+
+@app.post("/transcribe")
+def transcribe():
+    run_async = _str_to_bool(request.args.get("async", request.form.get("async")), default=False)
+    return _handle_transcription_upload("async" if run_async else "sync")
+
+
+@app.post("/transcribe/stream")
+def transcribe_stream():
+    """Transcribe and stream NDJSON events: job, segment..., then result or error."""
+    return _handle_transcription_upload("stream")
+
+
+@app.post("/jobs")
+def create_job():
+    """Submit a background transcription job (same form fields as /transcribe)."""
+    return _handle_transcription_upload("async")
+
+
+@app.get("/jobs/<job_id>")
+def job_status(job_id: str):
+    """Report job state; pass ?wait=<seconds> to long-poll until it finishes."""
+    try:
+        user_identifier, _ = _resolve_current_user_dir(create=False)
+    except PermissionError as exc:
+        return jsonify({"error": str(exc)}), 401
+
+    record = _get_owned_job(job_id, user_identifier)
+    if record is None:
+        return jsonify({"error": "Job not found."}), 404
+
+    try:
+        wait_seconds = min(float(request.args.get("wait", 0)), JOB_MAX_WAIT_SECONDS)
+    except ValueError:
+        return jsonify({"error": "Invalid wait value."}), 400
+
+    if wait_seconds > 0 and record["state"] not in FINISHED_JOB_STATES:
+        record = wait_for_job(job_id, wait_seconds) or record
+
+    return jsonify(_public_job(record))
+
+
+@app.get("/jobs/<job_id>/result")
+def job_result(job_id: str):
+    """Return the transcription result once the job has completed."""
+    try:
+        user_identifier, _ = _resolve_current_user_dir(create=False)
+    except PermissionError as exc:
+        return jsonify({"error": str(exc)}), 401
+
+    record = _get_owned_job(job_id, user_identifier)
+    if record is None:
+        return jsonify({"error": "Job not found."}), 404
+
+    if record["state"] == "failed":
+        return jsonify({"error": f"Transcription failed: {record.get('error')}"}), 500
+    if record["state"] != "completed":
+        return jsonify(_public_job(record)), 202
+
+    if record.get("kind") == "batch":
+        return jsonify(_public_manifest(record["result"]))
+    return jsonify(_public_result(record["result"]))
+
+
+def _admit_when_possible(options: Dict[str, Any], user_identifier: str, audio_path: Path) -> Optional[Ticket]:
+    """Admit a batch file at batch priority, waiting out full queues instead of failing."""
+    while True:
+        try:
+            ticket = _admit(options, "batch", None, user_identifier)
+        except QueueFull as exc:
+            time.sleep(min(exc.retry_after, 30))
+            continue
+        ticket = _drop_unneeded_ticket(ticket, options, audio_path)
+        if ticket is not None:
+            ticket.cost = _audio_cost_seconds(audio_path)
+        return ticket
+
+
+def _process_batch_entry(
+    entry: Dict[str, Any], user_identifier: str, user_output_dir: Path, options: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Transcribe one file of a batch; failures are reported in the manifest, not raised."""
+    audio_path = Path(entry["path"])
+    ticket: Optional[Ticket] = None
+    try:
+        ticket = _admit_when_possible(options, user_identifier, audio_path)
+        payload = _process_transcription(
+            audio_path,
+            entry["filename"],
+            user_identifier,
+            user_output_dir,
+            options,
+            audio_digest=entry["digest"],
+            ticket=ticket,
+        )
+        return {
+            "filename": entry["filename"],
+            "status": "completed",
+            "transcript": payload["transcript"],
+            "metadata": payload["metadata"],
+            "files": payload["files"],
+        }
+    except Exception as exc:
+        app.logger.exception("Batch transcription of %s failed", entry["filename"])
+        return {"filename": entry["filename"], "status": "failed", "error": str(exc)}
+    finally:
+        _discard_prefetched_audio(audio_path)
+        audio_path.unlink(missing_ok=True)
+        if ticket is not None:
+            ticket.cancel()
+
+
+def _run_batch_job(
+    entries: List[Dict[str, Any]],
+    user_identifier: str,
+    user_output_dir: Path,
+    options: Dict[str, Any],
+    manifest_name: str,
+) -> Dict[str, Any]:
+    """Background job for /transcribe/batch: owns the spooled files, writes the manifest.
+
+    Up to BATCH_CONCURRENCY files are transcribed at once, in upload order.
+    Whenever a file is started, the next one is decoded on the prefetch
+    thread, so decoding overlaps with inference on the current file.
+    """
+    total = len(entries)
+    items: List[Optional[Dict[str, Any]]] = [None] * total
+    next_index = 0
+    index_lock = threading.Lock()
+    # The model server decodes on its side; remote backends upload the file as is
+    prefetch = _effective_backend(options) == "local" and _model_server is None
+
+    def _take() -> Optional[int]:
+        nonlocal next_index
+        with index_lock:
+            if next_index >= total:
+                return None
+            index = next_index
+            next_index += 1
+        if prefetch and index + 1 < total:
+            _prefetch_audio(Path(entries[index + 1]["path"]))
+        return index
+
+    def _work():
+        index = _take()
+        while index is not None:
+            items[index] = _process_batch_entry(entries[index], user_identifier, user_output_dir, options)
+            index = _take()
+
+    try:
+        with ThreadPoolExecutor(
+            max_workers=min(BATCH_CONCURRENCY, total), thread_name_prefix="batch"
+        ) as pool:
+            pending = {pool.submit(_work) for _ in range(min(BATCH_CONCURRENCY, total))}
+            while pending:
+                _, pending = wait_futures(pending, timeout=1.0, return_when=FIRST_COMPLETED)
+                report_job_progress(sum(item is not None for item in items) / total)
+    finally:
+        for entry in entries:
+            _discard_prefetched_audio(Path(entry["path"]))
+            Path(entry["path"]).unlink(missing_ok=True)
+
+    completed = sum(item["status"] == "completed" for item in items)
+    manifest = {
+        "kind": "batch",
+        "manifest": manifest_name,
+        "created_at": time.time(),
+        "total": total,
+        "completed": completed,
+        "failed": total - completed,
+        "items": items,
+    }
+    manifest_path = user_output_dir / manifest_name
+    tmp_path = manifest_path.with_name(f".{manifest_name}.{os.getpid()}.tmp")
+    try:
+        tmp_path.write_text(json.dumps(manifest, ensure_ascii=False, default=str), encoding="utf-8")
+        os.replace(tmp_path, manifest_path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    return manifest
+
+
+def _public_manifest(manifest: Dict[str, Any]) -> Dict[str, Any]:
+    """Shape a batch manifest for API responses (download links instead of file names)."""
+    items = []
+    for item in manifest.get("items", ()):
+        public_item = {key: value for key, value in item.items() if key != "files"}
+        if "files" in item:
+            public_item["downloads"] = _download_urls(item["files"])
+        items.append(public_item)
+    response = {key: value for key, value in manifest.items() if key != "items"}
+    response["items"] = items
+    response["manifest_url"] = request.host_url.rstrip("/") + app.url_for(
+        "download_file", filename=manifest["manifest"]
+    )
+    return response
+
+
+@app.post("/transcribe/batch")
+def transcribe_batch():
+    """Queue many recordings (repeated "audio" fields and/or zip archives) as one job.
+
+    Responds 202 with the job; its result is a manifest with per-file results
+    and download links, also saved as a downloadable <name>.manifest.json.
+    """
+    try:
+        user_identifier, user_output_dir = _resolve_current_user_dir(create=True)
+    except PermissionError as exc:
+        return jsonify({"error": str(exc)}), 401
+
+    if not has_free_space(SPOOL_DIR, request.content_length, SPOOL_MIN_FREE_BYTES):
+        return jsonify({"error": "Not enough free space to accept this upload. Try again later."}), 507
+
+    upload_started = time.perf_counter()
+    uploads = [
+        upload for upload in request.files.getlist("audio") + request.files.getlist("archive")
+        if upload.filename
+    ]
+    if not uploads:
+        return jsonify({"error": "No audio files provided."}), 400
+
+    options = _parse_transcription_options(request.form)
+    entries: List[Dict[str, Any]] = []
+    used_names = set()
+
+    def _add_entry(filename: str, path: Path, digest: str):
+        # Outputs are named after the stem, so same-named files (e.g. from different
+        # archive folders, or a.wav and a.mp3) get distinct names
+        stem, suffix = Path(filename).stem or "audio", Path(filename).suffix
+        unique, unique_stem, counter = filename, stem, 1
+        while unique_stem.lower() in used_names:
+            counter += 1
+            unique_stem = f"{stem}-{counter}"
+            unique = f"{unique_stem}{suffix}"
+        used_names.add(unique_stem.lower())
+        entries.append({"filename": unique, "path": str(path), "digest": digest})
+
+    try:
+        for upload in uploads:
+            filename = secure_filename(upload.filename) or "recording.wav"
+            suffix = Path(filename).suffix.lower() or ".wav"
+            path, digest = _save_upload(upload, suffix)
+            if suffix != ".zip":
+                _add_entry(filename, path, digest)
+                continue
+            try:
+                if not has_free_space(SPOOL_DIR, None, SPOOL_MIN_FREE_BYTES):
+                    return jsonify({"error": "Not enough free space to unpack the archive."}), 507
+                members = spool_zip_members(
+                    path,
+                    SPOOL_DIR,
+                    BATCH_AUDIO_EXTENSIONS,
+                    max_files=BATCH_MAX_FILES,
+                    max_bytes=MAX_UPLOAD_BYTES,
+                    chunk_bytes=UPLOAD_CHUNK_BYTES,
+                )
+            finally:
+                path.unlink(missing_ok=True)
+            for member_name, member_path, member_digest in members:
+                _add_entry(secure_filename(member_name) or "recording.wav", member_path, member_digest)
+
+        if not entries:
+            return jsonify({"error": "No audio files found in the upload."}), 400
+        if len(entries) > BATCH_MAX_FILES:
+            return jsonify({"error": f"A batch may contain at most {BATCH_MAX_FILES} files."}), 400
+
+        metrics.observe(
+            "transcriber_stage_seconds",
+            time.perf_counter() - upload_started,
+            stage="upload_save",
+            backend=_effective_backend(options),
+        )
+        manifest_name = f"{time.strftime('%Y%m%d-%H%M%S')}_batch-{uuid.uuid4().hex[:8]}.manifest.json"
+        record = submit_job(
+            _run_batch_job,
+            entries,
+            user_identifier,
+            user_output_dir,
+            options,
+            manifest_name,
+            owner=user_identifier,
+            description={
+                "kind": "batch",
+                "filename": f"{len(entries)} files",
+                "backend": options["backend"],
+                "files": [entry["filename"] for entry in entries],
+            },
+        )
+        # The job now owns the spooled files
+        entries = []
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    finally:
+        for entry in entries:
+            Path(entry["path"]).unlink(missing_ok=True)
+
+    response = jsonify({**_public_job(record), "files": record["files"]})
+    response.status_code = 202
+    response.headers["Location"] = app.url_for("job_status", job_id=record["id"])
+    return response
 
 
 def _transcribe_local(
@@ -397,9 +1407,18 @@ def _transcribe_local(
     use_gpu: bool,
     diarization_mode: str,
     min_speakers: int,
-    max_speakers: int
+    max_speakers: int,
+    user_identifier: str = DEFAULT_USER_IDENTIFIER,
+    word_timestamps: bool = False,
+    on_segment: Optional[SegmentCallback] = None,
 ) -> Dict:
-    """Transcribe using local faster-whisper"""
+    """Transcribe using local faster-whisper
+
+    ``on_segment`` is called with each segment (before speaker assignment) and
+    the fraction of audio decoded so far, as faster-whisper produces them.
+    With ``word_timestamps`` each segment carries a "words" list, and local
+    diarization labels the individual words too.
+    """
     
     if model_name not in AVAILABLE_MODELS:
         raise ValueError(f"Unsupported model: {model_name}")
@@ -412,59 +1431,115 @@ def _transcribe_local(
     task_mode = "translate" if translate else "transcribe"
     picked_language = None if language in {"", "auto", "Automatic"} else language
 
-    try:
-        model = _get_model(model_name, desired_device, desired_compute)
-    except (RuntimeError, ValueError) as exc:
-        if use_gpu:
-            app.logger.warning(
-                "GPU load failed for model '%s'. Falling back to CPU. Error: %s",
-                model_name,
-                exc,
-            )
-            actual_use_gpu = False
-            actual_device, actual_compute = _resolve_device_choice(False)
-            model = _get_model(model_name, actual_device, actual_compute)
-        else:
-            raise
+    # Long files on CPU can be split across the long-audio process pool, which
+    # loads its own model copies, so this worker's model isn't needed then
+    audio = None
+    long_audio = False
+    if _model_server is None and desired_device.lower() == "cpu":
+        long_audio_config = long_audio_settings()
+        if long_audio_config["enabled"]:
+            audio = _decode_upload(audio_path)
+            long_audio = len(audio) / AUDIO_SAMPLE_RATE >= long_audio_config["min_seconds"]
+
+    model = None
+    if not long_audio:
+        try:
+            model = _load_whisper(model_name, desired_device, desired_compute)
+        except (RuntimeError, ValueError) as exc:
+            if use_gpu:
+                app.logger.warning(
+                    "GPU load failed for model '%s'. Falling back to CPU. Error: %s",
+                    model_name,
+                    exc,
+                )
+                actual_use_gpu = False
+                actual_device, actual_compute = _resolve_device_choice(False)
+                model = _load_whisper(model_name, actual_device, actual_compute)
+            else:
+                raise
+
+    transcribe_params = {
+        "temperature": temperature,
+        "beam_size": beam_size,
+        "vad_filter": VAD_ENABLED,
+        "task": task_mode,
+        "language": picked_language,
+    }
+    if word_timestamps:
+        transcribe_params["word_timestamps"] = True
+
+    # Decode once; Whisper and pyannote share the PCM buffer (the model
+    # server decodes on its side, once for both)
+    if audio is None and model is not None:
+        audio = _decode_upload(audio_path)
+
+    diarize = diarization_mode == "local" and bool(HF_TOKEN)
+    diarization_params = {
+        "min_speakers": min_speakers if min_speakers > 0 else None,
+        "max_speakers": max_speakers if max_speakers > 0 else None,
+        "device": "cuda" if actual_use_gpu else "cpu",
+    }
+    # The model server diarizes as part of the transcribe call
+    remote_diarization = diarize and model is None and not long_audio
+    diarization_future: Optional[Future] = None
+    if diarize and DIARIZATION_CONCURRENT and not remote_diarization:
+        # Speaker turns don't depend on the transcript, so overlap the two stages
+        app.logger.info("Starting local diarization alongside transcription...")
+        diarization_future = _diarization_executor.submit(_diarize, audio_path, audio, **diarization_params)
 
-    segments_iter, info = model.transcribe(
-        str(audio_path),
-        temperature=temperature,
-        beam_size=beam_size,
-        vad_filter=VAD_ENABLED,
-        task=task_mode,
-        language=picked_language,
-        compression_ratio_threshold=2.4,
-        no_speech_threshold=0.6,
-    )
+    try:
+        with metrics.timed("transcribe", backend="local"):
+            if long_audio:
+                whisper_result = transcribe_long_audio(
+                    audio, model_name, actual_compute, on_segment=on_segment, **transcribe_params
+                )
+            elif model is None:
+                whisper_result = _model_server.transcribe(
+                    str(audio_path),
+                    model_name,
+                    actual_device,
+                    actual_compute,
+                    on_segment=on_segment,
+                    spill_dir=str(SPOOL_DIR),
+                    diarization=diarization_params if remote_diarization else None,
+                    **transcribe_params,
+                )
+            elif BATCHING_ENABLED:
+                whisper_result = get_batch_scheduler().transcribe(
+                    model,
+                    (model_name, actual_device, actual_compute),
+                    audio,
+                    on_segment=on_segment,
+                    **transcribe_params,
+                )
+            else:
+                whisper_result = transcribe_with_model(
+                    model, audio, on_segment=on_segment, **transcribe_params
+                )
+    except BaseException:
+        if diarization_future is not None:
+            diarization_future.cancel()
+        raise
 
-    segments_list = list(segments_iter)
+    segments = SegmentTable.coerce(whisper_result["segments"])
+    info = whisper_result["info"]
     
-    # Convert to dict format
-    segments = [
-        {
-            "start": seg.start,
-            "end": seg.end,
-            "text": seg.text
-        }
-        for seg in segments_list
-    ]
-    
-    transcript_text = "".join(seg["text"] for seg in segments).strip()
+    transcript_text = segments.full_text().strip()
 
     # Handle diarization if requested
-    if diarization_mode == "local" and HF_TOKEN:
+    if diarize:
         try:
-            app.logger.info("Starting local diarization...")
-            diar_segments = diarize_audio(
-                str(audio_path),
-                HF_TOKEN,
-                min_speakers=min_speakers if min_speakers > 0 else None,
-                max_speakers=max_speakers if max_speakers > 0 else None,
-                device="cuda" if actual_use_gpu else "cpu",
-                auto_unload=True
-            )
-            segments = assign_speakers_to_segments(segments, diar_segments)
+            if remote_diarization:
+                diar_segments = _remote_diarization_segments(whisper_result)
+            elif diarization_future is not None:
+                diar_segments = diarization_future.result()
+            else:
+                app.logger.info("Starting local diarization...")
+                diar_segments = _diarize(audio_path, audio, **diarization_params)
+            with metrics.timed("speaker_assignment", backend="local"):
+                segments = assign_speakers_to_segments(
+                    segments, diar_segments, word_level=word_timestamps
+                )
             app.logger.info("Local diarization complete")
         except Exception as e:
             error_msg = str(e)
@@ -481,13 +1556,13 @@ def _transcribe_local(
             else:
                 raise Exception(f"Diarization failed: {error_msg}")
 
-    detected_language = info.language or picked_language or "unknown"
+    detected_language = info["language"] or picked_language or "unknown"
     
     return {
         "text": transcript_text,
         "segments": segments,
         "metadata": {
-            "user": request.headers.get(USER_IDENTITY_HEADER, DEFAULT_USER_IDENTIFIER),
+            "user": user_identifier,
             "backend": "local",
             "model": model_name,
             "device": actual_device,
@@ -495,18 +1570,20 @@ def _transcribe_local(
             "gpu_requested": use_gpu,
             "gpu_used": actual_use_gpu,
             "detected_language": detected_language,
-            "language_probability": info.language_probability,
-            "duration": info.duration,
+            "language_probability": info["language_probability"],
+            "duration": info["duration"],
             "temperature": temperature,
             "beam_size": beam_size,
             "task": task_mode,
             "diarization": diarization_mode,
+            "word_timestamps": word_timestamps,
+            "long_audio_mode": long_audio,
         }
     }
 
 
-def _transcribe_openai(audio_path: Path, language: str, temperature: float) -> Dict:
-    """Transcribe using OpenAI API"""
+def _transcribe_openai(audio_path: Path, language: str, temperature: float, ticket: Optional[Ticket] = None) -> Dict:
+    """Transcribe using OpenAI API (a long file is decoded for chunking in a CPU slot)"""
     
     if not OPENAI_API_KEY:
         raise ValueError("OpenAI API key not configured")
@@ -515,7 +1592,9 @@ def _transcribe_openai(audio_path: Path, language: str, temperature: float) -> D
         str(audio_path),
         OPENAI_API_KEY,
         language=language if language not in {"", "auto"} else None,
-        temperature=temperature
+        temperature=temperature,
+        spill_dir=str(SPOOL_DIR),
+        decode_slot=lambda: _device_slot(ticket, backend="openai"),
     )
     
     return {
@@ -526,6 +1605,7 @@ def _transcribe_openai(audio_path: Path, language: str, temperature: float) -> D
             "model": "whisper-1",
             "detected_language": result.get("language", "unknown"),
             "duration": result.get("duration", 0),
+            "chunks": result.get("chunks", 1),
         }
     }
 
@@ -561,9 +1641,47 @@ def download_file(filename: str):
         return jsonify({"error": str(exc)}), 401
 
     safe_path = safe_join(user_output_dir, filename)
-    if safe_path is None or not Path(safe_path).exists():
+    if safe_path is None:
         return jsonify({"error": "File not found."}), 404
-    return send_file(safe_path, as_attachment=True)
+    if Path(safe_path).is_file():
+        # Files written before transcripts were stored canonically
+        return send_file(safe_path, as_attachment=True)
+
+    target = resolve_download(Path(safe_path))
+    if target is None:
+        return jsonify({"error": "File not found."}), 404
+    canonical, fmt = target
+
+    etag = _render_cache.etag(canonical, fmt)
+    if etag in request.if_none_match:
+        response = app.response_class(status=304)
+        response.set_etag(etag)
+        return response
+
+    with metrics.timed("download_render"):
+        rendered = _render_cache.render(canonical, fmt, etag=etag)
+    if isinstance(rendered, bytes):
+        rendered = io.BytesIO(rendered)
+    return send_file(
+        rendered,
+        as_attachment=True,
+        download_name=Path(safe_path).name,
+        etag=etag,
+        last_modified=canonical.stat().st_mtime,
+    )
+
+
+@app.get("/metrics")
+def metrics_endpoint():
+    """Prometheus metrics aggregated across all workers."""
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
+@app.get("/readyz")
+def readiness():
+    """Ready once every WHISPER_PRELOAD model is loaded and warmed up (503 until then)."""
+    preload = _preloader.stats()
+    return jsonify(preload), 200 if preload["ready"] else 503
 
 
 @app.get("/healthz")
@@ -577,18 +1695,34 @@ def healthcheck():
         "gpu_supported": _gpu_supported,
         "diagnostic_notes": _diagnostic_notes,
         "uptime_seconds": max(time.time() - _app_start_time, 0.0),
+        "startup": _startup_timings,
         "requires_auth": REQUIRE_USER_HEADER,
+        "jobs": get_job_stats(),
+        "model_cache": _model_cache.stats(),
+        "preload": _preloader.stats(),
+        "batching": get_batch_scheduler().stats() if BATCHING_ENABLED else None,
+        "result_cache": _result_cache.stats(),
+        "render_cache": _render_cache.stats(),
+        "scheduler": _scheduler.stats(),
         "backends": {
             "local": True,
             "openai": bool(OPENAI_API_KEY),
             "assemblyai": bool(ASSEMBLYAI_API_KEY),
+            "remote": api_backend_stats(),
         },
         "diarization": {
             "local": ENABLE_ONDEMAND_DIARIZATION and bool(HF_TOKEN),
-            "model_loaded": is_diarization_loaded(),
+            "model_loaded": _diarization_loaded(),
+            "residency": diarization.diarization_stats() if _model_server is None else None,
             "vram": vram,
         }
     }
+    if _model_server is not None:
+        try:
+            payload["model_server"] = {"socket": MODEL_SERVER_SOCKET, **_model_server.status()}
+        except ModelServerError as exc:
+            payload["status"] = "degraded"
+            payload["model_server"] = {"socket": MODEL_SERVER_SOCKET, "error": str(exc)}
     return jsonify(payload), 200
 
 
@@ -596,7 +1730,10 @@ def healthcheck():
 def unload_diarization():
     """Manually unload diarization model to free VRAM"""
     try:
-        unload_diarization_model()
+        if _model_server is not None:
+            _model_server.unload("diarization")
+        else:
+            unload_diarization_model()
         vram = get_vram_usage()
         return jsonify({
             "status": "success",
@@ -611,34 +1748,39 @@ def unload_diarization():
 def unload_whisper():
     """Manually unload Whisper models to free VRAM
     
-    NOTE: This only affects the current worker process.
+    NOTE: Without a model server this only affects the current worker process.
     With multiple Gunicorn workers, use /restart endpoint for full cleanup.
     """
-    global _MODEL_CACHE
-    
+    if _model_server is not None:
+        try:
+            result = _model_server.unload("whisper")
+            return jsonify({
+                "status": "success",
+                "message": "Unloaded from the shared model server.",
+                "models_unloaded": result.get("models_unloaded", 0),
+                "gpu_status": get_full_gpu_status(refresh=True)
+            })
+        except ModelServerError as e:
+            app.logger.error(f"Failed to unload Whisper models: {e}")
+            return jsonify({"error": str(e)}), 500
+
     try:
-        import gc
-        import torch
         import os
         
-        models_unloaded = len(_MODEL_CACHE)
-        
-        # Clear all cached models in THIS worker
-        _MODEL_CACHE.clear()
+        # Clear all cached models in THIS worker (collects garbage too)
+        models_unloaded = _model_cache.clear()
+        shutdown_long_audio_pool()
         
-        # Force garbage collection
-        gc.collect()
-        
-        # Clear CUDA cache
-        if torch.cuda.is_available():
+        # Clear CUDA cache (only torch-based diarization allocates through torch)
+        torch = sys.modules.get("torch")
+        if torch is not None and torch.cuda.is_available():
             torch.cuda.empty_cache()
             torch.cuda.synchronize()
         
         app.logger.info(f"Worker {os.getpid()}: Unloaded {models_unloaded} Whisper model(s)")
         
-        # Get updated VRAM status
-        from utils.gpu_monitor import get_full_gpu_status
-        gpu_status = get_full_gpu_status()
+        # Get updated VRAM status (sample now; the cached snapshot predates the unload)
+        gpu_status = get_full_gpu_status(refresh=True)
         
         return jsonify({
             "status": "success",
@@ -697,13 +1839,11 @@ def restart_service():
 
 @app.get("/gpu/status")
 def gpu_status():
-    """Get current GPU status including VRAM usage and processes"""
+    """Get current GPU status including VRAM usage and processes (cached snapshot)"""
     try:
-        from utils.gpu_monitor import get_full_gpu_status
-        
         status = get_full_gpu_status()
-        status['whisper_models_loaded'] = len(_MODEL_CACHE)
-        status['diarization_loaded'] = is_diarization_loaded()
+        status['whisper_models_loaded'] = _loaded_whisper_model_count()
+        status['diarization_loaded'] = _diarization_loaded()
         
         return jsonify(status)
     except Exception as e:
@@ -738,6 +1878,14 @@ def _resolve_current_user_dir(create: bool = False) -> Tuple[str, Path]:
 
     return header_value, user_dir
 
+_startup_timings["total_seconds"] = round(time.perf_counter() - _import_started, 3)
+app.logger.info(
+    "Worker %s ready in %.2fs (env probe %s)",
+    os.getpid(),
+    _startup_timings["total_seconds"],
+    "cached" if _gpu_probe_cached else f"{_startup_timings['env_probe_seconds']:.2f}s",
+)
+
 
 if __name__ == "__main__":
     app.run(
@@ -0,0 +1,387 @@
+"""
+Benchmark the local transcription pipeline across a settings matrix
+
+Every (model, compute_type, beam_size, VAD, threads) cell is run on each audio
+fixture in a fresh subprocess, so peak RSS and thread settings are isolated.
+Audio goes through app._transcribe_local (decode, Whisper, diarization,
+speaker assignment) and then every output format is rendered. Results are
+printed as JSON with real-time factor, peak RSS and per-stage timings, and can
+be compared against a saved baseline to flag regressions.
+
+Fixtures are synthetic and deterministic (speech-like harmonic bursts with
+pauses; multi-speaker uses three voices with known turns, which stand in for
+pyannote unless --real-diarization is given). Pass --fixture name=path.wav to
+benchmark real recordings instead.
+
+Usage (from the flask-app directory):
+    python -m benchmarks.pipeline --models small --compute-types int8,float32 \\
+        --beam-sizes 1,5 --vad on,off --threads 4,8 --output results.json
+    python -m benchmarks.pipeline ... --baseline baseline.json
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+FLASK_APP_DIR = Path(__file__).resolve().parents[1]
+SAMPLE_RATE = 16000
+
+# name -> (seconds, speakers)
+FIXTURES = {
+    "short": (30, 1),
+    "medium": (300, 1),
+    "long": (1800, 1),
+    "multi": (180, 3),
+}
+
+# Matrix fields that identify a result row (used to match against the baseline)
+KEY_FIELDS = ("fixture", "model", "compute_type", "beam_size", "vad", "threads")
+
+
+# =============================================================================
+# Fixtures
+# =============================================================================
+
+def _synthesize(seconds: int, speakers: int, seed: int):
+    """Speech-like audio: voiced harmonic syllables grouped into utterances."""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    audio = np.zeros(seconds * SAMPLE_RATE, dtype=np.float32)
+    pitches = [110.0, 180.0, 240.0][:speakers]
+    turns = []
+
+    position = 0.5
+    speaker = 0
+    while position < seconds - 1:
+        turn_length = rng.uniform(3.0, 15.0) if speakers > 1 else seconds
+        turn_end = min(position + turn_length, seconds - 0.5)
+        turn_start = position
+        while position < turn_end:
+            # One utterance of 4-20 syllables
+            for _ in range(rng.integers(4, 21)):
+                length = rng.uniform(0.12, 0.3)
+                if position + length >= turn_end:
+                    break
+                start = int(position * SAMPLE_RATE)
+                t = np.arange(int(length * SAMPLE_RATE), dtype=np.float32) / SAMPLE_RATE
+                f0 = pitches[speaker] * rng.uniform(0.85, 1.15)
+                voice = sum(np.sin(2 * np.pi * f0 * h * t) / h for h in range(1, 6))
+                envelope = np.sin(np.pi * t / length)
+                audio[start:start + len(t)] += 0.2 * voice * envelope
+                position += length + rng.uniform(0.02, 0.08)
+            position += rng.uniform(0.3, 1.2)
+        turns.append({"start": turn_start, "end": min(position, seconds), "speaker": f"SPEAKER_{speaker:02d}"})
+        speaker = (speaker + 1 + int(rng.integers(0, max(speakers - 1, 1)))) % speakers if speakers > 1 else 0
+        position += rng.uniform(0.2, 0.8)
+
+    audio += 0.003 * rng.standard_normal(len(audio)).astype(np.float32)
+    return np.clip(audio, -1.0, 1.0), turns
+
+
+def prepare_fixture(name: str, directory: Path) -> Dict[str, Any]:
+    """Write (or reuse) a synthetic fixture WAV and its speaker turns."""
+    seconds, speakers = FIXTURES[name]
+    path = directory / f"{name}.wav"
+    turns_path = directory / f"{name}.turns.json"
+    if not path.exists() or not turns_path.exists():
+        import numpy as np
+
+        audio, turns = _synthesize(seconds, speakers, seed=sum(map(ord, name)))
+        directory.mkdir(parents=True, exist_ok=True)
+        with wave.open(str(path), "wb") as out:
+            out.setnchannels(1)
+            out.setsampwidth(2)
+            out.setframerate(SAMPLE_RATE)
+            out.writeframes((audio * 32767).astype(np.int16).tobytes())
+        turns_path.write_text(json.dumps(turns), encoding="utf-8")
+    return {
+        "name": name,
+        "path": str(path),
+        "turns": json.loads(turns_path.read_text(encoding="utf-8")) if speakers > 1 else None,
+    }
+
+
+# =============================================================================
+# One cell (runs in its own process)
+# =============================================================================
+
+def _stage_deltas(metrics, before) -> Dict[str, float]:
+    stages: Dict[str, float] = {}
+    for labels, (count, total) in metrics.histogram_totals("transcriber_stage_seconds").items():
+        previous = before.get(labels, (0, 0.0))
+        if count > previous[0]:
+            stage = dict(labels)["stage"]
+            stages[stage] = stages.get(stage, 0.0) + total - previous[1]
+    return stages
+
+
+def run_cell(cell: Dict[str, Any]) -> Dict[str, Any]:
+    """Transcribe one fixture with one settings combination; returns a result row."""
+    import app
+    from utils import metrics
+    from utils.formatters import FORMAT_EXTENSIONS, write_transcript_files
+
+    fixture = cell["fixture"]
+    app.VAD_ENABLED = cell["vad"]
+    diarization_mode = "none"
+    if fixture.get("turns") is not None:
+        diarization_mode = "local"
+        if not cell.get("real_diarization"):
+            turns = fixture["turns"]
+            app.HF_TOKEN = app.HF_TOKEN or "benchmark"
+            app._diarize = lambda audio_path, audio=None, **params: [dict(turn) for turn in turns]
+
+    model_started = time.perf_counter()
+    app._load_whisper(cell["model"], cell["device"], cell["compute_type"])
+    model_load_seconds = time.perf_counter() - model_started
+
+    runs = []
+    for _ in range(cell["repeat"]):
+        before = metrics.histogram_totals("transcriber_stage_seconds")
+        started = time.perf_counter()
+        result = app._transcribe_local(
+            Path(fixture["path"]),
+            cell["model"],
+            cell["language"],
+            0.0,
+            cell["beam_size"],
+            False,
+            cell["device"] != "cpu",
+            diarization_mode,
+            0,
+            0,
+        )
+        with tempfile.TemporaryDirectory() as out_dir:
+            format_started = time.perf_counter()
+            write_transcript_files(
+                result["segments"],
+                {fmt: Path(out_dir) / f"out{extension}" for fmt, extension in FORMAT_EXTENSIONS.items()},
+                metadata=result["metadata"],
+            )
+            format_seconds = time.perf_counter() - format_started
+        wall = time.perf_counter() - started
+        stages = _stage_deltas(metrics, before)
+        stages["format"] = format_seconds
+        runs.append((wall, stages, result))
+
+    walls = [wall for wall, _, _ in runs]
+    median_wall = statistics.median(walls)
+    _, stages, result = min(runs, key=lambda run: abs(run[0] - median_wall))
+    audio_seconds = result["metadata"]["duration"] or 0.0
+    return {
+        **{field: cell[field] for field in KEY_FIELDS if field != "fixture"},
+        "fixture": fixture["name"],
+        "device": cell["device"],
+        "audio_seconds": round(audio_seconds, 2),
+        "wall_seconds": round(median_wall, 3),
+        "wall_seconds_min": round(min(walls), 3),
+        "rtf": round(median_wall / audio_seconds, 4) if audio_seconds else None,
+        "model_load_seconds": round(model_load_seconds, 3),
+        # ru_maxrss is in KiB on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "stages": {stage: round(seconds, 4) for stage, seconds in sorted(stages.items())},
+        "segments": len(result["segments"]),
+        "speakers": len({speaker for _, _, _, speaker in result["segments"].rows() if speaker}),
+        "detected_language": result["metadata"].get("detected_language"),
+    }
+
+
+def _run_cell_subprocess(cell: Dict[str, Any], output_dir: str) -> Dict[str, Any]:
+    env = dict(os.environ)
+    env.update({
+        "OMP_NUM_THREADS": str(cell["threads"]),
+        "TRANSCRIPTION_OUTPUT_DIR": output_dir,
+        "TRANSCRIBER_RESULT_CACHE_BYTES": "0",
+        "WHISPER_PRELOAD": "",
+        "WHISPER_BATCHING": "false",
+        "WHISPER_LONG_AUDIO": "false",
+        "DIARIZATION_CONCURRENT": "true" if cell["concurrent_diarization"] else "false",
+    })
+    completed = subprocess.run(
+        [sys.executable, "-m", "benchmarks.pipeline", "--cell", json.dumps(cell)],
+        cwd=FLASK_APP_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode != 0:
+        tail = completed.stderr.strip().splitlines()[-5:]
+        return {
+            **{field: cell[field] for field in KEY_FIELDS if field != "fixture"},
+            "fixture": cell["fixture"]["name"],
+            "error": "\n".join(tail) or f"exit status {completed.returncode}",
+        }
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+# =============================================================================
+# Baseline comparison
+# =============================================================================
+
+def _key(row: Dict[str, Any]) -> Tuple:
+    return tuple(row.get(field) for field in KEY_FIELDS)
+
+
+def compare(
+    results: List[Dict[str, Any]],
+    baseline: List[Dict[str, Any]],
+    rtf_tolerance: float,
+    rss_tolerance: float
+) -> List[Dict[str, Any]]:
+    """Rows whose RTF or peak RSS grew beyond the tolerance (fractions, e.g. 0.1 = 10%)."""
+    previous = {_key(row): row for row in baseline if "error" not in row}
+    regressions = []
+    for row in results:
+        old = previous.get(_key(row))
+        if old is None or "error" in row:
+            continue
+        for metric, tolerance in (("rtf", rtf_tolerance), ("peak_rss_mb", rss_tolerance)):
+            new_value, old_value = row.get(metric), old.get(metric)
+            if new_value is None or not old_value:
+                continue
+            change = new_value / old_value - 1
+            if change > tolerance:
+                regressions.append({
+                    **{field: row[field] for field in KEY_FIELDS},
+                    "metric": metric,
+                    "baseline": old_value,
+                    "current": new_value,
+                    "change_pct": round(change * 100, 1),
+                })
+    return regressions
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+def _split(value: str) -> List[str]:
+    return [part.strip() for part in value.split(",") if part.strip()]
+
+
+def _on_off(value: str) -> List[bool]:
+    return [part.lower() in {"1", "on", "true", "yes"} for part in _split(value)]
+
+
+def _print_summary(results: List[Dict[str, Any]]):
+    header = f"{'fixture':8} {'model':10} {'compute':12} {'beam':>4} {'vad':>4} {'thr':>4} {'rtf':>8} {'rss MB':>8}"
+    print(header, file=sys.stderr)
+    for row in results:
+        if "error" in row:
+            print(f"{row['fixture']:8} {row['model']:10} {row['compute_type']:12} ERROR {row['error']}", file=sys.stderr)
+            continue
+        print(
+            f"{row['fixture']:8} {row['model']:10} {row['compute_type']:12} {row['beam_size']:>4} "
+            f"{'on' if row['vad'] else 'off':>4} {row['threads']:>4} {row['rtf'] or 0:>8.3f} {row['peak_rss_mb']:>8.0f}",
+            file=sys.stderr,
+        )
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cell", help=argparse.SUPPRESS)
+    parser.add_argument("--models", default="small")
+    parser.add_argument("--compute-types", default="int8")
+    parser.add_argument("--beam-sizes", default="5")
+    parser.add_argument("--vad", default="on", help="on, off or on,off")
+    parser.add_argument("--threads", default=str(os.cpu_count() or 4))
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--fixtures", default="short,medium,multi", help=f"any of {','.join(FIXTURES)}")
+    parser.add_argument("--fixture", action="append", default=[], metavar="NAME=PATH",
+                        help="Benchmark a real recording (repeatable)")
+    parser.add_argument("--fixtures-dir", default=str(Path(tempfile.gettempdir()) / "transcriber-bench-fixtures"))
+    parser.add_argument("--language", default="en", help="Fixed language (auto = detect)")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per cell; the median is reported")
+    parser.add_argument("--real-diarization", action="store_true",
+                        help="Run pyannote on multi-speaker fixtures instead of their known turns")
+    parser.add_argument("--sequential-diarization", action="store_true")
+    parser.add_argument("--output", help="Write results JSON here (default: stdout)")
+    parser.add_argument("--baseline", help="Results JSON to compare against")
+    parser.add_argument("--rtf-tolerance", type=float, default=0.10)
+    parser.add_argument("--rss-tolerance", type=float, default=0.10)
+    args = parser.parse_args(argv)
+
+    if args.cell:
+        print(json.dumps(run_cell(json.loads(args.cell))))
+        return
+
+    fixtures = [prepare_fixture(name, Path(args.fixtures_dir)) for name in _split(args.fixtures)]
+    for spec in args.fixture:
+        name, _, path = spec.partition("=")
+        fixtures.append({"name": name, "path": str(Path(path).resolve()), "turns": None})
+
+    matrix = itertools.product(
+        fixtures,
+        _split(args.models),
+        _split(args.compute_types),
+        [int(beam) for beam in _split(args.beam_sizes)],
+        _on_off(args.vad),
+        [int(threads) for threads in _split(args.threads)],
+    )
+    results = []
+    with tempfile.TemporaryDirectory(prefix="transcriber-bench-") as output_dir:
+        for fixture, model, compute_type, beam_size, vad, threads in matrix:
+            cell = {
+                "fixture": fixture,
+                "model": model,
+                "compute_type": compute_type,
+                "beam_size": beam_size,
+                "vad": vad,
+                "threads": threads,
+                "device": args.device,
+                "language": args.language,
+                "repeat": max(1, args.repeat),
+                "real_diarization": args.real_diarization,
+                "concurrent_diarization": not args.sequential_diarization,
+            }
+            print(f"Running {fixture['name']} {model} {compute_type} beam={beam_size} "
+                  f"vad={'on' if vad else 'off'} threads={threads}...", file=sys.stderr)
+            results.append(_run_cell_subprocess(cell, output_dir))
+
+    _print_summary(results)
+    report: Dict[str, Any] = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "host": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+
+    regressions: List[Dict[str, Any]] = []
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        regressions = compare(results, baseline.get("results", []), args.rtf_tolerance, args.rss_tolerance)
+        report["baseline"] = args.baseline
+        report["regressions"] = regressions
+        for regression in regressions:
+            print(
+                f"REGRESSION {regression['fixture']} {regression['model']} {regression['compute_type']} "
+                f"beam={regression['beam_size']}: {regression['metric']} "
+                f"{regression['baseline']} -> {regression['current']} (+{regression['change_pct']}%)",
+                file=sys.stderr,
+            )
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+    if regressions or any("error" in row for row in results):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
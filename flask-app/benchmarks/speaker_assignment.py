@@ -0,0 +1,104 @@
+"""
+Micro-benchmark for assign_speakers_to_segments
+
+Compares the windowed NumPy assignment (on a list of dicts and on a
+SegmentTable) with the original pairwise loop on synthetic meetings and
+checks that all of them produce the same labels.
+
+Usage (from the flask-app directory):
+    python -m benchmarks.speaker_assignment --segments 5000 --turns 8000
+"""
+import argparse
+import copy
+import random
+import time
+from typing import Any, Dict, List
+
+import numpy  # noqa: F401 - imported lazily by the code under test; keep it out of the timing
+
+from utils.diarization import assign_speakers_to_segments
+from utils.segments import SegmentTable
+
+
+def pairwise_assign(
+    transcription_segments: List[Dict[str, Any]],
+    diarization_segments: List[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """The original O(N*M) implementation, kept as the reference."""
+    for seg in transcription_segments:
+        seg_start = seg.get("start", 0)
+        seg_end = seg.get("end", 0)
+        best_speaker = "SPEAKER_UNKNOWN"
+        max_overlap = 0
+        for diar_seg in diarization_segments:
+            overlap = max(0, min(seg_end, diar_seg["end"]) - max(seg_start, diar_seg["start"]))
+            if overlap > max_overlap:
+                max_overlap = overlap
+                best_speaker = diar_seg["speaker"]
+        seg["speaker"] = best_speaker
+    return transcription_segments
+
+
+def synthetic_meeting(segment_count: int, turn_count: int, speakers: int, seed: int):
+    """Whisper-like segments and pyannote-like (sometimes overlapping) turns."""
+    rng = random.Random(seed)
+
+    segments = []
+    position = 0.0
+    for _ in range(segment_count):
+        position += rng.uniform(0.0, 1.0)
+        length = rng.uniform(1.0, 8.0)
+        segments.append({"start": position, "end": position + length, "text": "..."})
+        position += length
+
+    turns = []
+    total = position
+    for _ in range(turn_count):
+        start = rng.uniform(0.0, total)
+        turns.append({
+            "start": start,
+            "end": start + rng.uniform(0.3, 12.0),
+            "speaker": f"SPEAKER_{rng.randrange(speakers):02d}",
+        })
+    # pyannote yields turns in time order
+    turns.sort(key=lambda turn: turn["start"])
+    return segments, turns
+
+
+def _time(func, *args) -> float:
+    started = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--segments", type=int, default=5000)
+    parser.add_argument("--turns", type=int, default=8000)
+    parser.add_argument("--speakers", type=int, default=6)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    segments, turns = synthetic_meeting(args.segments, args.turns, args.speakers, args.seed)
+    reference = copy.deepcopy(segments)
+    candidate = copy.deepcopy(segments)
+    table = SegmentTable.from_dicts(segments)
+
+    pairwise_seconds = _time(pairwise_assign, reference, turns)
+    windowed_seconds = _time(assign_speakers_to_segments, candidate, turns)
+    table_seconds = _time(assign_speakers_to_segments, table, turns)
+
+    mismatches = sum(a["speaker"] != b["speaker"] for a, b in zip(reference, candidate))
+    mismatches += sum(a["speaker"] != speaker for a, (_, _, _, speaker) in zip(reference, table.rows()))
+    print(f"segments={args.segments} turns={args.turns}")
+    print(f"pairwise: {pairwise_seconds * 1000:.1f} ms")
+    print(f"windowed: {windowed_seconds * 1000:.1f} ms")
+    print(f"table:    {table_seconds * 1000:.1f} ms")
+    print(f"speedup:  {pairwise_seconds / max(windowed_seconds, 1e-9):.1f}x")
+    print(f"mismatches: {mismatches}")
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+#!/usr/bin/env bash
+set -euo pipefail
+cd /path/to/transcriber/flask-app
+exec env \
+    TRANSCRIBER_MODEL_SERVER="${TRANSCRIBER_MODEL_SERVER:-/run/transcriber/model-server.sock}" \
+    /path/to/transcriber/flask-app/.venv/bin/python -m utils.model_server
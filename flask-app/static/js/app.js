@@ -197,7 +197,7 @@
     );
 
     try {
-      const response = await fetch("/transcribe", {
+      const response = await fetch("/transcribe/stream", {
         method: "POST",
         body: formData,
       });
@@ -207,7 +207,28 @@
         throw new Error(payload.error || response.statusText);
       }
 
-      const payload = await response.json();
+      // Segments arrive as newline-delimited JSON while audio is decoded
+      transcriptOutput.value = "";
+      resultsSection.classList.remove("hidden");
+
+      let payload = null;
+      await readEventStream(response, (event) => {
+        if (event.type === "segment") {
+          transcriptOutput.value += event.segment.text;
+          setStatus(`Transcribing…${formatProgress(event.progress)}`, true);
+        } else if (event.type === "status") {
+          setStatus(`Transcribing…${formatProgress(event.progress)}`, true);
+        } else if (event.type === "result") {
+          payload = event;
+        } else if (event.type === "error") {
+          throw new Error(event.error);
+        }
+      });
+
+      if (!payload) {
+        throw new Error("Connection closed before the transcript was complete");
+      }
+
       transcriptOutput.value = payload.transcript || "";
       populateMetadata(payload.metadata || {});
 
@@ -224,6 +245,31 @@
     }
   }
 
+  async function readEventStream(response, onEvent) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+
+    while (true) {
+      const { value, done } = await reader.read();
+      buffer += decoder.decode(value || new Uint8Array(), { stream: !done });
+
+      let newline;
+      while ((newline = buffer.indexOf("\n")) >= 0) {
+        const line = buffer.slice(0, newline).trim();
+        buffer = buffer.slice(newline + 1);
+        if (line) onEvent(JSON.parse(line));
+      }
+
+      if (done) break;
+    }
+    if (buffer.trim()) onEvent(JSON.parse(buffer));
+  }
+
+  function formatProgress(progress) {
+    return typeof progress === "number" ? ` ${Math.round(progress * 100)}%` : "";
+  }
+
   function populateMetadata(metadata) {
     metadataContainer.innerHTML = "";
     const entries = Object.entries(metadata);
@@ -76,8 +76,16 @@ else
     echo "   Run: pip install -r requirements.txt"
 fi
 
-if python -c "import faster_whisper" 2>/dev/null; then
+if python -c "
+import re
+from importlib.metadata import version
+major, minor = (int(part) for part in re.findall(r'\d+', version('faster-whisper'))[:2])
+raise SystemExit(0 if (major, minor) >= (1, 2) else 1)
+" 2>/dev/null; then
     echo "   ✓ faster-whisper installed"
+elif python -c "import faster_whisper" 2>/dev/null; then
+    echo "   ❌ faster-whisper is older than 1.2.0 (batched inference passes clip_timestamps in seconds)"
+    echo "   Run: pip install -U 'faster-whisper>=1.2.0'"
 else
     echo "   ❌ faster-whisper not installed"
 fi
@@ -88,10 +96,10 @@ else
     echo "   ℹ️  openai not installed (needed for OpenAI backend)"
 fi
 
-if python -c "import assemblyai" 2>/dev/null; then
-    echo "   ✓ assemblyai installed"
+if python -c "import httpx" 2>/dev/null; then
+    echo "   ✓ httpx installed"
 else
-    echo "   ℹ️  assemblyai not installed (needed for AssemblyAI backend)"
+    echo "   ℹ️  httpx not installed (needed for AssemblyAI backend)"
 fi
 
 if python -c "import pyannote.audio" 2>/dev/null; then
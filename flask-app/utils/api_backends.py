@@ -1,14 +1,235 @@
 """
 API backend integrations for OpenAI Whisper and AssemblyAI
+
+Clients are created once per process and reused, so requests share keep-alive
+connection pools instead of paying a TLS handshake each. Each provider has a
+bounded number of requests in flight. AssemblyAI transcripts are polled by a
+single background thread with exponential backoff; callers just wait on a
+future. Base URLs are configurable (e.g. to point at a local stub server).
+
+Long or large files sent to OpenAI are cut at silences into WAV chunks below
+the upload limit, transcribed concurrently and merged with shifted timestamps.
 """
+import heapq
+import io
+import itertools
 import logging
 import os
-from pathlib import Path
-from typing import Optional, List, Dict, Any
+import threading
 import time
+import wave
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Tuple, Callable, ContextManager
+
+from utils.audio import SAMPLE_RATE
+from utils.model_cache import parse_size
 
 logger = logging.getLogger(__name__)
 
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+ASSEMBLYAI_BASE_URL = os.getenv("ASSEMBLYAI_BASE_URL", "https://api.assemblyai.com").rstrip("/")
+# HTTP requests in flight per provider and worker (AssemblyAI: upload + submit;
+# transcripts waiting at AssemblyAI don't count, the poller needs no slot)
+OPENAI_CONCURRENCY = max(1, int(os.getenv("TRANSCRIBER_OPENAI_CONCURRENCY", "4")))
+ASSEMBLYAI_CONCURRENCY = max(1, int(os.getenv("TRANSCRIBER_ASSEMBLYAI_CONCURRENCY", "8")))
+# Per HTTP request (uploads of long recordings need a generous limit)
+REQUEST_TIMEOUT = float(os.getenv("TRANSCRIBER_API_TIMEOUT", "600"))
+# Longest a remote AssemblyAI transcript may take before the request fails
+ASSEMBLYAI_MAX_WAIT = float(os.getenv("TRANSCRIBER_ASSEMBLYAI_MAX_WAIT", "7200"))
+
+# OpenAI rejects uploads above 25 MB; larger or longer files are sent in chunks
+OPENAI_MAX_UPLOAD_BYTES = parse_size(os.getenv("TRANSCRIBER_OPENAI_MAX_UPLOAD_BYTES", "24M"))
+OPENAI_CHUNK_SECONDS = float(os.getenv("TRANSCRIBER_OPENAI_CHUNK_SECONDS", "300"))
+# Chunks of one file transcribed at once (also bounded by TRANSCRIBER_OPENAI_CONCURRENCY)
+OPENAI_CHUNK_PARALLELISM = max(1, int(os.getenv("TRANSCRIBER_OPENAI_CHUNK_PARALLELISM", "4")))
+
+# Chunks are uploaded as 16 kHz mono 16-bit WAV
+WAV_BYTES_PER_SECOND = SAMPLE_RATE * 2
+
+POLL_INITIAL_SECONDS = 1.0
+POLL_MAX_SECONDS = 30.0
+POLL_BACKOFF = 1.6
+
+_lock = threading.Lock()
+_openai_clients: Dict[Tuple[str, Optional[str]], Any] = {}
+_http_client = None
+_limits = {
+    "openai": threading.BoundedSemaphore(OPENAI_CONCURRENCY),
+    "assemblyai": threading.BoundedSemaphore(ASSEMBLYAI_CONCURRENCY),
+}
+_in_flight = {"openai": 0, "assemblyai": 0}
+
+
+def _acquire(provider: str):
+    if not _limits[provider].acquire(timeout=REQUEST_TIMEOUT):
+        raise RuntimeError(f"Too many concurrent {provider} requests; try again later")
+    with _lock:
+        _in_flight[provider] += 1
+
+
+def _release(provider: str):
+    with _lock:
+        _in_flight[provider] -= 1
+    _limits[provider].release()
+
+
+def _get_openai_client(api_key: str):
+    """Process-wide OpenAI client per key (thread-safe, keeps its connection pool)."""
+    key = (api_key, OPENAI_BASE_URL)
+    with _lock:
+        client = _openai_clients.get(key)
+        if client is None:
+            from openai import OpenAI
+
+            client = OpenAI(api_key=api_key, base_url=OPENAI_BASE_URL, timeout=REQUEST_TIMEOUT, max_retries=2)
+            _openai_clients[key] = client
+        return client
+
+
+def _get_http_client():
+    """Shared httpx client for AssemblyAI's REST API."""
+    global _http_client
+
+    with _lock:
+        if _http_client is None:
+            try:
+                import httpx
+            except ImportError as e:
+                raise RuntimeError("httpx is not installed. Install it with: pip install httpx") from e
+            _http_client = httpx.Client(
+                timeout=REQUEST_TIMEOUT,
+                limits=httpx.Limits(max_connections=ASSEMBLYAI_CONCURRENCY + 2, max_keepalive_connections=4),
+            )
+        return _http_client
+
+
+def _field(item: Any, name: str) -> Any:
+    # SDK responses are objects in openai>=1.x, plain dicts in older versions
+    return item[name] if isinstance(item, dict) else getattr(item, name)
+
+
+def _openai_request(
+    client,
+    audio_file,
+    model: str,
+    language: Optional[str],
+    temperature: float,
+    response_format: str
+) -> Dict[str, Any]:
+    _acquire("openai")
+    try:
+        transcript = client.audio.transcriptions.create(
+            model=model,
+            file=audio_file,
+            language=language if language and language != "auto" else None,
+            temperature=temperature,
+            response_format=response_format
+        )
+    finally:
+        _release("openai")
+
+    # Parse response based on format
+    if response_format == "verbose_json":
+        return {
+            "text": transcript.text,
+            "language": transcript.language,
+            "duration": transcript.duration,
+            "segments": [
+                {
+                    "start": _field(seg, "start"),
+                    "end": _field(seg, "end"),
+                    "text": _field(seg, "text")
+                }
+                for seg in (transcript.segments or [])
+            ]
+        }
+    return {
+        "text": transcript.text if hasattr(transcript, "text") else str(transcript),
+        "segments": []
+    }
+
+
+def openai_needs_chunking(audio_path: str) -> bool:
+    """True if transcribe_with_openai will decode and split this file."""
+    from utils.audio import probe_duration
+
+    if os.path.getsize(audio_path) > OPENAI_MAX_UPLOAD_BYTES:
+        return True
+    duration = probe_duration(audio_path)
+    # Same threshold as plan_chunks: shorter files would end up as one chunk anyway
+    return duration is not None and duration > OPENAI_CHUNK_SECONDS * 1.25
+
+
+def _encode_wav(samples) -> bytes:
+    import numpy as np
+
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2")
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(SAMPLE_RATE)
+        wav.writeframes(pcm.tobytes())
+    return buffer.getvalue()
+
+
+def _transcribe_openai_chunked(
+    client,
+    audio_path: str,
+    model: str,
+    language: Optional[str],
+    temperature: float,
+    spill_dir: Optional[str] = None,
+    decode_slot: Optional[Callable[[], ContextManager]] = None
+) -> Dict[str, Any]:
+    from utils.audio import load_audio
+    from utils.chunked import plan_chunks
+
+    # plan_chunks may stretch a chunk to 1.5x the target to reach a silence
+    chunk_seconds = min(OPENAI_CHUNK_SECONDS, OPENAI_MAX_UPLOAD_BYTES / WAV_BYTES_PER_SECOND / 1.5)
+    with decode_slot() if decode_slot is not None else nullcontext():
+        audio = load_audio(audio_path, spill_dir=spill_dir)
+        try:
+            bounds = plan_chunks(audio, chunk_seconds)
+        except ImportError:
+            # Silence detection uses faster-whisper's VAD; cut at fixed lengths without it
+            bounds = plan_chunks(audio, chunk_seconds, vad_filter=False)
+
+    logger.info(
+        f"Sending {audio_path} to OpenAI in {len(bounds)} chunk(s) of ~{chunk_seconds:.0f}s, "
+        f"{OPENAI_CHUNK_PARALLELISM} at a time"
+    )
+
+    def transcribe_chunk(index: int) -> Dict[str, Any]:
+        start, end = bounds[index]
+        upload = (f"chunk-{index:04d}.wav", _encode_wav(audio[start:end]))
+        return _openai_request(client, upload, model, language, temperature, "verbose_json")
+
+    executor = ThreadPoolExecutor(
+        max_workers=min(OPENAI_CHUNK_PARALLELISM, len(bounds)), thread_name_prefix="openai-chunk"
+    )
+    try:
+        results = list(executor.map(transcribe_chunk, range(len(bounds))))
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    segments = []
+    for (start, _), result in zip(bounds, results):
+        offset = start / SAMPLE_RATE
+        for seg in result["segments"]:
+            segments.append({**seg, "start": seg["start"] + offset, "end": seg["end"] + offset})
+
+    languages = [result["language"] for result in results if result.get("language")]
+    return {
+        "text": " ".join(result["text"].strip() for result in results if result["text"].strip()),
+        "language": max(set(languages), key=languages.count) if languages else None,
+        "duration": len(audio) / SAMPLE_RATE,
+        "segments": segments,
+        "chunks": len(bounds),
+    }
+
 
 def transcribe_with_openai(
     audio_path: str,
@@ -16,11 +237,17 @@ def transcribe_with_openai(
     model: str = "whisper-1",
     language: Optional[str] = None,
     temperature: float = 0.0,
-    response_format: str = "verbose_json"
+    response_format: str = "verbose_json",
+    spill_dir: Optional[str] = None,
+    decode_slot: Optional[Callable[[], ContextManager]] = None
 ) -> Dict[str, Any]:
     """
     Transcribe audio using OpenAI Whisper API
-    
+
+    Files above TRANSCRIBER_OPENAI_MAX_UPLOAD_BYTES or longer than
+    TRANSCRIBER_OPENAI_CHUNK_SECONDS are split at silences and the chunks
+    transcribed concurrently (verbose_json only).
+
     Args:
         audio_path: Path to audio file
         api_key: OpenAI API key
@@ -28,55 +255,154 @@ def transcribe_with_openai(
         language: Language code (optional)
         temperature: Sampling temperature
         response_format: Response format (verbose_json includes timestamps)
-    
+        spill_dir: Directory for the PCM spill file when a large file is chunked
+        decode_slot: Returns a context manager held while a chunked file is
+            decoded and split (e.g. a scheduler CPU slot)
+
     Returns:
         Dict with transcript and segments
     """
     try:
-        from openai import OpenAI
-        
-        client = OpenAI(api_key=api_key)
-        
-        logger.info(f"Transcribing with OpenAI Whisper API: {audio_path}")
-        
-        with open(audio_path, "rb") as audio_file:
-            transcript = client.audio.transcriptions.create(
-                model=model,
-                file=audio_file,
-                language=language if language and language != "auto" else None,
-                temperature=temperature,
-                response_format=response_format
+        client = _get_openai_client(api_key)
+
+        if response_format == "verbose_json" and openai_needs_chunking(audio_path):
+            result = _transcribe_openai_chunked(
+                client, audio_path, model, language, temperature, spill_dir, decode_slot
             )
-        
-        # Parse response based on format
-        if response_format == "verbose_json":
-            result = {
-                "text": transcript.text,
-                "language": transcript.language,
-                "duration": transcript.duration,
-                "segments": [
-                    {
-                        "start": seg["start"],
-                        "end": seg["end"],
-                        "text": seg["text"]
-                    }
-                    for seg in (transcript.segments or [])
-                ]
-            }
         else:
-            result = {
-                "text": transcript.text if hasattr(transcript, "text") else str(transcript),
-                "segments": []
-            }
-        
+            logger.info(f"Transcribing with OpenAI Whisper API: {audio_path}")
+            with open(audio_path, "rb") as audio_file:
+                result = _openai_request(client, audio_file, model, language, temperature, response_format)
+
         logger.info("OpenAI transcription complete")
         return result
-        
+
     except Exception as e:
         logger.error(f"OpenAI transcription failed: {e}")
         raise
 
 
+class _AssemblyAIPoller:
+    """
+    One thread polling every pending AssemblyAI transcript of this process
+
+    Each transcript is re-checked after an exponentially growing delay
+    (POLL_INITIAL_SECONDS up to POLL_MAX_SECONDS); its future is resolved with
+    the final transcript JSON or an exception.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._heap: List[Tuple[float, int, Dict[str, Any]]] = []
+        self._sequence = itertools.count()
+        self._thread: Optional[threading.Thread] = None
+
+    def watch(self, transcript_id: str, api_key: str) -> Future:
+        future: Future = Future()
+        entry = {
+            "id": transcript_id,
+            "api_key": api_key,
+            "future": future,
+            "delay": POLL_INITIAL_SECONDS,
+            "deadline": time.monotonic() + ASSEMBLYAI_MAX_WAIT,
+        }
+        with self._condition:
+            self._push(entry)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="assemblyai-poller", daemon=True)
+                self._thread.start()
+        return future
+
+    def pending(self) -> int:
+        with self._condition:
+            return len(self._heap)
+
+    def _push(self, entry: Dict[str, Any]):
+        heapq.heappush(self._heap, (time.monotonic() + entry["delay"], next(self._sequence), entry))
+        self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._heap or self._heap[0][0] > time.monotonic():
+                    self._condition.wait(self._heap[0][0] - time.monotonic() if self._heap else None)
+                _, _, entry = heapq.heappop(self._heap)
+            try:
+                self._poll(entry)
+            except Exception as e:
+                logger.error(f"AssemblyAI poll of {entry['id']} failed: {e}")
+                entry["future"].set_exception(e)
+
+    def _poll(self, entry: Dict[str, Any]):
+        import httpx
+
+        future = entry["future"]
+        if future.cancelled():
+            return
+        try:
+            response = _get_http_client().get(
+                f"{ASSEMBLYAI_BASE_URL}/v2/transcript/{entry['id']}",
+                headers={"authorization": entry["api_key"]},
+            )
+            # Rate limits and server errors are retried like pending transcripts
+            if response.status_code != 429 and response.status_code < 500:
+                response.raise_for_status()
+                transcript = response.json()
+                if transcript["status"] == "completed":
+                    future.set_result(transcript)
+                    return
+                if transcript["status"] == "error":
+                    future.set_exception(RuntimeError(f"AssemblyAI error: {transcript.get('error')}"))
+                    return
+        except httpx.TransportError as e:
+            logger.warning(f"AssemblyAI poll of {entry['id']} failed, retrying: {e}")
+
+        if time.monotonic() >= entry["deadline"]:
+            future.set_exception(TimeoutError(f"AssemblyAI transcript {entry['id']} did not finish in time"))
+            return
+        entry["delay"] = min(entry["delay"] * POLL_BACKOFF, POLL_MAX_SECONDS)
+        with self._condition:
+            self._push(entry)
+
+
+_poller = _AssemblyAIPoller()
+
+
+def submit_assemblyai(
+    audio_path: str,
+    api_key: str,
+    max_speakers: Optional[int] = None
+) -> Future:
+    """
+    Upload audio to AssemblyAI and start a diarized transcript
+
+    Returns:
+        Future resolved with the completed transcript JSON by the poller thread
+    """
+    client = _get_http_client()
+    headers = {"authorization": api_key}
+
+    _acquire("assemblyai")
+    try:
+        with open(audio_path, "rb") as audio_file:
+            upload = client.post(f"{ASSEMBLYAI_BASE_URL}/v2/upload", headers=headers, content=audio_file)
+        upload.raise_for_status()
+
+        request_body: Dict[str, Any] = {"audio_url": upload.json()["upload_url"], "speaker_labels": True}
+        if max_speakers:
+            request_body["speakers_expected"] = max_speakers
+        created = client.post(f"{ASSEMBLYAI_BASE_URL}/v2/transcript", headers=headers, json=request_body)
+        created.raise_for_status()
+        transcript = created.json()
+    finally:
+        _release("assemblyai")
+
+    if transcript.get("status") == "error":
+        raise RuntimeError(f"AssemblyAI error: {transcript.get('error')}")
+
+    return _poller.watch(transcript["id"], api_key)
+
+
 def diarize_with_assemblyai(
     audio_path: str,
     api_key: str,
@@ -85,62 +411,63 @@ def diarize_with_assemblyai(
 ) -> Dict[str, Any]:
     """
     Transcribe and diarize audio using AssemblyAI
-    
+
     Args:
         audio_path: Path to audio file
         api_key: AssemblyAI API key
         min_speakers: Minimum number of speakers
         max_speakers: Maximum number of speakers
-    
+
     Returns:
         Dict with transcript and diarized segments
     """
     try:
-        import assemblyai as aai
-        
-        aai.settings.api_key = api_key
-        
         logger.info(f"Transcribing and diarizing with AssemblyAI: {audio_path}")
-        
-        config = aai.TranscriptionConfig(
-            speaker_labels=True,
-            speakers_expected=max_speakers
+
+        transcript = submit_assemblyai(audio_path, api_key, max_speakers=max_speakers).result(
+            timeout=ASSEMBLYAI_MAX_WAIT + REQUEST_TIMEOUT
         )
-        
-        transcriber = aai.Transcriber()
-        transcript = transcriber.transcribe(audio_path, config=config)
-        
-        if transcript.status == aai.TranscriptStatus.error:
-            raise Exception(f"AssemblyAI error: {transcript.error}")
-        
-        # Wait for completion with polling
-        while transcript.status not in [aai.TranscriptStatus.completed, aai.TranscriptStatus.error]:
-            logger.info("Waiting for AssemblyAI transcription...")
-            time.sleep(3)
-            transcript = transcriber.get_transcript(transcript.id)
-        
-        if transcript.status == aai.TranscriptStatus.error:
-            raise Exception(f"AssemblyAI error: {transcript.error}")
-        
+
         # Build segments with speaker labels
         segments = []
-        for utterance in (transcript.utterances or []):
+        for utterance in (transcript.get("utterances") or []):
             segments.append({
-                "start": utterance.start / 1000.0,  # Convert ms to seconds
-                "end": utterance.end / 1000.0,
-                "text": utterance.text,
-                "speaker": f"SPEAKER_{utterance.speaker}"
+                "start": utterance["start"] / 1000.0,  # Convert ms to seconds
+                "end": utterance["end"] / 1000.0,
+                "text": utterance["text"],
+                "speaker": f"SPEAKER_{utterance['speaker']}"
             })
-        
+
         result = {
-            "text": transcript.text,
+            "text": transcript.get("text") or "",
             "segments": segments,
             "speakers_detected": len(set(s["speaker"] for s in segments))
         }
-        
+
         logger.info(f"AssemblyAI diarization complete: {result['speakers_detected']} speakers")
         return result
-        
+
     except Exception as e:
         logger.error(f"AssemblyAI diarization failed: {e}")
         raise
+
+
+def api_backend_stats() -> Dict[str, Any]:
+    """In-flight requests per provider for status endpoints."""
+    with _lock:
+        in_flight = dict(_in_flight)
+    return {
+        "openai": {
+            "in_flight": in_flight["openai"],
+            "limit": OPENAI_CONCURRENCY,
+            "chunk_seconds": OPENAI_CHUNK_SECONDS,
+            "chunk_parallelism": OPENAI_CHUNK_PARALLELISM,
+            "base_url": OPENAI_BASE_URL,
+        },
+        "assemblyai": {
+            "in_flight": in_flight["assemblyai"],
+            "limit": ASSEMBLYAI_CONCURRENCY,
+            "polling": _poller.pending(),
+            "base_url": ASSEMBLYAI_BASE_URL,
+        },
+    }
@@ -0,0 +1,200 @@
+"""
+Single-pass audio decoding shared by Whisper and diarization
+
+Uploads are decoded once to 16 kHz mono float32. Large results are written to
+an unlinked temp file and memory-mapped, so long recordings are not held twice
+in RAM, and 16 kHz mono WAV files are mapped straight from disk.
+"""
+import logging
+import os
+import struct
+import tempfile
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+
+# Decoded audio larger than this is spilled to a memory-mapped temp file
+MMAP_THRESHOLD_BYTES = int(os.getenv("TRANSCRIBER_PCM_MMAP_BYTES", str(64 * 1024**2)))
+
+_WAVE_FORMAT_PCM = 1
+_WAVE_FORMAT_IEEE_FLOAT = 3
+_WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+def _read_wav_header(path: str):
+    """
+    Parse the RIFF header of a WAV file
+
+    Returns:
+        (fmt fields (format, channels, rate, byte rate, block align, bits),
+        data offset, data size), or None if the file is not a readable WAV
+    """
+    with open(path, "rb") as f:
+        header = f.read(12)
+        if len(header) < 12 or header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+            return None
+
+        fmt = None
+        while True:
+            chunk = f.read(8)
+            if len(chunk) < 8:
+                return None
+            chunk_id, size = struct.unpack("<4sI", chunk)
+            if chunk_id == b"fmt ":
+                body = f.read(size)
+                if len(body) < 16:
+                    return None
+                fmt = struct.unpack("<HHIIHH", body[:16])
+                if fmt[0] == _WAVE_FORMAT_EXTENSIBLE and len(body) >= 26:
+                    # The real format code is the first field of the sub-format GUID
+                    fmt = (struct.unpack("<H", body[24:26])[0],) + fmt[1:]
+            elif chunk_id == b"data":
+                if fmt is None:
+                    return None
+                available = os.path.getsize(path) - f.tell()
+                return fmt, f.tell(), min(size, available)
+            else:
+                f.seek(size + (size & 1), os.SEEK_CUR)
+
+
+def _find_wav_data(path: str):
+    """
+    Locate the sample data of a 16 kHz mono PCM16 / float32 WAV file
+
+    Returns:
+        (dtype, offset, sample_count), or None if the file needs decoding
+    """
+    header = _read_wav_header(path)
+    if header is None:
+        return None
+    (format_code, channels, rate, _, _, bits), offset, size = header
+    if channels != 1 or rate != SAMPLE_RATE:
+        return None
+    if format_code == _WAVE_FORMAT_PCM and bits == 16:
+        dtype = "<i2"
+    elif format_code == _WAVE_FORMAT_IEEE_FLOAT and bits == 32:
+        dtype = "<f4"
+    else:
+        return None
+    return dtype, offset, size // (bits // 8)
+
+
+def probe_duration(path: str) -> Optional[float]:
+    """
+    Audio duration in seconds from the file header, without decoding
+
+    Returns:
+        Duration, or None if the container does not record it
+    """
+    try:
+        header = _read_wav_header(path)
+        if header is not None:
+            byte_rate = header[0][3]
+            return header[2] / byte_rate if byte_rate else None
+
+        import av
+
+        with av.open(path, mode="r", metadata_errors="ignore") as container:
+            if container.duration is not None:
+                return container.duration / av.time_base
+            stream = container.streams.audio[0] if container.streams.audio else None
+            if stream is not None and stream.duration is not None and stream.time_base is not None:
+                return float(stream.duration * stream.time_base)
+    except Exception as e:
+        logger.debug(f"Could not read the duration of {path}: {e}")
+    return None
+
+
+class _PcmWriter:
+    """Collect float32 chunks in memory, spilling to a temp file once large."""
+
+    def __init__(self, spill_dir: Optional[str]):
+        self._spill_dir = spill_dir
+        self._chunks = []
+        self._bytes = 0
+        self._file = None
+
+    def write(self, samples):
+        self._bytes += samples.nbytes
+        if self._file is None and self._bytes > MMAP_THRESHOLD_BYTES > 0:
+            self._file = tempfile.NamedTemporaryFile(
+                prefix="pcm-", suffix=".f32", dir=self._spill_dir, delete=False
+            )
+            for chunk in self._chunks:
+                self._file.write(chunk.tobytes())
+            self._chunks = []
+        if self._file is not None:
+            self._file.write(samples.tobytes())
+        else:
+            self._chunks.append(samples)
+
+    def result(self):
+        import numpy as np
+
+        if self._file is None:
+            if not self._chunks:
+                return np.zeros(0, dtype=np.float32)
+            return np.concatenate(self._chunks)
+
+        self._file.close()
+        try:
+            # Copy-on-write so consumers may treat it as a normal writable array
+            return np.memmap(self._file.name, dtype=np.float32, mode="c")
+        finally:
+            # The mapping keeps the data alive; nothing is left behind on disk
+            os.unlink(self._file.name)
+
+
+def _decode_wav(path: str, dtype: str, offset: int, count: int, spill_dir: Optional[str]):
+    import numpy as np
+
+    if count == 0:
+        return np.zeros(0, dtype=np.float32)
+    if dtype == "<f4":
+        return np.memmap(path, dtype=np.float32, mode="c", offset=offset, shape=(count,))
+
+    pcm = np.memmap(path, dtype=np.int16, mode="r", offset=offset, shape=(count,))
+    writer = _PcmWriter(spill_dir)
+    step = SAMPLE_RATE * 60
+    for start in range(0, count, step):
+        writer.write(pcm[start:start + step].astype(np.float32) / 32768.0)
+    return writer.result()
+
+
+def _decode_av(path: str, spill_dir: Optional[str]):
+    """Stream-decode any container with PyAV (as faster-whisper does) into one buffer."""
+    import av
+    import numpy as np
+
+    resampler = av.audio.resampler.AudioResampler(format="s16", layout="mono", rate=SAMPLE_RATE)
+    writer = _PcmWriter(spill_dir)
+
+    def _write(frames):
+        for frame in frames:
+            writer.write(frame.to_ndarray().reshape(-1).astype(np.float32) / 32768.0)
+
+    with av.open(path, mode="r", metadata_errors="ignore") as container:
+        for frame in container.decode(audio=0):
+            _write(resampler.resample(frame))
+        _write(resampler.resample(None))
+    return writer.result()
+
+
+def load_audio(path: str, spill_dir: Optional[str] = None):
+    """
+    Decode an audio file to 16 kHz mono float32 exactly once
+
+    Args:
+        path: Audio or video file
+        spill_dir: Directory for memory-mapped spill files (default: system temp)
+
+    Returns:
+        1-D float32 NumPy array (possibly a copy-on-write np.memmap)
+    """
+    wav = _find_wav_data(path)
+    if wav is not None:
+        logger.info(f"Mapping 16 kHz mono WAV {path} without decoding")
+        return _decode_wav(path, *wav, spill_dir)
+    return _decode_av(path, spill_dir)
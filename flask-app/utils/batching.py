@@ -0,0 +1,280 @@
+"""
+Cross-request batched inference for the local Whisper backend
+
+Requests that share a model and decoding parameters are queued for up to
+WHISPER_BATCH_MAX_WAIT_MS, concatenated, and run through faster-whisper's
+BatchedInferencePipeline in one pass. Each request's speech chunks (from VAD)
+become clip timestamps, so chunks from one long file and from several short
+files fill the same batches. Segments are routed back to their request with
+timestamps shifted to that request's audio.
+"""
+import bisect
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from utils.audio import SAMPLE_RATE
+from utils.segments import SegmentTable
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SECONDS = 30.0
+
+_scheduler: Optional["BatchScheduler"] = None
+_scheduler_lock = threading.Lock()
+
+
+def speech_clips(audio, vad_filter: bool = True) -> List[Tuple[float, float]]:
+    """
+    Split decoded audio into clips of at most CHUNK_SECONDS
+
+    With VAD the clips cover detected speech (merged greedily up to the chunk
+    length); without VAD the audio is cut into fixed windows.
+
+    Returns:
+        List of (start, end) pairs in seconds
+    """
+    duration = len(audio) / SAMPLE_RATE
+    if not vad_filter:
+        clips = []
+        start = 0.0
+        while start < duration:
+            clips.append((start, min(start + CHUNK_SECONDS, duration)))
+            start += CHUNK_SECONDS
+        return clips
+
+    from faster_whisper.vad import VadOptions, get_speech_timestamps
+
+    speech = get_speech_timestamps(
+        audio, VadOptions(max_speech_duration_s=CHUNK_SECONDS, min_silence_duration_ms=160)
+    )
+
+    clips: List[Tuple[float, float]] = []
+    for chunk in speech:
+        start, end = chunk["start"] / SAMPLE_RATE, chunk["end"] / SAMPLE_RATE
+        if clips and end - clips[-1][0] <= CHUNK_SECONDS:
+            clips[-1] = (clips[-1][0], end)
+        else:
+            clips.append((start, end))
+    return clips
+
+
+class _BatchRequest:
+    __slots__ = ("model", "key", "audio", "clips", "on_segment", "future", "enqueued_at", "info")
+
+    def __init__(self, model, key, audio, clips, on_segment):
+        self.model = model
+        self.key = key
+        self.audio = audio
+        self.clips = clips
+        self.on_segment = on_segment
+        self.future: Future = Future()
+        self.enqueued_at = time.monotonic()
+        self.info: Dict[str, Any] = {}
+
+
+class BatchScheduler:
+    """
+    Groups compatible transcription requests into batched forward passes
+
+    Args:
+        batch_size: Speech chunks decoded per forward pass
+        max_wait: Seconds the oldest request waits for others to join its batch
+        max_requests: Most requests merged into one pipeline run
+    """
+
+    def __init__(self, batch_size: int = 8, max_wait: float = 0.05, max_requests: int = 8):
+        self.batch_size = max(1, int(batch_size))
+        self.max_wait = max(0.0, float(max_wait))
+        self.max_requests = max(1, int(max_requests))
+
+        self.batches = 0
+        self.requests = 0
+        self.chunks = 0
+
+        self._pending: List[_BatchRequest] = []
+        self._condition = threading.Condition()
+        self._dispatcher = threading.Thread(
+            target=self._dispatch_forever, name="whisper-batcher", daemon=True
+        )
+        self._dispatcher.start()
+
+    def transcribe(
+        self,
+        model,
+        model_key: Tuple[str, str, str],
+        audio,
+        temperature: float = 0.0,
+        beam_size: int = 5,
+        vad_filter: bool = True,
+        task: str = "transcribe",
+        language: Optional[str] = None,
+        word_timestamps: bool = False,
+        on_segment: Optional[Callable[[Dict[str, Any], Optional[float]], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Transcribe one file through the shared batch queue
+
+        Same arguments and return shape as local_backend.transcribe_with_model.
+        Requests without an explicit language never share a batch, because
+        language detection runs once per pipeline call.
+        """
+        if isinstance(audio, str):
+            from faster_whisper import decode_audio
+
+            audio = decode_audio(audio, sampling_rate=SAMPLE_RATE)
+
+        key = (
+            model_key,
+            language or f"auto-{id(audio)}",
+            task,
+            beam_size,
+            temperature,
+            word_timestamps,
+        )
+        request = _BatchRequest(model, key, audio, speech_clips(audio, vad_filter), on_segment)
+
+        with self._condition:
+            self._pending.append(request)
+            self._condition.notify_all()
+
+        segments = request.future.result()
+        return {
+            "segments": segments,
+            "info": {**request.info, "duration": len(audio) / SAMPLE_RATE}
+        }
+
+    def _take_batch(self) -> List[_BatchRequest]:
+        """Wait for work and pop the next group of compatible requests."""
+        with self._condition:
+            while True:
+                while not self._pending:
+                    self._condition.wait()
+
+                head = self._pending[0]
+                group = [r for r in self._pending if r.key == head.key][:self.max_requests]
+                chunk_count = sum(len(r.clips) for r in group)
+                remaining = head.enqueued_at + self.max_wait - time.monotonic()
+
+                batch_full = chunk_count >= self.batch_size or len(group) >= self.max_requests
+                if remaining <= 0 or batch_full:
+                    for request in group:
+                        self._pending.remove(request)
+                    return group
+                self._condition.wait(timeout=remaining)
+
+    def _dispatch_forever(self):
+        while True:
+            group = self._take_batch()
+            try:
+                self._run_batch(group)
+            except BaseException as e:
+                logger.exception("Batched transcription failed")
+                for request in group:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+
+    def _run_batch(self, group: List[_BatchRequest]):
+        import numpy as np
+        from faster_whisper import BatchedInferencePipeline
+
+        from utils.local_backend import word_dicts
+
+        _, language, task, beam_size, temperature, word_timestamps = group[0].key
+
+        # Lay the requests end to end and offset their clips accordingly
+        # (clip_timestamps in seconds need faster-whisper>=1.2.0)
+        offsets = []
+        clip_timestamps = []
+        position = 0.0
+        for request in group:
+            offsets.append(position)
+            clip_timestamps.extend(
+                {"start": position + start, "end": position + end} for start, end in request.clips
+            )
+            position += len(request.audio) / SAMPLE_RATE
+
+        results = [SegmentTable() for _ in group]
+        # Nothing but silence in every request leaves the language undetected
+        info = {"language": None, "language_probability": 0.0}
+        if clip_timestamps:
+            pipeline = BatchedInferencePipeline(model=group[0].model)
+            segments_iter, batch_info = pipeline.transcribe(
+                np.concatenate([request.audio for request in group]),
+                language=None if language.startswith("auto-") else language,
+                task=task,
+                beam_size=beam_size,
+                temperature=temperature,
+                vad_filter=False,
+                clip_timestamps=clip_timestamps,
+                batch_size=self.batch_size,
+                without_timestamps=False,
+                word_timestamps=word_timestamps,
+                compression_ratio_threshold=2.4,
+                no_speech_threshold=0.6,
+            )
+            info = {
+                "language": batch_info.language,
+                "language_probability": batch_info.language_probability,
+            }
+
+            for seg in segments_iter:
+                index = bisect.bisect_right(offsets, seg.start) - 1
+                request = group[index]
+                offset = offsets[index]
+                table = results[index]
+                table.append(
+                    seg.start - offset,
+                    seg.end - offset,
+                    seg.text,
+                    words=word_dicts(seg.words, offset) if word_timestamps else None,
+                )
+                if request.on_segment is not None:
+                    duration = len(request.audio) / SAMPLE_RATE
+                    segment = table[-1]
+                    request.on_segment(segment, min(segment["end"] / duration, 1.0) if duration else None)
+
+        self.batches += 1
+        self.requests += len(group)
+        self.chunks += len(clip_timestamps)
+        logger.info(
+            f"Batched {len(group)} request(s), {len(clip_timestamps)} chunk(s) "
+            f"with batch_size={self.batch_size}"
+        )
+
+        for request, segments in zip(group, results):
+            request.info = info
+            request.future.set_result(segments)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._condition:
+            pending = len(self._pending)
+        return {
+            "batch_size": self.batch_size,
+            "max_wait_ms": round(self.max_wait * 1000),
+            "pending": pending,
+            "batches": self.batches,
+            "requests": self.requests,
+            "chunks": self.chunks,
+        }
+
+
+def get_batch_scheduler() -> BatchScheduler:
+    """Process-wide scheduler configured from WHISPER_BATCH_* settings."""
+    global _scheduler
+
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = BatchScheduler(
+                batch_size=int(os.getenv("WHISPER_BATCH_SIZE", "8")),
+                max_wait=float(os.getenv("WHISPER_BATCH_MAX_WAIT_MS", "50")) / 1000,
+                max_requests=int(os.getenv("WHISPER_BATCH_MAX_REQUESTS", "8")),
+            )
+        return _scheduler
+
+
+def batching_enabled() -> bool:
+    return os.getenv("WHISPER_BATCHING", "false").lower() in {"1", "true", "yes"}
@@ -0,0 +1,308 @@
+"""
+Long-audio mode: transcribe VAD-aligned chunks in a CPU process pool
+
+Long recordings are cut at silences into roughly WHISPER_LONG_AUDIO_CHUNK_MINUTES
+pieces. Each pool process holds its own WhisperModel with a fixed thread
+budget, and the chunk transcripts are stitched back together with their
+timestamps shifted and duplicate segments at the cuts dropped.
+
+There is one pool per (model, compute type, workers, threads). When a request
+needs another configuration, the previous pool is retired once the requests
+using it have finished, so running transcriptions are never cancelled.
+"""
+import logging
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from utils.audio import SAMPLE_RATE
+from utils.model_cache import estimate_model_bytes
+from utils.segments import SegmentTable
+
+logger = logging.getLogger(__name__)
+
+
+# Segments starting this far before the previous chunk's last end are overlaps
+EDGE_TOLERANCE_SECONDS = 0.2
+
+PoolKey = Tuple[str, str, int, int]
+
+# key -> {"pool": ProcessPoolExecutor, "users": requests currently using it}
+_pools: Dict[PoolKey, Dict[str, Any]] = {}
+# Configuration of the latest request; idle pools of other configurations are retired
+_current_key: Optional[PoolKey] = None
+_pool_lock = threading.Lock()
+
+# Optional callbacks so the worker's model cache can count the pool processes'
+# model copies against its budget: on_pool_start(name, bytes), on_pool_stop(name)
+on_pool_start: Optional[Callable[[str, int], None]] = None
+on_pool_stop: Optional[Callable[[str], None]] = None
+
+# Set in each pool process by _init_worker
+_worker_model = None
+
+
+def long_audio_settings() -> Dict[str, Any]:
+    """WHISPER_LONG_AUDIO* settings (read at call time so tests/env changes apply)."""
+    threads = max(1, int(os.getenv("WHISPER_LONG_AUDIO_THREADS", "2")))
+    workers = int(os.getenv("WHISPER_LONG_AUDIO_WORKERS", "0")) or max(1, (os.cpu_count() or 1) // threads)
+    chunk_seconds = float(os.getenv("WHISPER_LONG_AUDIO_CHUNK_MINUTES", "10")) * 60
+    return {
+        "enabled": os.getenv("WHISPER_LONG_AUDIO", "false").lower() in {"1", "true", "yes"},
+        "threads": threads,
+        "workers": workers,
+        "chunk_seconds": chunk_seconds,
+        # Shorter files gain nothing from splitting
+        "min_seconds": float(os.getenv("WHISPER_LONG_AUDIO_MIN_MINUTES", "0")) * 60 or 2 * chunk_seconds,
+    }
+
+
+# =============================================================================
+# Pool processes
+# =============================================================================
+
+def _init_worker(model_name: str, compute_type: str, cpu_threads: int):
+    global _worker_model
+
+    os.environ["OMP_NUM_THREADS"] = str(cpu_threads)
+    from faster_whisper import WhisperModel
+
+    _worker_model = WhisperModel(
+        model_name, device="cpu", compute_type=compute_type, cpu_threads=cpu_threads, num_workers=1
+    )
+
+
+def _transcribe_chunk(audio, offset: float, params: Dict[str, Any]) -> Dict[str, Any]:
+    from utils.local_backend import transcribe_with_model
+
+    result = transcribe_with_model(_worker_model, audio, **params)
+    result["segments"].shift(offset)
+    return result
+
+
+def _detect_language(audio) -> Tuple[Optional[str], float]:
+    # Detection runs eagerly on the first 30s of speech; the segment generator is never consumed
+    _, info = _worker_model.transcribe(audio, beam_size=1, vad_filter=True, without_timestamps=True)
+    return info.language, info.language_probability
+
+
+# =============================================================================
+# Web worker side
+# =============================================================================
+
+def _pool_name(key: PoolKey) -> str:
+    model_name, compute_type, workers, threads = key
+    return f"long-audio pool {model_name} ({compute_type}, {workers}x{threads})"
+
+
+def _start_pool(key: PoolKey) -> ProcessPoolExecutor:
+    import multiprocessing
+
+    model_name, compute_type, workers, threads = key
+    logger.info(
+        f"Starting long-audio pool: {workers} process(es) x {threads} thread(s) "
+        f"with '{model_name}' ({compute_type})"
+    )
+    if on_pool_start is not None:
+        on_pool_start(_pool_name(key), workers * estimate_model_bytes(model_name, "cpu", compute_type))
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        # fork would copy CUDA/CTranslate2 state from the web worker
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(model_name, compute_type, threads),
+    )
+
+
+def _retire_idle_locked() -> List[PoolKey]:
+    retired = [key for key, entry in _pools.items() if key != _current_key and entry["users"] == 0]
+    for key in retired:
+        _pools.pop(key)["pool"].shutdown(wait=False)
+        if on_pool_stop is not None:
+            on_pool_stop(_pool_name(key))
+        logger.info(f"Stopped {_pool_name(key)}")
+    return retired
+
+
+@contextmanager
+def _lease_pool(model_name: str, compute_type: str, workers: int, threads: int) -> Iterator[ProcessPoolExecutor]:
+    """Use the pool for this configuration, starting it if needed."""
+    global _current_key
+
+    key = (model_name, compute_type, workers, threads)
+    with _pool_lock:
+        _current_key = key
+        _retire_idle_locked()
+        entry = _pools.get(key)
+        if entry is None:
+            entry = _pools[key] = {"pool": _start_pool(key), "users": 0}
+        entry["users"] += 1
+    try:
+        yield entry["pool"]
+    finally:
+        with _pool_lock:
+            entry["users"] -= 1
+            _retire_idle_locked()
+
+
+def shutdown_pool() -> bool:
+    """
+    Stop the pool processes (and free their models)
+
+    Pools still used by a transcription are stopped when it finishes.
+
+    Returns:
+        True if a pool was running
+    """
+    global _current_key
+
+    with _pool_lock:
+        running = bool(_pools)
+        _current_key = None
+        _retire_idle_locked()
+    return running
+
+
+def plan_chunks(audio, chunk_seconds: float, vad_filter: bool = True) -> List[Tuple[int, int]]:
+    """
+    Choose chunk boundaries (in samples), cutting in the middle of silences
+
+    Each cut is the silence midpoint closest to the target length, searched
+    within +/-50% of it; without a silence there, the audio is cut at the target.
+    """
+    total = len(audio)
+    chunk = int(chunk_seconds * SAMPLE_RATE)
+    if chunk <= 0 or total <= chunk:
+        return [(0, total)]
+
+    silences: List[int] = []
+    if vad_filter:
+        from faster_whisper.vad import VadOptions, get_speech_timestamps
+
+        speech = get_speech_timestamps(audio, VadOptions(min_silence_duration_ms=300))
+        silences = [
+            (previous["end"] + current["start"]) // 2
+            for previous, current in zip(speech, speech[1:])
+        ]
+
+    bounds = []
+    position = 0
+    # Keep the last chunk at least a quarter of the target length
+    while total - position > chunk * 1.25:
+        target = position + chunk
+        candidates = [cut for cut in silences if position + chunk // 2 < cut < position + chunk * 3 // 2]
+        cut = min(candidates, key=lambda c: abs(c - target)) if candidates else target
+        bounds.append((position, cut))
+        position = cut
+    bounds.append((position, total))
+    return bounds
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\W+", " ", text).strip().lower()
+
+
+def _append_chunk(merged: SegmentTable, chunk: SegmentTable) -> None:
+    at_edge = len(merged) > 0
+    for i in range(len(chunk)):
+        start = None
+        if at_edge:
+            last_end = merged.ends[-1]
+            if chunk.starts[i] >= last_end - EDGE_TOLERANCE_SECONDS:
+                at_edge = False
+            elif chunk.ends[i] <= last_end or _normalize(chunk.texts[i]) == _normalize(merged.texts[len(merged) - 1]):
+                continue
+            else:
+                start = last_end
+                at_edge = False
+        merged.append_row(chunk, i, start=start)
+
+
+def stitch_chunks(chunk_segments: List[SegmentTable]) -> SegmentTable:
+    """
+    Join per-chunk segments (already in absolute time) into one table
+
+    Segments at the start of a chunk that overlap the previous chunk's tail are
+    dropped when they repeat it or end inside it, otherwise trimmed to start
+    where the previous chunk ended.
+    """
+    merged = SegmentTable()
+    for segments in chunk_segments:
+        _append_chunk(merged, segments)
+    return merged
+
+
+def transcribe_long_audio(
+    audio,
+    model_name: str,
+    compute_type: str,
+    temperature: float = 0.0,
+    beam_size: int = 5,
+    vad_filter: bool = True,
+    task: str = "transcribe",
+    language: Optional[str] = None,
+    word_timestamps: bool = False,
+    on_segment: Optional[Callable[[Dict[str, Any], Optional[float]], None]] = None
+) -> Dict[str, Any]:
+    """
+    Transcribe decoded audio in parallel chunks on the CPU process pool
+
+    Same return shape as local_backend.transcribe_with_model. Without an
+    explicit language, it is detected once on the first chunk and then used
+    for every chunk so they cannot disagree.
+    """
+    settings = long_audio_settings()
+    duration = len(audio) / SAMPLE_RATE
+    bounds = plan_chunks(audio, settings["chunk_seconds"], vad_filter)
+    logger.info(
+        f"Long-audio mode: {duration / 60:.1f} min in {len(bounds)} chunk(s) "
+        f"on {settings['workers']} process(es)"
+    )
+
+    with _lease_pool(model_name, compute_type, settings["workers"], settings["threads"]) as pool:
+        language_probability = 1.0
+        if language is None:
+            language, language_probability = pool.submit(_detect_language, audio[bounds[0][0]:bounds[0][1]]).result()
+
+        params = {
+            "temperature": temperature,
+            "beam_size": beam_size,
+            "vad_filter": vad_filter,
+            "task": task,
+            "language": language,
+        }
+        if word_timestamps:
+            params["word_timestamps"] = True
+
+        futures = [
+            pool.submit(_transcribe_chunk, audio[start:end], start / SAMPLE_RATE, params)
+            for start, end in bounds
+        ]
+
+        # Stitch in order so segments can be emitted as soon as their chunk is done
+        segments = SegmentTable()
+        try:
+            for future in futures:
+                emitted = len(segments)
+                _append_chunk(segments, future.result()["segments"])
+                if on_segment is not None:
+                    for index in range(emitted, len(segments)):
+                        segment = segments[index]
+                        on_segment(segment, min(segment["end"] / duration, 1.0) if duration else None)
+        except BaseException:
+            # Don't leave this request's remaining chunks queued on a shared pool
+            for future in futures:
+                future.cancel()
+            raise
+
+    return {
+        "segments": segments,
+        "info": {
+            "language": language,
+            "language_probability": language_probability,
+            "duration": duration,
+        }
+    }
@@ -1,17 +1,47 @@
 """
 On-demand diarization module with VRAM management
+
+The pyannote pipeline stays loaded between requests and is unloaded after
+DIARIZATION_IDLE_TTL seconds without use, or earlier when free host memory or
+VRAM drops below the configured floors.
 """
 import logging
 import os
+import sys
+import threading
+import time
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Callable, Optional, List, Dict, Any
 import gc
 
+from utils.model_cache import parse_size
+
 logger = logging.getLogger(__name__)
 
+# Residency policy (0 = unload after every request)
+IDLE_TTL = float(os.getenv("DIARIZATION_IDLE_TTL", "600"))
+# Unload an idle pipeline when less than this is free (0 = no check)
+MIN_FREE_RAM_BYTES = parse_size(os.getenv("DIARIZATION_MIN_FREE_RAM", "0"))
+MIN_FREE_VRAM_BYTES = parse_size(os.getenv("DIARIZATION_MIN_FREE_VRAM", "0"))
+
 # Global model cache - only loaded when needed
 _diarization_model = None
 _model_device = None
+_requested_device = None
+
+_lock = threading.Lock()
+_load_lock = threading.Lock()
+_in_use = 0
+_last_used = 0.0
+_sweeper: Optional[threading.Thread] = None
+_loads = 0
+_reuses = 0
+_load_seconds_total = 0.0
+_last_load_seconds: Optional[float] = None
+_unloads: Dict[str, int] = {}
+
+# Called as on_load(model_name, device, load_seconds) after each pipeline load
+on_load: Optional[Callable[[str, str, float], None]] = None
 
 
 def load_diarization_model(hf_token: str, device: str = "cuda"):
@@ -25,84 +55,114 @@ def load_diarization_model(hf_token: str, device: str = "cuda"):
     Returns:
         Loaded diarization pipeline
     """
-    global _diarization_model, _model_device
-    
-    if _diarization_model is not None and _model_device == device:
-        logger.info("Diarization model already loaded")
-        return _diarization_model
+    global _diarization_model, _model_device, _requested_device
+    global _reuses, _loads, _load_seconds_total, _last_load_seconds, _last_used
     
-    try:
-        import torch
-        from pyannote.audio import Pipeline
+    with _load_lock:
+        with _lock:
+            # Matched on the requested device, so a CPU fallback is reused too
+            if _diarization_model is not None and _requested_device == device:
+                _reuses += 1
+                _last_used = time.time()
+                return _diarization_model
         
-        logger.info(f"Loading pyannote diarization model on {device}...")
-        model_name = os.getenv("DIARIZATION_MODEL", "pyannote/speaker-diarization-3.1")
+        if _diarization_model is not None:
+            unload_diarization_model(reason="device_change")
         
-        # Try new API first (token=), fall back to old API (use_auth_token=)
         try:
-            pipeline = Pipeline.from_pretrained(
-                model_name,
-                token=hf_token
-            )
-        except TypeError:
-            # Fallback for older pyannote versions
-            pipeline = Pipeline.from_pretrained(
-                model_name,
-                use_auth_token=hf_token
-            )
-        
-        # Try to move to GPU, but fall back to CPU if there are issues
-        if device == "cuda" and torch.cuda.is_available():
+            import torch
+            from pyannote.audio import Pipeline
+            
+            # Cap torch's intra-op threads so diarization running alongside Whisper
+            # (CTranslate2 has its own pool) doesn't oversubscribe the CPU
+            torch_threads = int(os.getenv("DIARIZATION_TORCH_THREADS", "0"))
+            if torch_threads > 0:
+                torch.set_num_threads(torch_threads)
+            
+            logger.info(f"Loading pyannote diarization model on {device}...")
+            model_name = os.getenv("DIARIZATION_MODEL", "pyannote/speaker-diarization-3.1")
+            started = time.perf_counter()
+            
+            # Try new API first (token=), fall back to old API (use_auth_token=)
             try:
-                pipeline.to(torch.device("cuda"))
-                _model_device = "cuda"
-                logger.info("Diarization model loaded on CUDA")
-            except RuntimeError as e:
-                if "cuDNN" in str(e) or "CUDNN" in str(e):
-                    logger.warning(f"cuDNN error when moving to GPU: {e}")
-                    logger.warning("Falling back to CPU for diarization")
-                    _model_device = "cpu"
-                    # Pipeline is already on CPU by default
-                else:
-                    raise
-        else:
-            _model_device = "cpu"
-            logger.info("Diarization model loaded on CPU")
-        
-        _diarization_model = pipeline
-        logger.info("Diarization model loaded successfully")
-        return _diarization_model
-        
-    except Exception as e:
-        logger.error(f"Failed to load diarization model: {e}")
-        raise
+                pipeline = Pipeline.from_pretrained(
+                    model_name,
+                    token=hf_token
+                )
+            except TypeError:
+                # Fallback for older pyannote versions
+                pipeline = Pipeline.from_pretrained(
+                    model_name,
+                    use_auth_token=hf_token
+                )
+            
+            # Try to move to GPU, but fall back to CPU if there are issues
+            loaded_device = "cpu"
+            if device == "cuda" and torch.cuda.is_available():
+                try:
+                    pipeline.to(torch.device("cuda"))
+                    loaded_device = "cuda"
+                    logger.info("Diarization model loaded on CUDA")
+                except RuntimeError as e:
+                    if "cuDNN" in str(e) or "CUDNN" in str(e):
+                        logger.warning(f"cuDNN error when moving to GPU: {e}")
+                        logger.warning("Falling back to CPU for diarization")
+                        # Pipeline is already on CPU by default
+                    else:
+                        raise
+            else:
+                logger.info("Diarization model loaded on CPU")
+            
+            load_seconds = time.perf_counter() - started
+            with _lock:
+                _diarization_model = pipeline
+                _model_device = loaded_device
+                _requested_device = device
+                _last_used = time.time()
+                _loads += 1
+                _load_seconds_total += load_seconds
+                _last_load_seconds = load_seconds
+            logger.info(f"Diarization model loaded successfully in {load_seconds:.1f}s")
+            
+        except Exception as e:
+            logger.error(f"Failed to load diarization model: {e}")
+            raise
+    
+    if on_load is not None:
+        on_load(model_name, loaded_device, load_seconds)
+    _ensure_sweeper()
+    return pipeline
 
 
-def unload_diarization_model():
+def unload_diarization_model(reason: str = "manual"):
     """
     Unload diarization model and free VRAM
-    """
-    global _diarization_model, _model_device
     
-    if _diarization_model is None:
-        logger.info("No diarization model to unload")
-        return
+    Args:
+        reason: Why the pipeline is unloaded (counted in diarization_stats())
+    """
+    global _diarization_model, _model_device, _requested_device
     
-    try:
-        import torch
+    with _lock:
+        if _diarization_model is None:
+            logger.info("No diarization model to unload")
+            return
         
-        logger.info("Unloading diarization model...")
-        
-        # Delete the model
-        del _diarization_model
+        # A diarization still running keeps its reference; memory is freed when it finishes
         _diarization_model = None
         _model_device = None
+        _requested_device = None
+        _unloads[reason] = _unloads.get(reason, 0) + 1
+    
+    try:
+        logger.info(f"Unloading diarization model ({reason})...")
         
         # Force garbage collection
         gc.collect()
         
         # Clear CUDA cache if available
-        if torch.cuda.is_available():
+        torch = sys.modules.get("torch")
+        if torch is not None and torch.cuda.is_available():
             torch.cuda.empty_cache()
             torch.cuda.synchronize()
         
@@ -112,36 +172,148 @@ def unload_diarization_model():
         logger.error(f"Error unloading diarization model: {e}")
 
 
+def _available_ram_bytes() -> Optional[int]:
+    try:
+        with open("/proc/meminfo", "r", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def _memory_pressure() -> Optional[str]:
+    """Which memory floor is breached, if any."""
+    if MIN_FREE_RAM_BYTES:
+        available = _available_ram_bytes()
+        if available is not None and available < MIN_FREE_RAM_BYTES:
+            return "memory_pressure_ram"
+    if MIN_FREE_VRAM_BYTES and _model_device == "cuda":
+        torch = sys.modules.get("torch")
+        if torch is not None:
+            try:
+                free, _ = torch.cuda.mem_get_info()
+            except RuntimeError:
+                return None
+            if free < MIN_FREE_VRAM_BYTES:
+                return "memory_pressure_vram"
+    return None
+
+
+def apply_residency_policy(force_idle: bool = False) -> Optional[str]:
+    """
+    Unload the pipeline if it has been idle too long or memory is short
+
+    Never unloads while a diarization is running.
+
+    Args:
+        force_idle: Treat the pipeline as past its idle TTL (used when IDLE_TTL is 0)
+
+    Returns:
+        The unload reason, or None if the pipeline stays loaded
+    """
+    with _lock:
+        if _diarization_model is None or _in_use:
+            return None
+        idle_seconds = time.time() - _last_used
+    
+    reason = None
+    if force_idle:
+        reason = "after_request"
+    elif IDLE_TTL and idle_seconds >= IDLE_TTL:
+        reason = "idle"
+    else:
+        reason = _memory_pressure()
+    if reason is None:
+        return None
+    
+    with _load_lock:
+        with _lock:
+            # Picked up again while we were deciding
+            if _in_use or _diarization_model is None:
+                return None
+        unload_diarization_model(reason=reason)
+    return reason
+
+
+def _ensure_sweeper():
+    global _sweeper
+    
+    if not IDLE_TTL and not (MIN_FREE_RAM_BYTES or MIN_FREE_VRAM_BYTES):
+        return
+    with _lock:
+        if _sweeper is not None:
+            return
+        _sweeper = threading.Thread(target=_sweep_forever, name="diarization-sweeper", daemon=True)
+        _sweeper.start()
+
+
+def _sweep_forever():
+    interval = min(max(IDLE_TTL / 2, 1.0), 60.0) if IDLE_TTL else 60.0
+    if MIN_FREE_RAM_BYTES or MIN_FREE_VRAM_BYTES:
+        interval = min(interval, 5.0)
+    while True:
+        time.sleep(interval)
+        try:
+            apply_residency_policy()
+        except Exception as e:
+            logger.error(f"Diarization residency sweep failed: {e}")
+
+
 def diarize_audio(
     audio_path: str,
     hf_token: str,
     min_speakers: Optional[int] = None,
     max_speakers: Optional[int] = None,
     device: str = "cuda",
-    auto_unload: bool = True
+    auto_unload: Optional[bool] = None,
+    waveform=None
 ) -> List[Dict[str, Any]]:
     """
     Perform speaker diarization on audio file
     
     Args:
-        audio_path: Path to audio file
+        audio_path: Path to audio file (only used for logging when waveform is given)
         hf_token: Hugging Face token
         min_speakers: Minimum number of speakers
         max_speakers: Maximum number of speakers
         device: Device to use (cuda/cpu)
-        auto_unload: Whether to unload model after processing
+        auto_unload: Unload the model after processing; None follows the
+            residency policy (unload only when DIARIZATION_IDLE_TTL is 0 or
+            memory is short)
+        waveform: Optional 16 kHz mono float32 array already decoded by
+            utils.audio.load_audio, so pyannote doesn't decode the file again
     
     Returns:
         List of diarization segments with speaker labels
     """
+    global _in_use, _last_used
+    
+    if auto_unload is None:
+        auto_unload = not IDLE_TTL
+    
+    # Counted before loading so the sweeper cannot unload the pipeline under us
+    with _lock:
+        _in_use += 1
     try:
         # Load model
         pipeline = load_diarization_model(hf_token, device)
         
+        audio_input: Any = audio_path
+        if waveform is not None:
+            import torch
+            from utils.audio import SAMPLE_RATE
+
+            audio_input = {
+                "waveform": torch.from_numpy(waveform).unsqueeze(0),
+                "sample_rate": SAMPLE_RATE,
+            }
+
         # Run diarization
         logger.info(f"Running diarization on {audio_path}...")
         diarization = pipeline(
-            audio_path,
+            audio_input,
             min_speakers=min_speakers,
             max_speakers=max_speakers
         )
@@ -156,58 +328,128 @@ def diarize_audio(
             })
         
         logger.info(f"Diarization complete: {len(segments)} segments found")
-        
-        # Auto-unload if requested
-        if auto_unload:
-            unload_diarization_model()
-        
         return segments
         
     except Exception as e:
         logger.error(f"Diarization failed: {e}")
-        # Attempt cleanup even on error
-        if auto_unload:
-            try:
-                unload_diarization_model()
-            except:
-                pass
         raise
+    finally:
+        with _lock:
+            _in_use -= 1
+            _last_used = time.time()
+        try:
+            apply_residency_policy(force_idle=auto_unload)
+        except Exception as e:
+            logger.error(f"Diarization cleanup failed: {e}")
 
 
-def assign_speakers_to_segments(
-    transcription_segments: List[Dict[str, Any]],
+def _best_speaker_indices(
+    starts: "np.ndarray",
+    ends: "np.ndarray",
     diarization_segments: List[Dict[str, Any]]
-) -> List[Dict[str, Any]]:
+) -> "np.ndarray":
+    """
+    For each interval, index of the diarization turn with the largest overlap
+
+    Turns are sorted by start, and a running maximum of their ends bounds the
+    window of turns that can overlap each interval, so only those are compared.
+    Ties go to the turn listed first, and intervals with no positive overlap
+    get -1, exactly as a pairwise comparison would.
+    """
+    import numpy as np
+
+    best = np.full(len(starts), -1, dtype=np.int64)
+    if not diarization_segments or not len(starts):
+        return best
+
+    turn_starts = np.array([turn["start"] for turn in diarization_segments], dtype=np.float64)
+    turn_ends = np.array([turn["end"] for turn in diarization_segments], dtype=np.float64)
+    order = np.argsort(turn_starts, kind="stable")
+    turn_starts = turn_starts[order]
+    turn_ends = turn_ends[order]
+    reach = np.maximum.accumulate(turn_ends)
+
+    # Turns [lo, hi) start before the interval ends and may end after it starts
+    lo = np.searchsorted(reach, starts, side="right")
+    hi = np.searchsorted(turn_starts, ends, side="left")
+
+    for i in np.flatnonzero(hi > lo):
+        window = slice(lo[i], hi[i])
+        overlap = np.minimum(turn_ends[window], ends[i]) - np.maximum(turn_starts[window], starts[i])
+        max_overlap = overlap.max()
+        if max_overlap > 0:
+            best[i] = order[window][overlap == max_overlap].min()
+    return best
+
+
+def assign_speakers_to_segments(
+    transcription_segments,
+    diarization_segments: List[Dict[str, Any]],
+    word_level: bool = False
+):
     """
     Assign speaker labels to transcription segments based on time overlap
     
     Args:
-        transcription_segments: List of transcription segments with start/end times
+        transcription_segments: SegmentTable (labelled in place via its speaker
+            id column) or list of transcription segments with start/end times
         diarization_segments: List of diarization segments with speaker labels
+        word_level: Also label each entry of a segment's "words" list, when
+            word timestamps are available
     
     Returns:
         Transcription segments with speaker labels added
     """
+    import numpy as np
+
+    from utils.segments import SegmentTable
+
     logger.info("Assigning speakers to transcription segments...")
-    
-    for seg in transcription_segments:
-        seg_start = seg.get("start", 0)
-        seg_end = seg.get("end", 0)
-        
-        # Find best matching speaker based on time overlap
-        best_speaker = "SPEAKER_UNKNOWN"
-        max_overlap = 0
-        
-        for diar_seg in diarization_segments:
-            overlap_start = max(seg_start, diar_seg["start"])
-            overlap_end = min(seg_end, diar_seg["end"])
-            overlap = max(0, overlap_end - overlap_start)
-            
-            if overlap > max_overlap:
-                max_overlap = overlap
-                best_speaker = diar_seg["speaker"]
-        
-        seg["speaker"] = best_speaker
+
+    if isinstance(transcription_segments, SegmentTable):
+        # Work on the columns directly; speaker labels become interned ids
+        table = transcription_segments
+        turn_ids = np.array(
+            [table.intern_speaker(turn["speaker"]) for turn in diarization_segments]
+            + [table.intern_speaker("SPEAKER_UNKNOWN")],
+            dtype=np.int64
+        )
+        best = _best_speaker_indices(
+            np.frombuffer(table.starts, dtype=np.float64),
+            np.frombuffer(table.ends, dtype=np.float64),
+            diarization_segments
+        )
+        table.set_speaker_ids(turn_ids[best])
+        if word_level and table.has_words:
+            best = _best_speaker_indices(
+                np.frombuffer(table.word_starts, dtype=np.float64),
+                np.frombuffer(table.word_ends, dtype=np.float64),
+                diarization_segments
+            )
+            table.set_speaker_ids(turn_ids[best], words=True)
+        logger.info("Speaker assignment complete")
+        return table
+
+    speakers = [turn["speaker"] for turn in diarization_segments] + ["SPEAKER_UNKNOWN"]
+
+    starts = np.array([seg.get("start", 0) for seg in transcription_segments], dtype=np.float64)
+    ends = np.array([seg.get("end", 0) for seg in transcription_segments], dtype=np.float64)
+    for seg, index in zip(
+        transcription_segments,
+        _best_speaker_indices(starts, ends, diarization_segments)
+    ):
+        seg["speaker"] = speakers[index]
+
+    if word_level:
+        words = [word for seg in transcription_segments for word in seg.get("words") or ()]
+        if words:
+            word_starts = np.array([word.get("start", 0) for word in words], dtype=np.float64)
+            word_ends = np.array([word.get("end", 0) for word in words], dtype=np.float64)
+            for word, index in zip(
+                words,
+                _best_speaker_indices(word_starts, word_ends, diarization_segments)
+            ):
+                word["speaker"] = speakers[index]
     
     logger.info("Speaker assignment complete")
     return transcription_segments
@@ -218,11 +460,34 @@ def is_model_loaded() -> bool:
     return _diarization_model is not None
 
 
+def diarization_stats() -> Dict[str, Any]:
+    """Residency and load counters for status endpoints."""
+    with _lock:
+        loaded = _diarization_model is not None
+        return {
+            "loaded": loaded,
+            "device": _model_device,
+            "in_use": _in_use,
+            "idle_seconds": round(time.time() - _last_used, 1) if loaded else None,
+            "idle_ttl_seconds": IDLE_TTL or None,
+            "min_free_ram_mb": round(MIN_FREE_RAM_BYTES / 1024**2, 1) if MIN_FREE_RAM_BYTES else None,
+            "min_free_vram_mb": round(MIN_FREE_VRAM_BYTES / 1024**2, 1) if MIN_FREE_VRAM_BYTES else None,
+            "loads": _loads,
+            "reuses": _reuses,
+            "load_seconds_total": round(_load_seconds_total, 2),
+            "last_load_seconds": round(_last_load_seconds, 2) if _last_load_seconds is not None else None,
+            "unloads": dict(_unloads),
+        }
+
+
 def get_vram_usage() -> Dict[str, Any]:
     """Get current VRAM usage information"""
+    # Importing torch costs seconds and hundreds of MB; before diarization has
+    # loaded it, this process has no torch allocations to report
+    torch = sys.modules.get("torch")
+    if torch is None:
+        return {"available": False, "torch_loaded": False}
     try:
-        import torch
-        
         if not torch.cuda.is_available():
             return {"available": False}
         
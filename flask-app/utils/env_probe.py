@@ -0,0 +1,110 @@
+"""
+On-disk cache for startup environment probes (CUDA devices, cuDNN libraries)
+
+Probing imports ctranslate2 and globs every library directory, which dominates
+worker boot on CPU-only hosts. Results are stored with a fingerprint of
+everything they depend on, so a restart only re-probes when the environment
+actually changed.
+"""
+import glob
+import hashlib
+import json
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 1
+
+# Settings that change what the probes find
+_FINGERPRINT_ENV = (
+    "LD_LIBRARY_PATH",
+    "CUDA_VISIBLE_DEVICES",
+    "CUDA_HOME",
+    "CONDA_PREFIX",
+    "CUDNN_EXTRA_LIB_DIRS",
+    "CT2_USE_CUDNN",
+    "WHISPER_GPU_DEVICE",
+)
+
+
+def _mtime(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _read_small(path: str) -> Optional[str]:
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            return f.read(4096)
+    except OSError:
+        return None
+
+
+def environment_fingerprint(directories: Iterable[str]) -> str:
+    """
+    Hash of the inputs the GPU probes depend on
+
+    Covers the relevant environment variables, the interpreter, the NVIDIA
+    driver version and device nodes, and the mtimes of the library and
+    site-packages directories (installing or removing a library or package
+    changes its directory's mtime).
+    """
+    parts: Dict[str, Any] = {
+        "version": CACHE_VERSION,
+        "python": [sys.executable, sys.version],
+        "env": {name: os.environ.get(name) for name in _FINGERPRINT_ENV},
+        "driver": _read_small("/proc/driver/nvidia/version"),
+        "devices": sorted(glob.glob("/dev/nvidia[0-9]*")),
+        "dirs": [[directory, _mtime(directory)] for directory in directories],
+    }
+    canonical = json.dumps(parts, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def cached_probe(
+    cache_path: Optional[Path],
+    fingerprint: str,
+    probe: Callable[[], Dict[str, Any]]
+) -> Tuple[Dict[str, Any], bool]:
+    """
+    Return the probe result for this fingerprint, running the probe on a miss
+
+    Args:
+        cache_path: JSON file shared by workers (None disables caching)
+        fingerprint: environment_fingerprint() of the current environment
+        probe: Computes a JSON-serialisable result
+
+    Returns:
+        (result, whether it came from the cache)
+    """
+    if cache_path is not None:
+        try:
+            cached = json.loads(Path(cache_path).read_text(encoding="utf-8"))
+            if cached.get("fingerprint") == fingerprint:
+                return cached["result"], True
+        except (OSError, ValueError, KeyError, AttributeError):
+            pass
+
+    result = probe()
+
+    if cache_path is not None:
+        cache_path = Path(cache_path)
+        tmp_path = cache_path.with_name(f".{cache_path.name}.{os.getpid()}.tmp")
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_text(
+                json.dumps({"fingerprint": fingerprint, "probed_at": time.time(), "result": result}),
+                encoding="utf-8",
+            )
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            logger.warning(f"Could not write environment probe cache {cache_path}: {e}")
+            tmp_path.unlink(missing_ok=True)
+    return result, False
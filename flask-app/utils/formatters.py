@@ -1,9 +1,20 @@
 """
 Output formatters for transcripts
+
+Each format is a small streaming renderer fed one segment at a time, so all
+formats can be written in a single pass (write_transcript_files) with flat
+memory; the segments_to_* helpers render a single format to a string.
 """
-from typing import List, Dict, Any
+import io
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional, TextIO, Union
 from datetime import timedelta
 
+from utils.segments import SegmentTable, iter_rows
+
+Segments = Union[SegmentTable, List[Dict[str, Any]]]
+
 
 def format_timestamp(seconds: float) -> str:
     """Format seconds as HH:MM:SS"""
@@ -23,8 +34,231 @@ def format_srt_timestamp(seconds: float) -> str:
     return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
 
 
+def format_vtt_timestamp(seconds: float) -> str:
+    """Format seconds as WebVTT timestamp (HH:MM:SS.mmm)"""
+    return format_srt_timestamp(seconds).replace(",", ".")
+
+
+# Output format name -> file extension
+FORMAT_EXTENSIONS = {
+    "text": ".txt",
+    "markdown": ".md",
+    "srt": ".srt",
+    "vtt": ".vtt",
+    "json": ".json",
+}
+
+
+class _Renderer:
+    """Streams one output format; row() is called once per segment, in order."""
+
+    wants_words = False
+
+    def __init__(self, out: TextIO):
+        self.out = out
+        self._first = True
+
+    def _write_line(self, line: str, separator: str = "\n"):
+        if not self._first:
+            self.out.write(separator)
+        self.out.write(line)
+        self._first = False
+
+    def row(self, index: int, start: float, end: float, text: str, speaker: Optional[str], words=None):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class PlainTextRenderer(_Renderer):
+    def __init__(self, out: TextIO, include_timestamps: bool = False, include_speakers: bool = False):
+        super().__init__(out)
+        self.include_timestamps = include_timestamps
+        self.include_speakers = include_speakers
+
+    def row(self, index, start, end, text, speaker, words=None):
+        text = text.strip()
+        if not text:
+            return
+        parts = []
+        if self.include_timestamps:
+            parts.append(f"[{format_timestamp(start)}]")
+        if self.include_speakers and speaker is not None:
+            parts.append(f"{speaker}:")
+        parts.append(text)
+        self._write_line(" ".join(parts))
+
+
+class MarkdownRenderer(_Renderer):
+    def __init__(self, out: TextIO, include_timestamps: bool = True, include_speakers: bool = False):
+        super().__init__(out)
+        self.include_timestamps = include_timestamps
+        self.include_speakers = include_speakers
+        # Without timestamps or speakers the transcript is one flowing paragraph
+        self.flowing = not include_timestamps and not include_speakers
+        self._current_speaker = None
+        out.write("# Transcript\n\n" if self.flowing else "# Transcript\n")
+
+    def row(self, index, start, end, text, speaker, words=None):
+        text = text.strip()
+        if not text:
+            return
+        if self.flowing:
+            self._write_line(text, separator=" ")
+            return
+
+        if self.include_speakers and speaker and speaker != self._current_speaker:
+            self._current_speaker = speaker
+            self.out.write(f"\n## {speaker}\n")
+        if self.include_timestamps:
+            self.out.write(f"\n**[{format_timestamp(start)}]** {text}")
+        else:
+            self.out.write(f"\n{text}")
+
+
+class SrtRenderer(_Renderer):
+    def row(self, index, start, end, text, speaker, words=None):
+        text = text.strip()
+        if not text:
+            return
+        if speaker is not None:
+            text = f"{speaker}: {text}"
+        self._write_line(
+            f"{index + 1}\n{format_srt_timestamp(start)} --> {format_srt_timestamp(end)}\n{text}\n"
+        )
+
+
+class VttRenderer(_Renderer):
+    def __init__(self, out: TextIO):
+        super().__init__(out)
+        out.write("WEBVTT\n")
+
+    def row(self, index, start, end, text, speaker, words=None):
+        text = text.strip()
+        if not text:
+            return
+        if speaker is not None:
+            text = f"<v {speaker}>{text}"
+        self.out.write(f"\n{format_vtt_timestamp(start)} --> {format_vtt_timestamp(end)}\n{text}\n")
+
+
+class JsonRenderer(_Renderer):
+    wants_words = True
+
+    def __init__(self, out: TextIO, metadata: Optional[Dict[str, Any]] = None):
+        super().__init__(out)
+        out.write('{"metadata": ')
+        out.write(json.dumps(metadata or {}, ensure_ascii=False, default=str))
+        out.write(', "segments": [')
+
+    def row(self, index, start, end, text, speaker, words=None):
+        segment: Dict[str, Any] = {"start": start, "end": end, "text": text}
+        if speaker is not None:
+            segment["speaker"] = speaker
+        if words is not None:
+            segment["words"] = words
+        self._write_line(json.dumps(segment, ensure_ascii=False), separator=",\n")
+
+    def close(self):
+        self.out.write("]}\n")
+
+
+def _has_speakers(segments: Segments) -> bool:
+    if isinstance(segments, SegmentTable):
+        return segments.has_speakers
+    return any(speaker is not None for _, _, _, speaker in iter_rows(segments))
+
+
+def _render(segments: Segments, renderers: List[_Renderer]):
+    """Feed every segment to every renderer in one pass."""
+    with_words = any(renderer.wants_words for renderer in renderers)
+    table = segments if isinstance(segments, SegmentTable) else None
+    for index, (start, end, text, speaker) in enumerate(iter_rows(segments)):
+        words = None
+        if with_words:
+            words = table.words(index) if table is not None else segments[index].get("words")
+        for renderer in renderers:
+            renderer.row(index, start, end, text, speaker, words)
+    for renderer in renderers:
+        renderer.close()
+
+
+def _render_to_string(segments: Segments, renderer_factory) -> str:
+    buffer = io.StringIO()
+    _render(segments, [renderer_factory(buffer)])
+    return buffer.getvalue()
+
+
+def make_renderer(
+    fmt: str,
+    out: TextIO,
+    include_speakers: bool,
+    metadata: Optional[Dict[str, Any]] = None
+) -> _Renderer:
+    """
+    Renderer for a named output format with the app's default layout
+
+    Plain text has no timestamps; Markdown gets timestamps and speaker headings
+    only for diarized transcripts; SRT/VTT prefix speakers when present.
+    """
+    if fmt == "text":
+        return PlainTextRenderer(out, include_timestamps=False, include_speakers=include_speakers)
+    if fmt == "markdown":
+        return MarkdownRenderer(out, include_timestamps=include_speakers, include_speakers=include_speakers)
+    if fmt == "srt":
+        return SrtRenderer(out)
+    if fmt == "vtt":
+        return VttRenderer(out)
+    if fmt == "json":
+        return JsonRenderer(out, metadata)
+    raise ValueError(f"Unsupported output format: {fmt}")
+
+
+def write_transcript_files(
+    segments: Segments,
+    paths: Dict[str, Path],
+    metadata: Optional[Dict[str, Any]] = None
+):
+    """
+    Write several output formats in a single pass over the segments
+    
+    Args:
+        segments: SegmentTable or list of segment dicts
+        paths: Output format name (see FORMAT_EXTENSIONS) -> file path
+        metadata: Transcript metadata embedded in the JSON output
+    """
+    include_speakers = _has_speakers(segments)
+    files = {}
+    try:
+        for fmt, path in paths.items():
+            files[fmt] = open(path, "w", encoding="utf-8")
+        _render(
+            segments,
+            [make_renderer(fmt, out, include_speakers, metadata) for fmt, out in files.items()]
+        )
+        # Text and Markdown files end with a newline
+        for fmt in ("text", "markdown"):
+            if fmt in files:
+                files[fmt].write("\n")
+    finally:
+        for out in files.values():
+            out.close()
+
+
+def render_transcript(
+    segments: Segments,
+    fmt: str,
+    metadata: Optional[Dict[str, Any]] = None
+) -> str:
+    """Render one output format to a string, exactly as write_transcript_files writes it."""
+    include_speakers = _has_speakers(segments)
+    content = _render_to_string(segments, lambda out: make_renderer(fmt, out, include_speakers, metadata))
+    return content + "\n" if fmt in ("text", "markdown") else content
+
+
 def segments_to_markdown(
-    segments: List[Dict[str, Any]],
+    segments: Segments,
     include_timestamps: bool = True,
     include_speakers: bool = False
 ) -> str:
@@ -32,68 +266,20 @@ def segments_to_markdown(
     Format segments as Markdown
     
     Args:
-        segments: List of segments with text, start, end, and optionally speaker
+        segments: SegmentTable, or list of segments with text, start, end, and optionally speaker
         include_timestamps: Whether to include timestamps
         include_speakers: Whether to include speaker labels
     
     Returns:
         Markdown formatted string
     """
-    lines = ["# Transcript\n"]
-    
-    current_speaker = None
-    speaker_block = []
-    
-    for seg in segments:
-        text = seg.get("text", "").strip()
-        if not text:
-            continue
-        
-        start = seg.get("start", 0)
-        end = seg.get("end", 0)
-        speaker = seg.get("speaker")
-        
-        # Handle speaker changes
-        if include_speakers and speaker:
-            if speaker != current_speaker:
-                # Flush previous speaker block
-                if speaker_block:
-                    lines.append(" ".join(speaker_block))
-                    lines.append("")
-                    speaker_block = []
-                
-                # Start new speaker block
-                current_speaker = speaker
-                lines.append(f"## {speaker}\n")
-            
-            # Add text with optional timestamp
-            if include_timestamps:
-                lines.append(f"**[{format_timestamp(start)}]** {text}")
-            else:
-                # Flowing text - just concatenate with space
-                lines.append(text)
-        else:
-            # No speakers, just flowing text
-            if include_timestamps:
-                lines.append(f"**[{format_timestamp(start)}]** {text}")
-            else:
-                # Pure flowing text - join all segments into paragraphs
-                lines.append(text)
-    
-    # Flush final speaker block if any
-    if speaker_block:
-        lines.append(" ".join(speaker_block))
-    
-    # Join everything - if no timestamps/speakers, join with spaces for flowing text
-    if not include_timestamps and not include_speakers:
-        # Group into paragraphs by combining all segments
-        return "# Transcript\n\n" + " ".join(seg.get("text", "").strip() for seg in segments if seg.get("text", "").strip())
-    
-    return "\n".join(lines)
+    return _render_to_string(
+        segments, lambda out: MarkdownRenderer(out, include_timestamps, include_speakers)
+    )
 
 
 def segments_to_plain_text(
-    segments: List[Dict[str, Any]],
+    segments: Segments,
     include_timestamps: bool = False,
     include_speakers: bool = False
 ) -> str:
@@ -101,60 +287,39 @@ def segments_to_plain_text(
     Format segments as plain text
     
     Args:
-        segments: List of segments
+        segments: SegmentTable or list of segments
         include_timestamps: Whether to include timestamps
         include_speakers: Whether to include speaker labels
     
     Returns:
         Plain text string
     """
-    lines = []
-    
-    for seg in segments:
-        text = seg.get("text", "").strip()
-        if not text:
-            continue
-        
-        parts = []
-        
-        if include_timestamps:
-            start = seg.get("start", 0)
-            parts.append(f"[{format_timestamp(start)}]")
-        
-        if include_speakers and "speaker" in seg:
-            parts.append(f"{seg['speaker']}:")
-        
-        parts.append(text)
-        lines.append(" ".join(parts))
-    
-    return "\n".join(lines)
+    return _render_to_string(
+        segments, lambda out: PlainTextRenderer(out, include_timestamps, include_speakers)
+    )
 
 
-def segments_to_srt(segments: List[Dict[str, Any]]) -> str:
+def segments_to_srt(segments: Segments) -> str:
     """
     Format segments as SRT subtitles
     
     Args:
-        segments: List of segments with start, end, and text
+        segments: SegmentTable, or list of segments with start, end, and text
     
     Returns:
         SRT formatted string
     """
-    blocks = []
+    return _render_to_string(segments, SrtRenderer)
+
+
+def segments_to_vtt(segments: Segments) -> str:
+    """
+    Format segments as WebVTT subtitles
     
-    for idx, seg in enumerate(segments, start=1):
-        text = seg.get("text", "").strip()
-        if not text:
-            continue
-        
-        start = seg.get("start", 0)
-        end = seg.get("end", 0)
-        
-        # Include speaker if available
-        if "speaker" in seg:
-            text = f"{seg['speaker']}: {text}"
-        
-        block = f"{idx}\n{format_srt_timestamp(start)} --> {format_srt_timestamp(end)}\n{text}\n"
-        blocks.append(block)
+    Args:
+        segments: SegmentTable, or list of segments with start, end, and text
     
-    return "\n".join(blocks)
+    Returns:
+        WebVTT formatted string
+    """
+    return _render_to_string(segments, VttRenderer)
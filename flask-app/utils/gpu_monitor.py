@@ -1,10 +1,247 @@
 """
 GPU monitoring utilities for VRAM usage tracking
+
+nvidia-smi is sampled by a background thread at most once per interval for
+all workers: the latest snapshot is shared through a small JSON file, and
+callers always get a cached snapshot. Process details come from /proc rather
+than ps/readlink subprocesses.
 """
-import subprocess
+import fcntl
+import json
+import logging
+import os
 import re
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from pathlib import Path
 from typing import List, Dict, Any, Optional
 
+logger = logging.getLogger(__name__)
+
+# Path or name of nvidia-smi (point at a stand-in script for testing)
+NVIDIA_SMI = os.getenv("TRANSCRIBER_NVIDIA_SMI", "nvidia-smi")
+SAMPLE_INTERVAL = float(os.getenv("TRANSCRIBER_GPU_SAMPLE_SECONDS", "5"))
+# The sampler pauses when nobody has asked for a snapshot for this long
+IDLE_SECONDS = 60.0
+CACHE_PATH = Path(
+    os.getenv("TRANSCRIBER_GPU_STATUS_CACHE", str(Path(tempfile.gettempdir()) / "transcriber-gpu-status.json"))
+)
+
+_lock = threading.Lock()
+_snapshot: Optional[Dict[str, Any]] = None
+_last_access = 0.0
+_sampler: Optional[threading.Thread] = None
+
+
+# =============================================================================
+# Sampling
+# =============================================================================
+
+def _run_nvidia_smi(args: List[str]) -> Optional[str]:
+    executable = shutil.which(NVIDIA_SMI)
+    if executable is None:
+        return None
+    try:
+        result = subprocess.run([executable, *args], capture_output=True, text=True, timeout=5)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        logger.warning(f"nvidia-smi failed: {e}")
+        return None
+    return result.stdout if result.returncode == 0 else None
+
+
+def _read_cmdline(pid: str) -> str:
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            return f.read().replace(b"\0", b" ").decode("utf-8", "replace").strip()
+    except OSError:
+        # Exited, or in another PID namespace
+        return ""
+
+
+def _read_cwd(pid: str) -> str:
+    try:
+        return os.readlink(f"/proc/{pid}/cwd")
+    except OSError:
+        return ""
+
+
+def _query_processes() -> List[Dict[str, Any]]:
+    output = _run_nvidia_smi(['--query-compute-apps=pid,used_memory', '--format=csv,noheader'])
+    if not output:
+        return []
+
+    processes = []
+    for line in output.strip().split('\n'):
+        parts = line.split(',')
+        if len(parts) < 2:
+            continue
+
+        pid = parts[0].strip()
+        match = re.search(r'\d+', parts[1])
+        if not pid.isdigit() or match is None:
+            continue
+        mem_mb = int(match.group())
+        cmd = _read_cmdline(pid)
+
+        processes.append({
+            'pid': int(pid),
+            'name': _identify_process(cmd, pid),
+            'vram_mb': mem_mb,
+            'vram_gb': round(mem_mb / 1024, 2),
+            'command': cmd[:100]
+        })
+
+    # Sort by VRAM usage (descending)
+    processes.sort(key=lambda x: x['vram_mb'], reverse=True)
+    return processes
+
+
+def _query_memory() -> Dict[str, Any]:
+    output = _run_nvidia_smi(
+        ['--query-gpu=memory.used,memory.free,memory.total,name', '--format=csv,noheader,nounits']
+    )
+    if not output:
+        return {}
+
+    # First GPU only, as before
+    parts = output.strip().split('\n')[0].split(',')
+    if len(parts) < 4:
+        return {}
+    try:
+        used_mb = int(parts[0].strip())
+        free_mb = int(parts[1].strip())
+        total_mb = int(parts[2].strip())
+    except ValueError:
+        return {}
+    gpu_name = parts[3].strip()
+
+    return {
+        'gpu_name': gpu_name,
+        'total_mb': total_mb,
+        'total_gb': round(total_mb / 1024, 2),
+        'used_mb': used_mb,
+        'used_gb': round(used_mb / 1024, 2),
+        'free_mb': free_mb,
+        'free_gb': round(free_mb / 1024, 2),
+        'usage_percent': round((used_mb / total_mb) * 100, 1) if total_mb else 0.0
+    }
+
+
+def sample() -> Dict[str, Any]:
+    """Query nvidia-smi now and build a full status snapshot."""
+    if shutil.which(NVIDIA_SMI) is None:
+        memory_info: Dict[str, Any] = {}
+        processes: List[Dict[str, Any]] = []
+        error = f"{NVIDIA_SMI} not found"
+    else:
+        memory_info = _query_memory()
+        processes = _query_processes() if memory_info else []
+        error = None if memory_info else "nvidia-smi returned no GPU data"
+
+    # Calculate process VRAM total
+    process_vram_mb = sum(p['vram_mb'] for p in processes)
+    snapshot = {
+        'memory': memory_info,
+        'processes': processes,
+        'process_count': len(processes),
+        'process_vram_mb': process_vram_mb,
+        'process_vram_gb': round(process_vram_mb / 1024, 2),
+        'available': bool(memory_info),
+        'sampled_at': time.time(),
+    }
+    if error:
+        snapshot['error'] = error
+    return snapshot
+
+
+# =============================================================================
+# Shared snapshot cache
+# =============================================================================
+
+def _fresh(snapshot: Optional[Dict[str, Any]], max_age: float) -> bool:
+    return snapshot is not None and time.time() - snapshot.get('sampled_at', 0) < max_age
+
+
+def _read_shared() -> Optional[Dict[str, Any]]:
+    try:
+        return json.loads(CACHE_PATH.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _write_shared(snapshot: Dict[str, Any]):
+    tmp_path = CACHE_PATH.with_name(f".{CACHE_PATH.name}.{os.getpid()}.tmp")
+    try:
+        tmp_path.write_text(json.dumps(snapshot), encoding="utf-8")
+        os.replace(tmp_path, CACHE_PATH)
+    except OSError as e:
+        logger.warning(f"Could not write GPU status cache {CACHE_PATH}: {e}")
+        tmp_path.unlink(missing_ok=True)
+
+
+def _refresh(max_age: float) -> Dict[str, Any]:
+    """Newest snapshot no older than max_age, sampling only if no worker has one."""
+    global _snapshot
+
+    shared = _read_shared()
+    if not _fresh(shared, max_age):
+        try:
+            with open(CACHE_PATH.with_name(CACHE_PATH.name + ".lock"), "w") as lock:
+                # One worker samples; the others wait and then read its result
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                shared = _read_shared()
+                if not _fresh(shared, max_age):
+                    shared = sample()
+                    _write_shared(shared)
+        except OSError as e:
+            logger.warning(f"GPU status cache unavailable, sampling directly: {e}")
+            shared = sample()
+    with _lock:
+        _snapshot = shared
+    return shared
+
+
+def _sample_forever():
+    while True:
+        time.sleep(SAMPLE_INTERVAL)
+        if time.time() - _last_access > IDLE_SECONDS:
+            continue
+        try:
+            _refresh(SAMPLE_INTERVAL)
+        except Exception as e:
+            logger.error(f"GPU sampler failed: {e}")
+
+
+def _ensure_sampler():
+    global _sampler
+
+    with _lock:
+        if _sampler is not None:
+            return
+        _sampler = threading.Thread(target=_sample_forever, name="gpu-sampler", daemon=True)
+        _sampler.start()
+
+
+def _cached_status(refresh: bool = False) -> Dict[str, Any]:
+    global _last_access
+
+    _last_access = time.time()
+    _ensure_sampler()
+    with _lock:
+        snapshot = _snapshot
+    # The background sampler keeps this fresh; fall back to the shared file/nvidia-smi
+    # when it is idle or nothing has been sampled yet
+    if refresh or not _fresh(snapshot, SAMPLE_INTERVAL * 2):
+        snapshot = _refresh(0.0 if refresh else SAMPLE_INTERVAL)
+    return snapshot
+
+
+# =============================================================================
+# Public API (cached snapshots)
+# =============================================================================
 
 def get_gpu_processes() -> List[Dict[str, Any]]:
     """
@@ -13,60 +250,7 @@ def get_gpu_processes() -> List[Dict[str, Any]]:
     Returns:
         List of process dictionaries with PID, name, VRAM, and command
     """
-    try:
-        # Get GPU processes
-        result = subprocess.run(
-            ['nvidia-smi', '--query-compute-apps=pid,used_memory', '--format=csv,noheader'],
-            capture_output=True,
-            text=True,
-            timeout=5
-        )
-        
-        if result.returncode != 0:
-            return []
-        
-        processes = []
-        for line in result.stdout.strip().split('\n'):
-            if not line:
-                continue
-                
-            parts = line.split(',')
-            if len(parts) < 2:
-                continue
-                
-            pid = parts[0].strip()
-            mem_str = parts[1].strip()
-            mem_mb = int(re.search(r'\d+', mem_str).group())
-            
-            # Get process command
-            try:
-                cmd_result = subprocess.run(
-                    ['ps', '-p', pid, '-o', 'args='],
-                    capture_output=True,
-                    text=True,
-                    timeout=2
-                )
-                cmd = cmd_result.stdout.strip()
-                
-                # Identify the process
-                name = _identify_process(cmd, pid)
-                
-                processes.append({
-                    'pid': int(pid),
-                    'name': name,
-                    'vram_mb': mem_mb,
-                    'vram_gb': round(mem_mb / 1024, 2),
-                    'command': cmd[:100]
-                })
-            except Exception:
-                continue
-        
-        # Sort by VRAM usage (descending)
-        processes.sort(key=lambda x: x['vram_mb'], reverse=True)
-        return processes
-        
-    except Exception:
-        return []
+    return _cached_status()['processes']
 
 
 def _identify_process(cmd: str, pid: str) -> str:
@@ -87,13 +271,7 @@ def _identify_process(cmd: str, pid: str) -> str:
     elif 'main.py' in cmd and 'listen' in cmd:
         # Check working directory to identify
         try:
-            import subprocess
-            cwd = subprocess.run(
-                ['readlink', '-f', f'/proc/{pid}/cwd'],
-                capture_output=True,
-                text=True,
-                timeout=1
-            ).stdout.strip().lower()
+            cwd = _read_cwd(pid).lower()
             
             if 'comfyui' in cwd:
                 return "🎨 ComfyUI"
@@ -128,58 +306,20 @@ def get_gpu_memory_info() -> Dict[str, Any]:
     Returns:
         Dictionary with total, used, free memory in MB and GB
     """
-    try:
-        result = subprocess.run(
-            ['nvidia-smi', '--query-gpu=memory.used,memory.free,memory.total,name', '--format=csv,noheader,nounits'],
-            capture_output=True,
-            text=True,
-            timeout=5
-        )
-        
-        if result.returncode != 0:
-            return {}
-        
-        parts = result.stdout.strip().split(',')
-        if len(parts) < 4:
-            return {}
-        
-        used_mb = int(parts[0].strip())
-        free_mb = int(parts[1].strip())
-        total_mb = int(parts[2].strip())
-        gpu_name = parts[3].strip()
-        
-        return {
-            'gpu_name': gpu_name,
-            'total_mb': total_mb,
-            'total_gb': round(total_mb / 1024, 2),
-            'used_mb': used_mb,
-            'used_gb': round(used_mb / 1024, 2),
-            'free_mb': free_mb,
-            'free_gb': round(free_mb / 1024, 2),
-            'usage_percent': round((used_mb / total_mb) * 100, 1)
-        }
-    except Exception:
-        return {}
+    return _cached_status()['memory']
 
 
-def get_full_gpu_status() -> Dict[str, Any]:
+def get_full_gpu_status(refresh: bool = False) -> Dict[str, Any]:
     """
     Get complete GPU status including processes and memory
     
+    Args:
+        refresh: Sample now instead of returning the cached snapshot
+            (e.g. right after unloading models)
+    
     Returns:
-        Dictionary with memory info and process list
+        Dictionary with memory info, process list and snapshot age
     """
-    memory_info = get_gpu_memory_info()
-    processes = get_gpu_processes()
-    
-    # Calculate process VRAM total
-    process_vram_mb = sum(p['vram_mb'] for p in processes)
-    
-    return {
-        'memory': memory_info,
-        'processes': processes,
-        'process_count': len(processes),
-        'process_vram_mb': process_vram_mb,
-        'process_vram_gb': round(process_vram_mb / 1024, 2),
-        'available': bool(memory_info)
-    }
+    snapshot = dict(_cached_status(refresh))
+    snapshot['age_seconds'] = round(max(time.time() - snapshot['sampled_at'], 0.0), 2)
+    return snapshot
@@ -0,0 +1,270 @@
+"""
+Background job execution for long-running transcriptions
+"""
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from utils.process import pid_alive
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATES = {"queued", "running"}
+FINISHED_STATES = {"completed", "failed"}
+
+# Jobs owned by this worker process; other workers are read from the state dir
+_jobs: Dict[str, Dict[str, Any]] = {}
+_condition = threading.Condition()
+_executor: Optional[ThreadPoolExecutor] = None
+_state_dir: Optional[Path] = None
+_max_workers = 1
+_retention_seconds = 86400.0
+_remote_poll_interval = 0.5
+_progress_interval = 1.0
+
+# Lets code running inside a job report progress without knowing its ID
+_current = threading.local()
+
+
+def configure(
+    state_dir: Path,
+    max_workers: int = 1,
+    retention_seconds: float = 86400.0
+):
+    """
+    Configure the job store
+
+    Args:
+        state_dir: Directory shared by all workers for job state files
+        max_workers: Background threads per worker process
+        retention_seconds: How long finished job records are kept
+    """
+    global _state_dir, _max_workers, _retention_seconds
+
+    _state_dir = Path(state_dir)
+    _state_dir.mkdir(parents=True, exist_ok=True)
+    _max_workers = max(1, int(max_workers))
+    _retention_seconds = float(retention_seconds)
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+
+    with _condition:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=_max_workers,
+                thread_name_prefix="transcriber-job"
+            )
+        return _executor
+
+
+def _state_path(job_id: str) -> Optional[Path]:
+    if _state_dir is None:
+        return None
+    return _state_dir / f"{job_id}.json"
+
+
+def _persist(record: Dict[str, Any]):
+    """Write a job record atomically so other workers can read it."""
+    path = _state_path(record["id"])
+    if path is None:
+        return
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    try:
+        tmp_path.write_text(json.dumps(record, default=str), encoding="utf-8")
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"Failed to persist job {record['id']}: {e}")
+        tmp_path.unlink(missing_ok=True)
+
+
+def _load(job_id: str) -> Optional[Dict[str, Any]]:
+    path = _state_path(job_id)
+    if path is None or not path.exists():
+        return None
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _purge_expired():
+    """Drop finished job records older than the retention window."""
+    cutoff = time.time() - _retention_seconds
+
+    with _condition:
+        for job_id in [
+            job_id for job_id, record in _jobs.items()
+            if record["state"] in FINISHED_STATES and (record.get("finished_at") or 0) < cutoff
+        ]:
+            del _jobs[job_id]
+
+    if _state_dir is None:
+        return
+    for path in _state_dir.glob("*.json"):
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink(missing_ok=True)
+        except OSError:
+            continue
+
+
+def submit_job(
+    func: Callable[..., Dict[str, Any]],
+    *args,
+    owner: str,
+    description: Optional[Dict[str, Any]] = None,
+    **kwargs
+) -> Dict[str, Any]:
+    """
+    Queue a function for background execution
+
+    Args:
+        func: Callable returning a JSON-serialisable result dict
+        owner: Identifier of the user allowed to read the job
+        description: Extra JSON-serialisable fields stored on the record
+
+    Returns:
+        Snapshot of the new job record
+    """
+    _purge_expired()
+
+    job_id = uuid.uuid4().hex
+    record = {
+        "id": job_id,
+        "owner": owner,
+        "state": "queued",
+        "worker_pid": os.getpid(),
+        "created_at": time.time(),
+        "started_at": None,
+        "finished_at": None,
+        "progress": None,
+        "error": None,
+        "result": None,
+        **(description or {}),
+    }
+
+    with _condition:
+        _jobs[job_id] = record
+        _persist(record)
+        snapshot = dict(record)
+
+    _get_executor().submit(_run_job, job_id, func, args, kwargs)
+    logger.info(f"Queued job {job_id} for {owner}")
+    return snapshot
+
+
+def _run_job(job_id: str, func: Callable, args: tuple, kwargs: Dict[str, Any]):
+    update_job(job_id, state="running", started_at=time.time())
+    _current.job_id = job_id
+    _current.last_progress_at = 0.0
+    try:
+        result = func(*args, **kwargs)
+    except Exception as e:
+        logger.exception(f"Job {job_id} failed")
+        update_job(job_id, state="failed", error=str(e), finished_at=time.time())
+        return
+    finally:
+        _current.job_id = None
+    update_job(job_id, state="completed", result=result, progress=1.0, finished_at=time.time())
+    logger.info(f"Job {job_id} completed")
+
+
+def update_job(job_id: str, **fields):
+    """Update a job owned by this worker and wake any waiters."""
+    with _condition:
+        record = _jobs.get(job_id)
+        if record is None:
+            return
+        record.update(fields)
+        _persist(record)
+        _condition.notify_all()
+
+
+def report_progress(progress: Optional[float]):
+    """
+    Record progress (0-1) for the job running on this thread
+
+    Persisted at most once per second; a no-op outside a job.
+    """
+    job_id = getattr(_current, "job_id", None)
+    if job_id is None or progress is None:
+        return
+    now = time.monotonic()
+    if now - _current.last_progress_at < _progress_interval:
+        return
+    _current.last_progress_at = now
+    update_job(job_id, progress=round(progress, 3))
+
+
+def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Look up a job by ID
+
+    Jobs owned by another worker are read from the shared state directory.
+    Records left active by a worker that has since exited are reported as failed.
+
+    Returns:
+        Snapshot of the job record, or None if unknown
+    """
+    with _condition:
+        record = _jobs.get(job_id)
+        if record is not None:
+            return dict(record)
+
+    record = _load(job_id)
+    if record is None:
+        return None
+    if record["state"] in ACTIVE_STATES and not pid_alive(int(record.get("worker_pid") or 0)):
+        record["state"] = "failed"
+        record["error"] = "Worker exited before the job finished"
+    return record
+
+
+def wait_for_job(job_id: str, timeout: float) -> Optional[Dict[str, Any]]:
+    """
+    Long-poll a job until it finishes or the timeout elapses
+
+    Args:
+        job_id: Job identifier
+        timeout: Maximum seconds to wait
+
+    Returns:
+        Latest snapshot of the job record, or None if unknown
+    """
+    deadline = time.monotonic() + max(0.0, timeout)
+
+    with _condition:
+        if job_id in _jobs:
+            _condition.wait_for(
+                lambda: _jobs[job_id]["state"] in FINISHED_STATES,
+                timeout=max(0.0, deadline - time.monotonic())
+            )
+            return dict(_jobs[job_id])
+
+    record = get_job(job_id)
+    while record is not None and record["state"] in ACTIVE_STATES:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        time.sleep(min(_remote_poll_interval, remaining))
+        record = get_job(job_id)
+    return record
+
+
+def get_job_stats() -> Dict[str, Any]:
+    """Summarise the jobs owned by this worker."""
+    with _condition:
+        states = [record["state"] for record in _jobs.values()]
+    return {
+        "worker_pid": os.getpid(),
+        "max_workers": _max_workers,
+        **{state: states.count(state) for state in sorted(ACTIVE_STATES | FINISHED_STATES)},
+    }
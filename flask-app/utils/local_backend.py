@@ -0,0 +1,96 @@
+"""
+Local faster-whisper inference shared by the web app and the model server
+"""
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+from utils.segments import SegmentTable
+
+logger = logging.getLogger(__name__)
+
+
+def load_whisper_model(model_name: str, device: str, compute_type: str):
+    """Load a faster-whisper model (used as the ModelCache loader)."""
+    # Deferred so workers that never run the local backend do not pay for the import
+    try:
+        from faster_whisper import WhisperModel
+    except ImportError as exc:
+        raise RuntimeError(
+            "faster-whisper is required for the local backend. "
+            "Install dependencies with `pip install -r requirements.txt`."
+        ) from exc
+
+    return WhisperModel(model_name, device=device, compute_type=compute_type)
+
+
+def word_dicts(words, offset: float = 0.0) -> List[Dict[str, Any]]:
+    """Convert faster-whisper Word tuples to JSON-friendly dicts."""
+    return [
+        {
+            "start": word.start - offset,
+            "end": word.end - offset,
+            "word": word.word,
+            "probability": word.probability,
+        }
+        for word in words or ()
+    ]
+
+
+def transcribe_with_model(
+    model,
+    audio,
+    temperature: float = 0.0,
+    beam_size: int = 5,
+    vad_filter: bool = True,
+    task: str = "transcribe",
+    language: Optional[str] = None,
+    word_timestamps: bool = False,
+    on_segment: Optional[Callable[[Dict[str, Any], Optional[float]], None]] = None
+) -> Dict[str, Any]:
+    """
+    Run a loaded WhisperModel over an audio file
+
+    Args:
+        model: Loaded faster-whisper WhisperModel
+        audio: Path to audio file (or decoded audio accepted by faster-whisper)
+        temperature: Sampling temperature
+        beam_size: Beam size for decoding
+        vad_filter: Whether to skip non-speech with Silero VAD
+        task: "transcribe" or "translate"
+        language: Language code, or None for auto-detection
+        word_timestamps: Also return per-word timings under each segment's "words"
+        on_segment: Optional callback invoked with each segment as it is decoded,
+            plus progress (segment end / audio duration, or None if unknown)
+
+    Returns:
+        Dict with segments (a SegmentTable) and info (language, duration)
+    """
+    segments_iter, info = model.transcribe(
+        audio,
+        temperature=temperature,
+        beam_size=beam_size,
+        vad_filter=vad_filter,
+        task=task,
+        language=language,
+        word_timestamps=word_timestamps,
+        compression_ratio_threshold=2.4,
+        no_speech_threshold=0.6,
+    )
+
+    segments = SegmentTable()
+    for seg in segments_iter:
+        segments.append(
+            seg.start, seg.end, seg.text, words=word_dicts(seg.words) if word_timestamps else None
+        )
+        if on_segment is not None:
+            progress = min(seg.end / info.duration, 1.0) if info.duration else None
+            on_segment(segments[-1], progress)
+
+    return {
+        "segments": segments,
+        "info": {
+            "language": info.language,
+            "language_probability": info.language_probability,
+            "duration": info.duration,
+        }
+    }
@@ -0,0 +1,314 @@
+"""
+Multi-worker metrics with a Prometheus text endpoint
+
+Each worker process keeps counters, gauges and histograms in memory, and a
+background thread writes them to <metrics dir>/metrics-<pid>-<token>.json.
+render() merges every worker's file, so /metrics reports totals for the whole
+Gunicorn service no matter which worker answers the scrape. Files of exited
+workers are folded into retired.json at worker start so counters never go
+backwards; their gauges are dropped.
+"""
+import atexit
+import fcntl
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from utils.process import pid_alive
+
+logger = logging.getLogger(__name__)
+
+# Seconds; covers short API calls up to multi-hour recordings
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+# Processing seconds per audio second
+RTF_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1, 1.5, 2, 5, 10)
+
+# name -> (type, help, histogram buckets)
+METRICS: Dict[str, Tuple[str, str, Tuple[float, ...]]] = {
+    "transcriber_stage_seconds": (
+        "histogram", "Time spent per pipeline stage", STAGE_BUCKETS),
+    "transcriber_realtime_factor": (
+        "histogram", "Processing seconds per audio second", RTF_BUCKETS),
+    "transcriber_audio_seconds_total": (
+        "counter", "Audio seconds transcribed", ()),
+    "transcriber_processing_seconds_total": (
+        "counter", "Backend processing seconds", ()),
+    "transcriber_transcriptions_total": (
+        "counter", "Transcriptions finished, by outcome", ()),
+    "transcriber_result_cache_requests_total": (
+        "counter", "Result cache lookups, by result", ()),
+    "transcriber_model_loads_total": (
+        "counter", "Model loads (Whisper and pyannote)", ()),
+    "transcriber_model_load_seconds": (
+        "histogram", "Model load time", STAGE_BUCKETS),
+    "transcriber_admission_rejections_total": (
+        "counter", "Requests refused by admission control, by reason", ()),
+    "transcriber_jobs_in_flight": (
+        "gauge", "Transcriptions currently running", ()),
+}
+
+_FILE_NAME = re.compile(r"^metrics-(\d+)-[0-9a-f]{32}\.json$")
+_RETIRED = "retired.json"
+
+LabelKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+_lock = threading.Lock()
+_values: Dict[LabelKey, float] = {}
+_histograms: Dict[LabelKey, Dict[str, Any]] = {}
+_directory: Optional[Path] = None
+_file: Optional[Path] = None
+_flush_interval = 2.0
+_dirty = False
+_flusher: Optional[threading.Thread] = None
+
+
+def configure(directory: Path, flush_interval: float = 2.0):
+    """
+    Set the shared metrics directory for this worker
+
+    Args:
+        directory: Directory shared by all workers of the service
+        flush_interval: Seconds between writes of this worker's metrics file
+    """
+    global _directory, _file, _flush_interval
+
+    _directory = Path(directory)
+    _directory.mkdir(parents=True, exist_ok=True)
+    _file = _directory / f"metrics-{os.getpid()}-{uuid.uuid4().hex}.json"
+    _flush_interval = max(0.1, float(flush_interval))
+    _retire_dead_workers()
+    atexit.register(flush)
+
+
+def _key(name: str, labels: Dict[str, Any]) -> LabelKey:
+    if name not in METRICS:
+        raise KeyError(f"Unknown metric: {name}")
+    return name, tuple(sorted((label, str(value)) for label, value in labels.items()))
+
+
+def _touch():
+    global _dirty, _flusher
+
+    _dirty = True
+    if _flusher is None and _directory is not None:
+        _flusher = threading.Thread(target=_flush_forever, name="metrics-flush", daemon=True)
+        _flusher.start()
+
+
+def inc(name: str, amount: float = 1.0, **labels):
+    """Add to a counter (or a gauge, with a negative amount to decrease it)."""
+    key = _key(name, labels)
+    with _lock:
+        _values[key] = _values.get(key, 0.0) + amount
+        _touch()
+
+
+def observe(name: str, value: float, **labels):
+    """Record one histogram observation."""
+    key = _key(name, labels)
+    buckets = METRICS[name][2]
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = {"counts": [0] * (len(buckets) + 1), "sum": 0.0, "count": 0}
+        # Per-bucket counts; render() makes them cumulative
+        histogram["counts"][bisect_left(buckets, value)] += 1
+        histogram["sum"] += value
+        histogram["count"] += 1
+        _touch()
+
+
+def histogram_totals(name: str) -> Dict[Tuple[Tuple[str, str], ...], Tuple[int, float]]:
+    """(count, sum) per label set of one histogram, for this process only."""
+    with _lock:
+        return {
+            labels: (histogram["count"], histogram["sum"])
+            for (metric, labels), histogram in _histograms.items()
+            if metric == name
+        }
+
+
+@contextmanager
+def timed(stage: str, **labels) -> Iterator[None]:
+    """Observe the duration of the block in transcriber_stage_seconds (also on errors)."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe("transcriber_stage_seconds", time.perf_counter() - started, stage=stage, **labels)
+
+
+# =============================================================================
+# Shared files
+# =============================================================================
+
+def _snapshot() -> Dict[str, Any]:
+    return {
+        "values": [[name, dict(labels), value] for (name, labels), value in _values.items()],
+        "histograms": [[name, dict(labels), histogram] for (name, labels), histogram in _histograms.items()],
+    }
+
+
+def _write_json(path: Path, data: Dict[str, Any]):
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    try:
+        tmp_path.write_text(json.dumps(data, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"Failed to write metrics file {path}: {e}")
+        tmp_path.unlink(missing_ok=True)
+
+
+def flush():
+    """Write this worker's metrics file now."""
+    global _dirty
+
+    if _file is None:
+        return
+    with _lock:
+        data = _snapshot()
+        _dirty = False
+    _write_json(_file, data)
+
+
+def _flush_forever():
+    while True:
+        time.sleep(_flush_interval)
+        if _dirty:
+            flush()
+
+
+def _read(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _merge(
+    values: Dict[LabelKey, float],
+    histograms: Dict[LabelKey, Dict[str, Any]],
+    data: Dict[str, Any],
+    include_gauges: bool = True
+):
+    for name, labels, value in data.get("values", ()):
+        if name not in METRICS or (METRICS[name][0] == "gauge" and not include_gauges):
+            continue
+        key = _key(name, labels)
+        values[key] = values.get(key, 0.0) + value
+    for name, labels, histogram in data.get("histograms", ()):
+        if name not in METRICS or len(histogram["counts"]) != len(METRICS[name][2]) + 1:
+            continue
+        key = _key(name, labels)
+        merged = histograms.setdefault(
+            key, {"counts": [0] * len(histogram["counts"]), "sum": 0.0, "count": 0}
+        )
+        merged["counts"] = [a + b for a, b in zip(merged["counts"], histogram["counts"])]
+        merged["sum"] += histogram["sum"]
+        merged["count"] += histogram["count"]
+
+
+def _worker_files() -> List[Tuple[int, Path]]:
+    files = []
+    for path in _directory.iterdir():
+        match = _FILE_NAME.match(path.name)
+        if match:
+            files.append((int(match.group(1)), path))
+    return files
+
+
+def _retire_dead_workers():
+    """Fold metrics files of exited workers into retired.json."""
+    with open(_directory / ".lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        dead = [path for pid, path in _worker_files() if not pid_alive(pid)]
+        if not dead:
+            return
+        values: Dict[LabelKey, float] = {}
+        histograms: Dict[LabelKey, Dict[str, Any]] = {}
+        for path in [_directory / _RETIRED] + dead:
+            data = _read(path)
+            if data is not None:
+                _merge(values, histograms, data, include_gauges=False)
+        _write_json(_directory / _RETIRED, {
+            "values": [[name, dict(labels), value] for (name, labels), value in values.items()],
+            "histograms": [[name, dict(labels), h] for (name, labels), h in histograms.items()],
+        })
+        for path in dead:
+            path.unlink(missing_ok=True)
+    logger.info(f"Retired metrics of {len(dead)} exited worker(s)")
+
+
+# =============================================================================
+# Exposition
+# =============================================================================
+
+def _collect() -> Tuple[Dict[LabelKey, float], Dict[LabelKey, Dict[str, Any]]]:
+    values: Dict[LabelKey, float] = {}
+    histograms: Dict[LabelKey, Dict[str, Any]] = {}
+    if _directory is None:
+        with _lock:
+            _merge(values, histograms, _snapshot())
+        return values, histograms
+
+    flush()
+    # Shared lock: a worker retiring dead files must not be seen half-way, with
+    # their counts already in retired.json but the files not yet removed
+    with open(_directory / ".lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_SH)
+        retired = _read(_directory / _RETIRED)
+        if retired is not None:
+            _merge(values, histograms, retired, include_gauges=False)
+        for pid, path in _worker_files():
+            data = _read(path)
+            if data is not None:
+                _merge(values, histograms, data, include_gauges=pid_alive(pid))
+    return values, histograms
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(labels: Tuple[Tuple[str, str], ...], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def render() -> str:
+    """Merged metrics of all workers in the Prometheus text format (0.0.4)."""
+    values, histograms = _collect()
+    lines: List[str] = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        if kind == "histogram":
+            for (metric, labels), histogram in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(buckets + (float("inf"),), histogram["counts"]):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else _number(bound)
+                    lines.append(f"{name}_bucket{_labels(labels, ('le', le))} {cumulative}")
+                lines.append(f"{name}_sum{_labels(labels)} {_number(histogram['sum'])}")
+                lines.append(f"{name}_count{_labels(labels)} {histogram['count']}")
+        else:
+            for (metric, labels), value in sorted(values.items()):
+                if metric == name:
+                    lines.append(f"{name}{_labels(labels)} {_number(value)}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,303 @@
+"""
+Memory-budgeted LRU cache for Whisper models
+"""
+import gc
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CacheKey = Tuple[str, str, str]
+
+# Approximate parameter counts for the stock Whisper checkpoints
+_MODEL_PARAMS = (
+    ("turbo", 809_000_000),
+    ("distil-large", 756_000_000),
+    ("large", 1_550_000_000),
+    ("medium", 769_000_000),
+    ("small", 244_000_000),
+    ("base", 74_000_000),
+    ("tiny", 39_000_000),
+)
+_UNKNOWN_MODEL_BYTES = 2 * 1024**3
+_SIZE_SUFFIXES = {"k": 1024, "m": 1024**2, "g": 1024**3, "t": 1024**4}
+
+
+def parse_size(value: Optional[str]) -> int:
+    """Parse a byte size such as "6G", "512M" or "1073741824" (0 if empty)."""
+    if not value:
+        return 0
+    text = value.strip().lower().rstrip("b")
+    multiplier = 1
+    if text and text[-1] in _SIZE_SUFFIXES:
+        multiplier = _SIZE_SUFFIXES[text[-1]]
+        text = text[:-1]
+    return int(float(text) * multiplier)
+
+
+def _bytes_per_param(compute_type: str) -> float:
+    compute = compute_type.lower()
+    if compute.startswith("int8"):
+        return 1.0
+    if "16" in compute:
+        return 2.0
+    return 4.0
+
+
+def estimate_model_bytes(model_name: str, device: str, compute_type: str) -> int:
+    """
+    Estimate resident memory for a loaded model
+
+    Local model directories are measured from disk; stock checkpoint names use
+    their parameter count scaled by the compute type.
+    """
+    if os.path.isdir(model_name):
+        total = 0
+        for root, _, files in os.walk(model_name):
+            total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+        return total
+
+    name = model_name.lower()
+    for marker, params in _MODEL_PARAMS:
+        if marker in name:
+            return int(params * _bytes_per_param(compute_type))
+    return _UNKNOWN_MODEL_BYTES
+
+
+class ModelCache:
+    """
+    LRU cache of loaded models keyed by (model, device, compute_type)
+
+    Entries are evicted least-recently-used first when the byte budget would be
+    exceeded, and after idle_ttl seconds without use. Pinned model names are
+    never evicted automatically.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[str, str, str], Any],
+        budget_bytes: int = 0,
+        idle_ttl: float = 0.0,
+        pinned: Iterable[str] = (),
+        size_estimator: Callable[[str, str, str], int] = estimate_model_bytes
+    ):
+        self._loader = loader
+        self._size_estimator = size_estimator
+        self.budget_bytes = max(0, int(budget_bytes))
+        self.idle_ttl = max(0.0, float(idle_ttl))
+        self.pinned = set(pinned)
+
+        self._entries: "OrderedDict[CacheKey, Dict[str, Any]]" = OrderedDict()
+        # Memory held by models outside the cache (e.g. long-audio pool processes)
+        self._reservations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        # Loads are serialised so two large models never load at the same time
+        self._load_lock = threading.Lock()
+        self._sweeper: Optional[threading.Thread] = None
+
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.evictions = 0
+        self.load_seconds_total = 0.0
+        # Optional callback(key, load_seconds) after each load, e.g. for metrics
+        self.on_load: Optional[Callable[[CacheKey, float], None]] = None
+
+    @classmethod
+    def from_env(cls, loader: Callable[[str, str, str], Any], default_pinned: str = "") -> "ModelCache":
+        """Build a cache configured by WHISPER_MODEL_CACHE_BYTES / _IDLE_TTL / WHISPER_PINNED_MODELS."""
+        pinned = os.getenv("WHISPER_PINNED_MODELS", default_pinned)
+        return cls(
+            loader,
+            budget_bytes=parse_size(os.getenv("WHISPER_MODEL_CACHE_BYTES", "0")),
+            idle_ttl=float(os.getenv("WHISPER_MODEL_IDLE_TTL", "0")),
+            pinned=[name.strip() for name in pinned.split(",") if name.strip()],
+        )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def keys(self) -> List[CacheKey]:
+        with self._lock:
+            return list(self._entries)
+
+    def _resident_bytes(self) -> int:
+        return sum(entry["bytes"] for entry in self._entries.values()) + sum(self._reservations.values())
+
+    def _evict_locked(self, needed_bytes: int, keep: Optional[CacheKey] = None) -> List[CacheKey]:
+        """Drop LRU unpinned entries until needed_bytes fits in the budget."""
+        evicted = []
+        if not self.budget_bytes:
+            return evicted
+        for key in list(self._entries):
+            if self._resident_bytes() + needed_bytes <= self.budget_bytes:
+                break
+            if key == keep or key[0] in self.pinned:
+                continue
+            del self._entries[key]
+            self.evictions += 1
+            evicted.append(key)
+        return evicted
+
+    def get(self, model_name: str, device: str, compute_type: str) -> Any:
+        """Return a cached model, loading (and evicting) as needed."""
+        key = (model_name, device, compute_type)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self.hits += 1
+                entry["last_used"] = time.time()
+                self._entries.move_to_end(key)
+                return entry["model"]
+
+        with self._load_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    # Loaded by another thread while we waited
+                    self.hits += 1
+                    entry["last_used"] = time.time()
+                    self._entries.move_to_end(key)
+                    return entry["model"]
+                self.misses += 1
+                size = self._size_estimator(*key)
+                evicted = self._evict_locked(size)
+
+            self._release(evicted)
+            logger.info(
+                f"Loading faster-whisper model '{model_name}' on device={device} "
+                f"(compute_type={compute_type}, ~{size / 1024**2:.0f} MB)"
+            )
+            started = time.perf_counter()
+            model = self._loader(model_name, device, compute_type)
+            load_seconds = time.perf_counter() - started
+
+            with self._lock:
+                now = time.time()
+                self._entries[key] = {
+                    "model": model,
+                    "bytes": size,
+                    "loaded_at": now,
+                    "last_used": now,
+                    "load_seconds": load_seconds,
+                }
+                self.loads += 1
+                self.load_seconds_total += load_seconds
+                evicted = self._evict_locked(0, keep=key)
+                over_budget = self.budget_bytes and self._resident_bytes() > self.budget_bytes
+
+        self._release(evicted)
+        if over_budget:
+            logger.warning(
+                f"Model cache is over its {self.budget_bytes / 1024**2:.0f} MB budget "
+                "(pinned or in-use models cannot be evicted)"
+            )
+        if self.on_load is not None:
+            self.on_load(key, load_seconds)
+        self._ensure_sweeper()
+        return model
+
+    def reserve(self, name: str, size: int):
+        """
+        Count memory used by models outside the cache against the budget
+
+        Cached models are evicted (LRU first) to make room, as for a load.
+        """
+        with self._lock:
+            self._reservations.pop(name, None)
+            evicted = self._evict_locked(size)
+            self._reservations[name] = size
+        self._release(evicted)
+        logger.info(f"Reserved ~{size / 1024**2:.0f} MB of the model budget for {name}")
+
+    def release_reservation(self, name: str):
+        with self._lock:
+            self._reservations.pop(name, None)
+
+    def evict_idle(self) -> List[CacheKey]:
+        """Drop unpinned entries unused for longer than idle_ttl."""
+        if not self.idle_ttl:
+            return []
+        cutoff = time.time() - self.idle_ttl
+        with self._lock:
+            evicted = [
+                key for key, entry in self._entries.items()
+                if entry["last_used"] < cutoff and key[0] not in self.pinned
+            ]
+            for key in evicted:
+                del self._entries[key]
+            self.evictions += len(evicted)
+        self._release(evicted)
+        return evicted
+
+    def clear(self) -> int:
+        """Drop every entry, pinned included; returns the number removed."""
+        with self._lock:
+            evicted = list(self._entries)
+            self._entries.clear()
+        self._release(evicted)
+        return len(evicted)
+
+    def _release(self, evicted: List[CacheKey]):
+        if not evicted:
+            return
+        for key in evicted:
+            logger.info(f"Evicted Whisper model {key} from cache")
+        # Models still in use by a running transcription are freed when it finishes
+        gc.collect()
+
+    def _ensure_sweeper(self):
+        if not self.idle_ttl or self._sweeper is not None:
+            return
+        with self._lock:
+            if self._sweeper is not None:
+                return
+            self._sweeper = threading.Thread(
+                target=self._sweep_forever, name="model-cache-sweeper", daemon=True
+            )
+            self._sweeper.start()
+
+    def _sweep_forever(self):
+        interval = min(max(self.idle_ttl / 2, 1.0), 60.0)
+        while True:
+            time.sleep(interval)
+            try:
+                self.evict_idle()
+            except Exception as e:
+                logger.error(f"Model cache idle sweep failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters and current residency for status endpoints."""
+        now = time.time()
+        with self._lock:
+            entries = [
+                {
+                    "model": key[0],
+                    "device": key[1],
+                    "compute_type": key[2],
+                    "estimated_mb": round(entry["bytes"] / 1024**2, 1),
+                    "idle_seconds": round(now - entry["last_used"], 1),
+                    "load_seconds": round(entry["load_seconds"], 2),
+                    "pinned": key[0] in self.pinned,
+                }
+                for key, entry in reversed(self._entries.items())
+            ]
+            resident = self._resident_bytes()
+            reservations = {name: round(size / 1024**2, 1) for name, size in self._reservations.items()}
+        return {
+            "budget_mb": round(self.budget_bytes / 1024**2, 1) if self.budget_bytes else None,
+            "resident_mb": round(resident / 1024**2, 1),
+            "idle_ttl_seconds": self.idle_ttl or None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "loads": self.loads,
+            "evictions": self.evictions,
+            "load_seconds_total": round(self.load_seconds_total, 2),
+            "entries": entries,
+            "reservations_mb": reservations,
+        }
@@ -0,0 +1,282 @@
+"""
+Shared model server: one process per host owns the Whisper models and the
+pyannote pipeline, and web workers send it work over a local Unix socket.
+
+Run it with ``python -m utils.model_server`` from the flask-app directory and
+point the web app at it with TRANSCRIBER_MODEL_SERVER=<socket path>.
+"""
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing.connection import Client, Listener
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from utils.local_backend import load_whisper_model
+from utils.model_cache import ModelCache
+
+logger = logging.getLogger(__name__)
+
+# Models owned by the server process
+_model_cache = ModelCache.from_env(load_whisper_model, os.getenv("WHISPER_MODEL", "small"))
+_started_at = time.time()
+# Diarization requested with a transcription runs here while Whisper decodes
+_diarization_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="diarization")
+
+
+class ModelServerError(RuntimeError):
+    """Raised on the client when the model server reports a failure."""
+
+
+def _authkey(value: Optional[str]) -> Optional[bytes]:
+    return value.encode("utf-8") if value else None
+
+
+# =============================================================================
+# Server side
+# =============================================================================
+
+def _unload_whisper() -> int:
+    count = _model_cache.clear()
+    # Whisper (CTranslate2) does not allocate through torch; don't import it just for this
+    torch = sys.modules.get("torch")
+    if torch is not None and torch.cuda.is_available():
+        torch.cuda.empty_cache()
+    logger.info(f"Unloaded {count} Whisper model(s)")
+    return count
+
+
+def _diarize_decoded(audio_path: str, audio, params: Dict[str, Any]) -> Dict[str, Any]:
+    from utils.diarization import diarize_audio
+
+    started = time.perf_counter()
+    try:
+        segments = diarize_audio(audio_path, os.getenv("HF_TOKEN", ""), waveform=audio, **params)
+    except Exception as e:
+        # Reported with the transcript so the client can tell diarization failures apart
+        logger.exception(f"Diarization of {audio_path} failed")
+        return {"error": str(e)}
+    return {"segments": segments, "seconds": time.perf_counter() - started}
+
+
+def _handle_request(message: Dict[str, Any], conn) -> Dict[str, Any]:
+    from utils.audio import load_audio
+    from utils.batching import batching_enabled, get_batch_scheduler
+    from utils.diarization import diarization_stats, diarize_audio, is_model_loaded, unload_diarization_model
+    from utils.local_backend import transcribe_with_model
+
+    op = message.get("op")
+
+    if op == "load":
+        model = _model_cache.get(message["model"], message["device"], message["compute_type"])
+        if message.get("warm_up"):
+            from utils.warmup import warm_up_model
+
+            return {"warmup_seconds": warm_up_model(model)}
+        return {}
+
+    if op == "transcribe":
+        model_key = (message["model"], message["device"], message["compute_type"])
+        model = _model_cache.get(*model_key)
+        # Decoded once; pyannote gets the same buffer when diarization is requested
+        audio = load_audio(message["audio_path"], spill_dir=message.get("spill_dir"))
+        diarization_future = None
+        if message.get("diarization") is not None:
+            diarization_future = _diarization_executor.submit(
+                _diarize_decoded, message["audio_path"], audio, message["diarization"]
+            )
+        on_segment = None
+        if message.get("stream"):
+            # Intermediate messages carry "event"; the final reply carries "ok"
+            def on_segment(segment, progress):
+                conn.send({"event": "segment", "segment": segment, "progress": progress})
+        try:
+            if batching_enabled():
+                # Requests from every web worker meet here, so batches fill up fastest
+                result = get_batch_scheduler().transcribe(
+                    model, model_key, audio, on_segment=on_segment, **message["params"]
+                )
+            else:
+                result = transcribe_with_model(
+                    model, audio, on_segment=on_segment, **message["params"]
+                )
+        except BaseException:
+            if diarization_future is not None:
+                diarization_future.cancel()
+            raise
+        if diarization_future is not None:
+            result["diarization"] = diarization_future.result()
+        return result
+
+    if op == "diarize":
+        return {
+            "segments": diarize_audio(
+                message["audio_path"],
+                os.getenv("HF_TOKEN", ""),
+                waveform=load_audio(message["audio_path"], spill_dir=message.get("spill_dir")),
+                **message["params"]
+            )
+        }
+
+    if op == "unload":
+        target = message.get("target", "all")
+        result = {}
+        if target in {"whisper", "all"}:
+            result["models_unloaded"] = _unload_whisper()
+        if target in {"diarization", "all"}:
+            unload_diarization_model()
+            result["diarization_unloaded"] = True
+        return result
+
+    if op == "status":
+        return {
+            "pid": os.getpid(),
+            "uptime_seconds": time.time() - _started_at,
+            "whisper_models": [list(key) for key in _model_cache.keys()],
+            "model_cache": _model_cache.stats(),
+            "batching": get_batch_scheduler().stats() if batching_enabled() else None,
+            "diarization_loaded": is_model_loaded(),
+            "diarization": diarization_stats(),
+        }
+
+    raise ValueError(f"Unknown model server operation: {op}")
+
+
+def _serve_connection(conn):
+    with conn:
+        while True:
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                return
+            try:
+                conn.send({"ok": True, "result": _handle_request(message, conn)})
+            except Exception as e:
+                logger.exception(f"Model server request '{message.get('op')}' failed")
+                conn.send({"ok": False, "error": str(e), "error_type": type(e).__name__})
+
+
+def serve(socket_path: str, authkey: Optional[str] = None):
+    """
+    Accept requests from web workers until interrupted
+
+    Args:
+        socket_path: Filesystem path of the Unix socket to listen on
+        authkey: Optional shared secret required from clients
+    """
+    path = Path(socket_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.unlink(missing_ok=True)
+
+    with Listener(str(path), family="AF_UNIX", authkey=_authkey(authkey)) as listener:
+        os.chmod(path, 0o660)
+        logger.info(f"Model server listening on {path} (pid {os.getpid()})")
+        while True:
+            try:
+                conn = listener.accept()
+            except (OSError, EOFError) as e:
+                # Failed handshakes (e.g. wrong authkey) should not stop the server
+                logger.warning(f"Rejected model server connection: {e}")
+                continue
+            threading.Thread(target=_serve_connection, args=(conn,), daemon=True).start()
+
+
+# =============================================================================
+# Client side
+# =============================================================================
+
+class ModelServerClient:
+    """Thin client used by web workers; one connection per call."""
+
+    def __init__(self, socket_path: str, authkey: Optional[str] = None):
+        self.socket_path = socket_path
+        self.authkey = _authkey(authkey)
+
+    def _call(
+        self,
+        op: str,
+        on_event: Optional[Callable[[Dict[str, Any]], None]] = None,
+        **fields
+    ) -> Dict[str, Any]:
+        try:
+            conn = Client(self.socket_path, family="AF_UNIX", authkey=self.authkey)
+        except (OSError, EOFError) as e:
+            raise ModelServerError(f"Model server unavailable at {self.socket_path}: {e}") from e
+
+        with conn:
+            conn.send({"op": op, **fields})
+            reply = conn.recv()
+            while "event" in reply:
+                if on_event is not None:
+                    on_event(reply)
+                reply = conn.recv()
+
+        if not reply.get("ok"):
+            # Preserve ValueError so callers can tell bad input from load failures
+            if reply.get("error_type") == "ValueError":
+                raise ValueError(reply.get("error"))
+            raise ModelServerError(reply.get("error") or f"Model server '{op}' failed")
+        return reply["result"]
+
+    def load_model(self, model_name: str, device: str, compute_type: str, warm_up: bool = False) -> Dict[str, Any]:
+        return self._call("load", model=model_name, device=device, compute_type=compute_type, warm_up=warm_up)
+
+    def transcribe(
+        self,
+        audio_path: str,
+        model_name: str,
+        device: str,
+        compute_type: str,
+        on_segment: Optional[Callable[[Dict[str, Any], Optional[float]], None]] = None,
+        spill_dir: Optional[str] = None,
+        diarization: Optional[Dict[str, Any]] = None,
+        **params
+    ) -> Dict[str, Any]:
+        """
+        Transcribe a file the server can read
+
+        With ``diarization`` (diarize_audio parameters) the server decodes the
+        file once for both models and adds "diarization" to the result:
+        {"segments", "seconds"} or {"error"}.
+        """
+        on_event = None
+        if on_segment is not None:
+            def on_event(event):
+                on_segment(event["segment"], event["progress"])
+        return self._call(
+            "transcribe",
+            on_event=on_event,
+            audio_path=audio_path,
+            model=model_name,
+            device=device,
+            compute_type=compute_type,
+            params=params,
+            stream=on_segment is not None,
+            spill_dir=spill_dir,
+            diarization=diarization,
+        )
+
+    def diarize(self, audio_path: str, spill_dir: Optional[str] = None, **params):
+        return self._call("diarize", audio_path=audio_path, spill_dir=spill_dir, params=params)["segments"]
+
+    def unload(self, target: str = "all") -> Dict[str, Any]:
+        return self._call("unload", target=target)
+
+    def status(self) -> Dict[str, Any]:
+        return self._call("status")
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    # Same cuDNN default as the web app
+    os.environ.setdefault("CT2_USE_CUDNN", "0")
+    logging.basicConfig(level=logging.INFO)
+    serve(
+        os.getenv("TRANSCRIBER_MODEL_SERVER", "/run/transcriber/model-server.sock"),
+        os.getenv("TRANSCRIBER_MODEL_SERVER_AUTHKEY") or None,
+    )
@@ -0,0 +1,15 @@
+"""
+Process helpers shared by the modules that coordinate Gunicorn workers
+"""
+import os
+
+
+def pid_alive(pid: int) -> bool:
+    """True if a process with this PID exists (also when owned by another user)."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
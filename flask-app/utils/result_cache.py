@@ -0,0 +1,128 @@
+"""
+Content-addressed cache of transcription results on disk
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def make_cache_key(audio_digest: str, params: Dict[str, Any]) -> str:
+    """
+    Build a cache key from the audio content hash and output-affecting settings
+
+    Args:
+        audio_digest: Hex SHA-256 of the uploaded file
+        params: Settings that change the transcript (backend, model, language...)
+
+    Returns:
+        Hex SHA-256 key
+    """
+    canonical = json.dumps(params, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(f"{audio_digest}:{canonical}".encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    Size-bounded on-disk store of canonical results (text, segments, metadata)
+
+    Entries are JSON files sharded by key prefix. Reads refresh the file's
+    mtime, and the oldest files are evicted once max_bytes is exceeded, so
+    eviction is least-recently-used across every worker sharing the directory.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max(0, int(max_bytes))
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+        if self.enabled:
+            self.directory.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a cached result, or None on a miss."""
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            result = json.loads(path.read_text(encoding="utf-8"))
+            os.utime(path)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return result
+
+    def put(self, key: str, result: Dict[str, Any]):
+        """Store a result and evict old entries if over budget."""
+        if not self.enabled:
+            return
+        path = self._path(key)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_text(json.dumps(result, separators=(",", ":")), encoding="utf-8")
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"Failed to cache transcription result: {e}")
+            tmp_path.unlink(missing_ok=True)
+            return
+        with self._lock:
+            self.stores += 1
+        self._evict()
+
+    def _entries(self):
+        entries = []
+        for path in self.directory.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _evict(self):
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            with self._lock:
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        entries = self._entries() if self.enabled else []
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "max_mb": round(self.max_bytes / 1024**2, 1),
+                "entries": len(entries),
+                "size_mb": round(sum(size for _, size, _ in entries) / 1024**2, 2),
+                "hits": self.hits,
+                "misses": self.misses,
+                "stores": self.stores,
+                "evictions": self.evictions,
+            }
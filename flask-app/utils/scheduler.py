@@ -0,0 +1,404 @@
+"""
+Admission control and per-device concurrency slots for local transcription
+
+Each device ("cpu", "cuda", ...) has a fixed number of slots shared by every
+worker on the host: a slot is an flock on <slot dir>/<device>-<n>.lock, so it
+is released even if a worker dies mid-transcription. Requests wait for a slot
+in a bounded per-worker queue ordered by priority class; when the queue is
+full they are rejected straight away with an estimate of when to retry.
+
+Within a priority class, users share a device by deficit round-robin weighted
+by audio seconds: each turn credits a user one quantum of audio, and their
+oldest request runs once the credit covers its length. A user with a backlog
+of long recordings therefore cannot starve someone else's short clip.
+
+Queues, priorities and deficits are per worker process; workers compete for
+free slots without regard to each other's queues, so fairness holds within a
+worker only. The per-user running cap (user lock files) is host-wide.
+"""
+import fcntl
+import hashlib
+import itertools
+import logging
+import math
+import re
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Lower value = served first
+PRIORITIES = {"interactive": 0, "normal": 1, "batch": 2}
+
+# Assumed slot hold time until the first transcriptions on a device finish
+_INITIAL_SERVICE_SECONDS = 30.0
+# Weight of the newest measurement in the service time average
+_SERVICE_EWMA_ALPHA = 0.2
+
+
+class QueueFull(Exception):
+    """No room in the wait queue (or the wait timed out); retry after retry_after seconds."""
+
+    def __init__(self, message: str, retry_after: int, reason: str = "queue_full"):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class QueueTimeout(QueueFull):
+    """A queued request waited longer than its timeout for a slot."""
+
+
+class Ticket:
+    """
+    An admitted request's place in a device queue
+
+    Use ``with ticket.slot():`` around the work; ``cancel()`` gives up the
+    place if the work never runs (safe to call more than once).
+    """
+
+    def __init__(
+        self,
+        scheduler: "Scheduler",
+        device: str,
+        priority: int,
+        timeout: Optional[float],
+        user: str,
+        cost: float
+    ):
+        self.scheduler = scheduler
+        self.device = device
+        self.priority = priority
+        self.timeout = timeout
+        self.user = user
+        # Audio seconds; may be updated (e.g. once the upload is probed) while queued
+        self.cost = cost
+        self.seq = next(scheduler._sequence)
+        self.admitted_at = time.monotonic()
+        self.state = "queued"
+        # Set while a thread is blocked in slot(); only those can be handed a slot
+        self.waiting = False
+        # The user's running cap was hit in another worker; skip the ticket until then
+        self.blocked_until = 0.0
+        self._lock_files: List[Any] = []
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        self.scheduler._acquire(self)
+        try:
+            yield
+        finally:
+            self.scheduler._release(self)
+
+    def cancel(self):
+        self.scheduler._cancel(self)
+
+
+class Scheduler:
+    """
+    Per-device concurrency slots with a bounded priority wait queue
+
+    Args:
+        slot_dir: Directory shared by all workers for the slot lock files
+        cpu_slots: Concurrent transcriptions on the CPU (0 = unlimited)
+        gpu_slots: Concurrent transcriptions per GPU device (0 = unlimited)
+        max_queue: Requests allowed to wait per device in this worker
+        user_max_running: Concurrent transcriptions per user on the host (0 = no cap)
+        user_max_queued: Waiting requests per user in this worker (0 = no cap)
+        quantum: Audio seconds credited to a user per round-robin turn
+        poll_interval: Seconds between attempts to take a slot freed by another worker
+    """
+
+    def __init__(
+        self,
+        slot_dir: Path,
+        cpu_slots: int = 1,
+        gpu_slots: int = 1,
+        max_queue: int = 8,
+        user_max_running: int = 0,
+        user_max_queued: int = 0,
+        quantum: float = 300.0,
+        poll_interval: float = 0.2
+    ):
+        self.slot_dir = Path(slot_dir)
+        self.cpu_slots = max(0, int(cpu_slots))
+        self.gpu_slots = max(0, int(gpu_slots))
+        self.max_queue = max(0, int(max_queue))
+        self.user_max_running = max(0, int(user_max_running))
+        self.user_max_queued = max(0, int(user_max_queued))
+        self.quantum = max(1.0, float(quantum))
+        self.poll_interval = max(0.01, float(poll_interval))
+        self._condition = threading.Condition()
+        self._sequence = itertools.count()
+        self._queues: Dict[str, List[Ticket]] = {}
+        self._running: Dict[str, int] = {}
+        self._service_seconds: Dict[str, float] = {}
+        # Deficit round-robin state per device: users in turn order, their
+        # unused credit, and whose turn it is
+        self._rotation: Dict[str, List[str]] = {}
+        self._deficits: Dict[str, Dict[str, float]] = {}
+        self._turn: Dict[str, Optional[str]] = {}
+
+        self.admitted = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+
+        if self.cpu_slots or self.gpu_slots:
+            self.slot_dir.mkdir(parents=True, exist_ok=True)
+
+    def slots_for(self, device: str) -> int:
+        return self.cpu_slots if device == "cpu" else self.gpu_slots
+
+    def retry_after(self, device: str) -> int:
+        """Seconds until a new request would likely get a slot, from queue depth and throughput."""
+        with self._condition:
+            return self._retry_after_locked(device)
+
+    def _retry_after_locked(self, device: str) -> int:
+        slots = self.slots_for(device) or 1
+        service = self._service_seconds.get(device, _INITIAL_SERVICE_SECONDS)
+        waiting = len(self._queues.get(device, ()))
+        return max(1, math.ceil(service * (waiting // slots + 1)))
+
+    def admit(
+        self,
+        device: str,
+        priority: str = "normal",
+        timeout: Optional[float] = None,
+        user: str = "",
+        cost: Optional[float] = None
+    ) -> Ticket:
+        """
+        Take a place in the device queue
+
+        Args:
+            device: Device the work will run on
+            priority: One of PRIORITIES
+            timeout: Longest time slot() may wait (None = no limit)
+            user: Identity the fair share is accounted to
+            cost: Audio seconds, if known (unknown counts as one quantum)
+
+        Raises:
+            QueueFull: The device queue, or the user's share of it, is full
+        """
+        with self._condition:
+            queue = self._queues.setdefault(device, [])
+            if self.slots_for(device):
+                if len(queue) >= self.max_queue:
+                    self.rejected += 1
+                    raise QueueFull(
+                        f"Too many transcriptions waiting for {device}", self._retry_after_locked(device)
+                    )
+                if self.user_max_queued and sum(
+                    1 for queue in self._queues.values() for ticket in queue if ticket.user == user
+                ) >= self.user_max_queued:
+                    self.rejected += 1
+                    raise QueueFull(
+                        "You already have the maximum number of transcriptions waiting",
+                        self._retry_after_locked(device),
+                        reason="user_queue_full",
+                    )
+            ticket = Ticket(self, device, PRIORITIES[priority], timeout, user, cost or self.quantum)
+            queue.append(ticket)
+            rotation = self._rotation.setdefault(device, [])
+            if user not in rotation:
+                rotation.append(user)
+            self.admitted += 1
+        return ticket
+
+    def all_full(self, devices: List[str]) -> Optional[int]:
+        """Retry-After if every one of the devices is rejecting new requests, else None."""
+        with self._condition:
+            if not all(
+                self.slots_for(device) and len(self._queues.get(device, ())) >= self.max_queue
+                for device in devices
+            ):
+                return None
+            self.rejected += 1
+            return min(self._retry_after_locked(device) for device in devices)
+
+    def _lock_path(self, device: str, index: int) -> Path:
+        return self.slot_dir / f"{re.sub(r'[^A-Za-z0-9_.-]', '_', device)}-{index}.lock"
+
+    def _user_lock_path(self, user: str, index: int) -> Path:
+        digest = hashlib.sha256(user.encode("utf-8")).hexdigest()[:16]
+        return self.slot_dir / f"user-{digest}-{index}.lock"
+
+    @staticmethod
+    def _try_lock(paths: Iterable[Path]):
+        for path in paths:
+            lock_file = open(path, "a")
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                lock_file.close()
+                continue
+            return lock_file
+        return None
+
+    def _try_take_slot(self, device: str):
+        return self._try_lock(self._lock_path(device, index) for index in range(self.slots_for(device)))
+
+    def _try_take_user_slot(self, user: str):
+        return self._try_lock(self._user_lock_path(user, index) for index in range(self.user_max_running))
+
+    def _choose_locked(self, device: str) -> Optional[Tuple[Ticket, Dict[str, float]]]:
+        """
+        The waiting ticket that gets the next free slot, and the deficits after serving it
+
+        Nothing is changed here: every waiting thread asks, and only the one
+        that actually takes the slot commits the new deficits.
+        """
+        now = time.monotonic()
+        waiting = [
+            ticket for ticket in self._queues.get(device, ())
+            if ticket.waiting and ticket.blocked_until <= now
+        ]
+        if not waiting:
+            return None
+        best = min(ticket.priority for ticket in waiting)
+        heads: Dict[str, Ticket] = {}
+        for ticket in sorted(waiting, key=lambda ticket: ticket.seq):
+            if ticket.priority == best:
+                heads.setdefault(ticket.user, ticket)
+
+        rotation = [user for user in self._rotation.get(device, ()) if user in heads]
+        turn = self._turn.get(device)
+        index = rotation.index(turn) if turn in rotation else 0
+        deficits = dict(self._deficits.get(device, {}))
+        while True:
+            user = rotation[index]
+            head = heads[user]
+            if deficits.get(user, 0.0) >= head.cost:
+                deficits[user] -= head.cost
+                return head, deficits
+            deficits[user] = deficits.get(user, 0.0) + self.quantum
+            index = (index + 1) % len(rotation)
+
+    def _leave_queue_locked(self, ticket: Ticket):
+        device = ticket.device
+        self._queues[device].remove(ticket)
+        if not any(queued.user == ticket.user for queued in self._queues[device]):
+            # An idle user keeps no credit, as in plain deficit round-robin
+            self._rotation[device].remove(ticket.user)
+            self._deficits.get(device, {}).pop(ticket.user, None)
+            if self._turn.get(device) == ticket.user:
+                self._turn[device] = None
+
+    def _try_start_locked(self, ticket: Ticket) -> bool:
+        device = ticket.device
+        choice = self._choose_locked(device)
+        if choice is None or choice[0] is not ticket:
+            return False
+        user_lock = None
+        if self.user_max_running:
+            user_lock = self._try_take_user_slot(ticket.user)
+            if user_lock is None:
+                # The user is at their cap (possibly in another worker); let others go first
+                ticket.blocked_until = time.monotonic() + self.poll_interval
+                self._condition.notify_all()
+                return False
+        device_lock = self._try_take_slot(device)
+        if device_lock is None:
+            if user_lock is not None:
+                user_lock.close()
+            return False
+        ticket._lock_files = [device_lock] + ([user_lock] if user_lock is not None else [])
+        self._deficits[device] = choice[1]
+        self._turn[device] = ticket.user
+        return True
+
+    def _acquire(self, ticket: Ticket):
+        device = ticket.device
+        started = time.monotonic()
+        deadline = started + ticket.timeout if ticket.timeout is not None else None
+        with self._condition:
+            if ticket.state != "queued":
+                raise RuntimeError(f"Ticket is already {ticket.state}")
+            ticket.waiting = True
+            try:
+                while True:
+                    if not self.slots_for(device) or self._try_start_locked(ticket):
+                        break
+                    remaining = deadline - time.monotonic() if deadline is not None else None
+                    if remaining is not None and remaining <= 0:
+                        self._leave_queue_locked(ticket)
+                        ticket.state = "cancelled"
+                        self.timeouts += 1
+                        # Let the next waiter try for the slot
+                        self._condition.notify_all()
+                        raise QueueTimeout(
+                            f"Timed out waiting for a {device} slot",
+                            self._retry_after_locked(device),
+                            reason="timeout",
+                        )
+                    # Slots freed by other workers are only noticed by polling
+                    self._condition.wait(
+                        self.poll_interval if remaining is None else min(self.poll_interval, remaining)
+                    )
+            finally:
+                ticket.waiting = False
+
+            self._leave_queue_locked(ticket)
+            self._running[device] = self._running.get(device, 0) + 1
+            ticket.state = "running"
+            ticket.started_at = time.monotonic()
+            self.wait_seconds_total += ticket.started_at - started
+            # The next waiter is now at the head of the queue
+            self._condition.notify_all()
+
+    def _release(self, ticket: Ticket):
+        with self._condition:
+            if ticket.state != "running":
+                return
+            for lock_file in ticket._lock_files:
+                lock_file.close()
+            ticket._lock_files = []
+            device = ticket.device
+            self._running[device] -= 1
+            held = time.monotonic() - ticket.started_at
+            previous = self._service_seconds.get(device)
+            self._service_seconds[device] = held if previous is None else (
+                _SERVICE_EWMA_ALPHA * held + (1 - _SERVICE_EWMA_ALPHA) * previous
+            )
+            ticket.state = "done"
+            self._condition.notify_all()
+
+    def _cancel(self, ticket: Ticket):
+        with self._condition:
+            if ticket.state == "queued":
+                self._leave_queue_locked(ticket)
+                ticket.state = "cancelled"
+                self._condition.notify_all()
+        self._release(ticket)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._condition:
+            devices = sorted(set(self._queues) | set(self._running))
+            return {
+                "cpu_slots": self.cpu_slots or None,
+                "gpu_slots": self.gpu_slots or None,
+                "max_queue": self.max_queue,
+                "user_max_running": self.user_max_running or None,
+                "user_max_queued": self.user_max_queued or None,
+                "quantum_seconds": self.quantum,
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": round(self.wait_seconds_total, 2),
+                "devices": {
+                    device: {
+                        "queued": len(self._queues.get(device, ())),
+                        "queued_users": len(self._rotation.get(device, ())),
+                        "running": self._running.get(device, 0),
+                        "service_seconds": round(self._service_seconds[device], 2)
+                        if device in self._service_seconds else None,
+                        "retry_after": self._retry_after_locked(device),
+                    }
+                    for device in devices
+                },
+            }
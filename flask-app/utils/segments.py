@@ -0,0 +1,312 @@
+"""
+Compact columnar storage for transcript segments
+"""
+from array import array
+from bisect import bisect_right
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+Row = Tuple[float, float, str, Optional[str]]
+
+
+class _TextColumn:
+    """
+    Strings stored as a few large buffers plus offsets instead of one object each
+
+    Appends collect in a short pending list that is joined into a new buffer
+    every BLOCK_ITEMS strings, so reading an item (e.g. the newest segment while
+    streaming) never copies text that was already stored.
+    """
+
+    __slots__ = ("_blocks", "_block_starts", "_pending", "offsets")
+
+    BLOCK_ITEMS = 256
+
+    def __init__(self):
+        self._blocks: List[str] = []
+        # Index of the first item in each block
+        self._block_starts = array("q")
+        self._pending: List[str] = []
+        self.offsets = array("q", [0])
+
+    def append(self, text: str):
+        self._pending.append(text)
+        self.offsets.append(self.offsets[-1] + len(text))
+        if len(self._pending) >= self.BLOCK_ITEMS:
+            self._seal()
+
+    def _seal(self):
+        if self._pending:
+            self._block_starts.append(len(self) - len(self._pending))
+            self._blocks.append("".join(self._pending))
+            self._pending = []
+
+    def joined(self) -> str:
+        """All strings as one; the buffers are merged so repeated calls are free."""
+        self._seal()
+        if len(self._blocks) > 1:
+            self._blocks = ["".join(self._blocks)]
+            self._block_starts = array("q", [0])
+        return self._blocks[0] if self._blocks else ""
+
+    def __getitem__(self, index: int) -> str:
+        if index < 0:
+            index += len(self)
+        first_pending = len(self) - len(self._pending)
+        if index >= first_pending:
+            return self._pending[index - first_pending]
+        block = bisect_right(self._block_starts, index) - 1
+        base = self.offsets[self._block_starts[block]]
+        return self._blocks[block][self.offsets[index] - base:self.offsets[index + 1] - base]
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def tolist(self) -> List[str]:
+        buffer, offsets = self.joined(), self.offsets
+        return [buffer[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
+
+
+class SegmentTable:
+    """
+    Transcript segments held column-wise
+
+    Times live in array('d') columns, text in string buffers with offsets,
+    and speakers as int ids into an interned speaker table (-1 = unassigned).
+    Optional word timings use the same layout, with word_offsets marking each
+    segment's slice of the word columns. Iterating yields plain dicts for code
+    that still wants them; hot paths use rows() and the columns directly.
+    """
+
+    __slots__ = (
+        "starts", "ends", "speaker_ids", "texts", "speakers", "_speaker_index",
+        "word_offsets", "word_starts", "word_ends", "word_probabilities", "word_speaker_ids", "word_texts",
+    )
+
+    def __init__(self):
+        self.starts = array("d")
+        self.ends = array("d")
+        self.speaker_ids = array("i")
+        self.texts = _TextColumn()
+        self.speakers: List[str] = []
+        self._speaker_index: Dict[str, int] = {}
+
+        self.word_offsets = array("q", [0])
+        self.word_starts = array("d")
+        self.word_ends = array("d")
+        self.word_probabilities = array("d")
+        self.word_speaker_ids = array("i")
+        self.word_texts = _TextColumn()
+
+    # -- building -------------------------------------------------------------
+
+    def intern_speaker(self, speaker: Optional[str]) -> int:
+        if speaker is None:
+            return -1
+        index = self._speaker_index.get(speaker)
+        if index is None:
+            index = self._speaker_index[speaker] = len(self.speakers)
+            self.speakers.append(speaker)
+        return index
+
+    def append(
+        self,
+        start: float,
+        end: float,
+        text: str,
+        speaker: Optional[str] = None,
+        words: Optional[Iterable[Dict[str, Any]]] = None
+    ):
+        """Add a segment; words are dicts with start/end/word[/probability/speaker]."""
+        self.starts.append(start)
+        self.ends.append(end)
+        self.texts.append(text)
+        self.speaker_ids.append(self.intern_speaker(speaker))
+        for word in words or ():
+            self.word_starts.append(word["start"])
+            self.word_ends.append(word["end"])
+            self.word_probabilities.append(word.get("probability", 0.0))
+            self.word_speaker_ids.append(self.intern_speaker(word.get("speaker")))
+            self.word_texts.append(word["word"])
+        self.word_offsets.append(len(self.word_starts))
+
+    def append_row(self, other: "SegmentTable", index: int, start: Optional[float] = None):
+        """Copy segment ``index`` of another table, optionally with a new start."""
+        self.append(
+            other.starts[index] if start is None else start,
+            other.ends[index],
+            other.texts[index],
+            other.speaker(index),
+            other.words(index),
+        )
+
+    def shift(self, offset: float):
+        """Move every timestamp by ``offset`` seconds in place."""
+        for column in (self.starts, self.ends, self.word_starts, self.word_ends):
+            for i in range(len(column)):
+                column[i] += offset
+
+    def set_speaker_ids(self, ids, words: bool = False):
+        """Replace the (word) speaker id column from any int sequence or NumPy array."""
+        column = _int_array(ids)
+        if words:
+            self.word_speaker_ids = column
+        else:
+            self.speaker_ids = column
+
+    # -- reading --------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def speaker(self, index: int) -> Optional[str]:
+        speaker_id = self.speaker_ids[index]
+        return self.speakers[speaker_id] if speaker_id >= 0 else None
+
+    @property
+    def has_speakers(self) -> bool:
+        return any(speaker_id >= 0 for speaker_id in self.speaker_ids)
+
+    @property
+    def has_words(self) -> bool:
+        return len(self.word_starts) > 0
+
+    def full_text(self) -> str:
+        """All segment texts concatenated (as Whisper emits them)."""
+        return self.texts.joined()
+
+    def words(self, index: int) -> Optional[List[Dict[str, Any]]]:
+        first, last = self.word_offsets[index], self.word_offsets[index + 1]
+        if first == last and not self.has_words:
+            return None
+        words = []
+        for w in range(first, last):
+            word = {
+                "start": self.word_starts[w],
+                "end": self.word_ends[w],
+                "word": self.word_texts[w],
+                "probability": self.word_probabilities[w],
+            }
+            if self.word_speaker_ids[w] >= 0:
+                word["speaker"] = self.speakers[self.word_speaker_ids[w]]
+            words.append(word)
+        return words
+
+    def rows(self) -> Iterator[Row]:
+        """(start, end, text, speaker) per segment, without building dicts."""
+        text = self.texts.joined()
+        offsets = self.texts.offsets
+        speakers = self.speakers
+        for i in range(len(self.starts)):
+            speaker_id = self.speaker_ids[i]
+            yield (
+                self.starts[i],
+                self.ends[i],
+                text[offsets[i]:offsets[i + 1]],
+                speakers[speaker_id] if speaker_id >= 0 else None,
+            )
+
+    def __getitem__(self, index: int) -> Dict[str, Any]:
+        if index < 0:
+            index += len(self)
+        segment: Dict[str, Any] = {
+            "start": self.starts[index],
+            "end": self.ends[index],
+            "text": self.texts[index],
+        }
+        speaker = self.speaker(index)
+        if speaker is not None:
+            segment["speaker"] = speaker
+        words = self.words(index)
+        if words is not None:
+            segment["words"] = words
+        return segment
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return (self[i] for i in range(len(self)))
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        return list(self)
+
+    # -- serialisation --------------------------------------------------------
+
+    def to_columns(self) -> Dict[str, Any]:
+        """JSON-friendly column dict (much smaller and faster than a list of dicts)."""
+        columns: Dict[str, Any] = {
+            "start": self.starts.tolist(),
+            "end": self.ends.tolist(),
+            "text": self.texts.tolist(),
+            "speaker_id": self.speaker_ids.tolist(),
+            "speakers": list(self.speakers),
+        }
+        if self.has_words:
+            columns["words"] = {
+                "offsets": self.word_offsets.tolist(),
+                "start": self.word_starts.tolist(),
+                "end": self.word_ends.tolist(),
+                "word": self.word_texts.tolist(),
+                "probability": self.word_probabilities.tolist(),
+                "speaker_id": self.word_speaker_ids.tolist(),
+            }
+        return columns
+
+    @classmethod
+    def from_columns(cls, columns: Dict[str, Any]) -> "SegmentTable":
+        table = cls()
+        table.starts = array("d", columns["start"])
+        table.ends = array("d", columns["end"])
+        table.speaker_ids = array("i", columns["speaker_id"])
+        for text in columns["text"]:
+            table.texts.append(text)
+        for speaker in columns["speakers"]:
+            table.intern_speaker(speaker)
+
+        words = columns.get("words")
+        if words:
+            table.word_offsets = array("q", words["offsets"])
+            table.word_starts = array("d", words["start"])
+            table.word_ends = array("d", words["end"])
+            table.word_probabilities = array("d", words["probability"])
+            table.word_speaker_ids = array("i", words["speaker_id"])
+            for text in words["word"]:
+                table.word_texts.append(text)
+        else:
+            table.word_offsets = array("q", [0] * (len(table.starts) + 1))
+        return table
+
+    @classmethod
+    def from_dicts(cls, segments: Iterable[Dict[str, Any]]) -> "SegmentTable":
+        table = cls()
+        for seg in segments:
+            table.append(
+                seg.get("start", 0),
+                seg.get("end", 0),
+                seg.get("text", ""),
+                seg.get("speaker"),
+                seg.get("words"),
+            )
+        table.texts.joined()
+        table.word_texts.joined()
+        return table
+
+    @classmethod
+    def coerce(cls, segments) -> "SegmentTable":
+        """Return ``segments`` as a SegmentTable, converting a list of dicts."""
+        return segments if isinstance(segments, cls) else cls.from_dicts(segments or ())
+
+
+def _int_array(values) -> array:
+    import numpy as np
+
+    column = array("i")
+    column.frombytes(np.asarray(values, dtype=np.intc).tobytes())
+    return column
+
+
+def iter_rows(segments) -> Iterator[Row]:
+    """(start, end, text, speaker) rows from a SegmentTable or a list of dicts."""
+    if isinstance(segments, SegmentTable):
+        return segments.rows()
+    return (
+        (seg.get("start", 0), seg.get("end", 0), seg.get("text", ""), seg.get("speaker"))
+        for seg in segments
+    )
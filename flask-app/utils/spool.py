@@ -0,0 +1,169 @@
+"""
+Upload spooling: request bodies are written once, straight into a spool directory
+"""
+import hashlib
+import logging
+import os
+import re
+import shutil
+import uuid
+import zipfile
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+from utils.process import pid_alive
+
+logger = logging.getLogger(__name__)
+
+# Spool files carry the owning worker's PID so orphans can be recognised
+_SPOOL_NAME = re.compile(r"^(?:part|upload)-(\d+)-[0-9a-f]{32}")
+
+
+class SpoolFile:
+    """
+    Writable file in the spool directory that hashes its content as it is written
+
+    Used as the Werkzeug file stream for multipart uploads, so the body goes to
+    disk once and the SHA-256 is ready when parsing finishes. claim() hands the
+    file over to the caller; unclaimed files are removed by discard().
+    """
+
+    def __init__(self, directory: Path):
+        token = uuid.uuid4().hex
+        self._token = token
+        self._directory = Path(directory)
+        self.path = self._directory / f"part-{os.getpid()}-{token}"
+        self._file = open(self.path, "w+b")
+        self._sha256 = hashlib.sha256()
+        self.claimed = False
+
+    def write(self, data) -> int:
+        self._sha256.update(data)
+        return self._file.write(data)
+
+    def __getattr__(self, name):
+        # read/seek/tell/flush/... go to the underlying file
+        return getattr(self._file, name)
+
+    def __iter__(self):
+        return iter(self._file)
+
+    def claim(self, suffix: str) -> Tuple[Path, str]:
+        """Close the file and rename it for processing; returns (path, sha256 hex)."""
+        self._file.close()
+        path = self._directory / f"upload-{os.getpid()}-{self._token}{suffix}"
+        os.replace(self.path, path)
+        self.claimed = True
+        return path, self._sha256.hexdigest()
+
+    def discard(self):
+        if self.claimed:
+            return
+        self._file.close()
+        self.path.unlink(missing_ok=True)
+
+
+def copy_to_spool(stream, directory: Path, suffix: str, chunk_bytes: int = 1024 * 1024) -> Tuple[Path, str]:
+    """Copy an arbitrary stream into the spool directory, hashing it on the way."""
+    spool = SpoolFile(directory)
+    try:
+        while True:
+            chunk = stream.read(chunk_bytes)
+            if not chunk:
+                break
+            spool.write(chunk)
+        return spool.claim(suffix)
+    finally:
+        spool.discard()
+
+
+def spool_zip_members(
+    archive_path: Path,
+    directory: Path,
+    extensions: Iterable[str],
+    max_files: int,
+    max_bytes: int,
+    chunk_bytes: int = 1024 * 1024
+) -> List[Tuple[str, Path, str]]:
+    """
+    Copy the audio members of a zip archive into the spool directory
+
+    Members are streamed one at a time into spool files, never extracted to
+    paths taken from the archive. Directories, hidden files (including macOS
+    resource forks) and other extensions are skipped.
+
+    Args:
+        archive_path: Uploaded zip file
+        directory: Spool directory
+        extensions: Accepted lower-case suffixes, e.g. {".wav", ".mp3"}
+        max_files: Most audio members accepted
+        max_bytes: Largest total uncompressed size accepted (0 = no limit)
+
+    Returns:
+        (member base name, spool path, SHA-256 hex) per audio member, in archive order
+
+    Raises:
+        ValueError: Not a zip archive, or over max_files / max_bytes
+    """
+    extensions = set(extensions)
+    spooled: List[Tuple[str, Path, str]] = []
+    try:
+        with zipfile.ZipFile(archive_path) as archive:
+            members = [
+                info for info in archive.infolist()
+                if not info.is_dir()
+                and not any(part.startswith(".") or part == "__MACOSX" for part in Path(info.filename).parts)
+                and Path(info.filename).suffix.lower() in extensions
+            ]
+            if len(members) > max_files:
+                raise ValueError(f"Archive contains {len(members)} audio files; the limit is {max_files}")
+            # file_size is an upper bound: zipfile never returns more than it declares
+            if max_bytes and sum(info.file_size for info in members) > max_bytes:
+                raise ValueError(f"Archive expands to more than {max_bytes // 1024**2} MB")
+            for info in members:
+                with archive.open(info) as member:
+                    path, digest = copy_to_spool(member, directory, Path(info.filename).suffix.lower(), chunk_bytes)
+                spooled.append((Path(info.filename).name, path, digest))
+    except zipfile.BadZipFile as e:
+        for _, path, _ in spooled:
+            path.unlink(missing_ok=True)
+        raise ValueError(f"Not a valid zip archive: {e}")
+    except BaseException:
+        for _, path, _ in spooled:
+            path.unlink(missing_ok=True)
+        raise
+    return spooled
+
+
+def has_free_space(directory: Path, incoming_bytes: Optional[int], min_free_bytes: int) -> bool:
+    """Whether the spool filesystem keeps min_free_bytes free after this upload."""
+    if min_free_bytes <= 0:
+        return True
+    try:
+        free = shutil.disk_usage(directory).free
+    except OSError as e:
+        logger.warning(f"Could not check free space in {directory}: {e}")
+        return True
+    return free - (incoming_bytes or 0) >= min_free_bytes
+
+
+def sweep_orphans(directory: Path) -> int:
+    """
+    Remove spool files whose owning worker process no longer exists
+
+    Returns:
+        Number of files removed
+    """
+    removed = 0
+    for path in Path(directory).iterdir():
+        match = _SPOOL_NAME.match(path.name)
+        if not match or not path.is_file() or pid_alive(int(match.group(1))):
+            continue
+        try:
+            path.unlink()
+            removed += 1
+        except OSError as e:
+            logger.warning(f"Could not remove orphaned spool file {path}: {e}")
+    if removed:
+        logger.info(f"Removed {removed} orphaned upload(s) from {directory}")
+    return removed
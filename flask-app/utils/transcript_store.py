@@ -0,0 +1,179 @@
+"""
+Canonical per-job transcripts with download formats rendered on demand
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from utils.formatters import FORMAT_EXTENSIONS, render_transcript, write_transcript_files
+from utils.segments import SegmentTable
+
+logger = logging.getLogger(__name__)
+
+# Each job stores only <base_name>.transcript.json; <base_name>.srt etc. are rendered from it
+CANONICAL_SUFFIX = ".transcript.json"
+
+_EXTENSION_FORMATS = {extension: fmt for fmt, extension in FORMAT_EXTENSIONS.items()}
+
+
+def save_transcript(path: Path, text: str, segments: SegmentTable, metadata: Dict[str, Any]):
+    """
+    Write a job's canonical transcript (compact JSON with columnar segments)
+
+    Args:
+        path: Target file, normally <base_name> + CANONICAL_SUFFIX
+        text: Full transcript text
+        segments: Transcript segments
+        metadata: Transcript metadata (backend, language, speakers, ...)
+    """
+    payload = {
+        "version": 1,
+        "text": text,
+        "metadata": metadata,
+        "segments": segments.to_columns(),
+    }
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        tmp_path.write_text(
+            json.dumps(payload, ensure_ascii=False, separators=(",", ":"), default=str), encoding="utf-8"
+        )
+        os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def load_transcript(path: Path) -> Tuple[SegmentTable, Dict[str, Any]]:
+    """Read a canonical transcript back as (segments, metadata)."""
+    payload = json.loads(Path(path).read_text(encoding="utf-8"))
+    return SegmentTable.from_columns(payload["segments"]), payload.get("metadata") or {}
+
+
+def resolve_download(path: Path) -> Optional[Tuple[Path, str]]:
+    """
+    Map a requested download path to its canonical transcript and format
+
+    Returns:
+        (canonical transcript path, format name), or None if the name does not
+        correspond to a stored transcript
+    """
+    path = Path(path)
+    fmt = _EXTENSION_FORMATS.get(path.suffix.lower())
+    if fmt is None:
+        return None
+    canonical = path.with_name(f"{path.stem}{CANONICAL_SUFFIX}")
+    return (canonical, fmt) if canonical.is_file() else None
+
+
+class RenderCache:
+    """
+    Size-bounded on-disk cache of rendered download files
+
+    Entries are keyed by the canonical transcript's path, size and mtime plus
+    the format, so the key doubles as a strong ETag. Like ResultCache, hits
+    refresh the mtime and the oldest entries are evicted once over max_bytes.
+    With max_bytes = 0 every download is rendered into memory instead.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max(0, int(max_bytes))
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.renders = 0
+        self.evictions = 0
+
+        if self.enabled:
+            self.directory.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    @staticmethod
+    def etag(canonical: Path, fmt: str) -> str:
+        stat = canonical.stat()
+        identity = f"{canonical.resolve()}:{stat.st_size}:{stat.st_mtime_ns}:{fmt}"
+        return hashlib.sha256(identity.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str, fmt: str) -> Path:
+        return self.directory / key[:2] / f"{key}{FORMAT_EXTENSIONS[fmt]}"
+
+    def render(self, canonical: Path, fmt: str, etag: Optional[str] = None):
+        """
+        Rendered download for a canonical transcript
+
+        Returns:
+            Path of the cached file, or the rendered bytes when the cache is disabled
+        """
+        key = etag or self.etag(canonical, fmt)
+        if self.enabled:
+            path = self._path(key, fmt)
+            try:
+                os.utime(path)
+                with self._lock:
+                    self.hits += 1
+                return path
+            except OSError:
+                pass
+
+        segments, metadata = load_transcript(canonical)
+        with self._lock:
+            self.renders += 1
+        if not self.enabled:
+            return render_transcript(segments, fmt, metadata).encode("utf-8")
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            write_transcript_files(segments, {fmt: tmp_path}, metadata=metadata)
+            os.replace(tmp_path, path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+        self._evict(keep=path)
+        return path
+
+    def _entries(self):
+        entries = []
+        for path in self.directory.glob("*/*"):
+            if path.suffix == ".tmp":
+                continue
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _evict(self, keep: Path):
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            # The file just rendered is about to be sent, even if it alone is over budget
+            if path == keep:
+                continue
+            path.unlink(missing_ok=True)
+            total -= size
+            with self._lock:
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        entries = self._entries() if self.enabled else []
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "max_mb": round(self.max_bytes / 1024**2, 1),
+                "entries": len(entries),
+                "size_mb": round(sum(size for _, size, _ in entries) / 1024**2, 2),
+                "hits": self.hits,
+                "renders": self.renders,
+                "evictions": self.evictions,
+            }
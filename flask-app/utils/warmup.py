@@ -0,0 +1,141 @@
+"""
+Model preloading and warm-up at worker start
+"""
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from utils.audio import SAMPLE_RATE
+
+logger = logging.getLogger(__name__)
+
+PreloadEntry = Tuple[str, str, str]
+
+
+def parse_preload_list(value: Optional[str], default_device: str, default_compute_type: str) -> List[PreloadEntry]:
+    """
+    Parse WHISPER_PRELOAD, e.g. "large-v3:cuda:float16,small:cpu:int8"
+
+    Each comma-separated entry is model[:device[:compute_type]]; missing parts
+    use the defaults. Duplicate entries are dropped.
+    """
+    entries: List[PreloadEntry] = []
+    for item in (value or "").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        parts = item.rsplit(":", 2)
+        model_name = parts[0].strip()
+        device = parts[1].strip() if len(parts) > 1 and parts[1].strip() else default_device
+        compute_type = parts[2].strip() if len(parts) > 2 and parts[2].strip() else default_compute_type
+        entry = (model_name, device, compute_type)
+        if model_name and entry not in entries:
+            entries.append(entry)
+    return entries
+
+
+def warm_up_model(model, seconds: float = 2.0) -> float:
+    """
+    Run one short synthetic decode so first-request kernels/allocations are paid now
+
+    Args:
+        model: Loaded faster-whisper WhisperModel
+        seconds: Length of the synthetic clip
+
+    Returns:
+        Warm-up time in seconds
+    """
+    import numpy as np
+
+    started = time.perf_counter()
+    t = np.arange(int(seconds * SAMPLE_RATE), dtype=np.float32) / SAMPLE_RATE
+    # A quiet tone with noise: VAD is off, so the encoder and decoder both run
+    rng = np.random.default_rng(0)
+    audio = (0.1 * np.sin(2 * np.pi * 220.0 * t) + 0.01 * rng.standard_normal(t.shape)).astype(np.float32)
+    segments, _ = model.transcribe(audio, beam_size=1, language="en", vad_filter=False, condition_on_previous_text=False)
+    for _ in segments:
+        pass
+    return time.perf_counter() - started
+
+
+class Preloader:
+    """
+    Loads and warms the configured models in a background thread
+
+    ``load`` is called once per entry and does the actual work (load + warm-up,
+    in-process or on the model server). ``ready`` stays False until every entry
+    has been loaded successfully; failed entries keep it False and are listed
+    in stats().
+    """
+
+    def __init__(self, entries: List[PreloadEntry], load: Callable[[str, str, str], Optional[float]]):
+        self.entries = list(entries)
+        self._load = load
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._done = threading.Event()
+        self._status: Dict[PreloadEntry, Dict[str, Any]] = {
+            entry: {"state": "pending"} for entry in self.entries
+        }
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        if not self.entries:
+            self._done.set()
+
+    def start(self):
+        if not self.entries or self._thread is not None:
+            return
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, name="model-preload", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        for entry in self.entries:
+            model_name, device, compute_type = entry
+            with self._lock:
+                self._status[entry] = {"state": "loading"}
+            logger.info(f"Preloading Whisper model '{model_name}' on {device} ({compute_type})")
+            started = time.perf_counter()
+            try:
+                warmup_seconds = self._load(model_name, device, compute_type)
+            except Exception as e:
+                logger.error(f"Preloading '{model_name}' on {device} ({compute_type}) failed: {e}")
+                with self._lock:
+                    self._status[entry] = {"state": "failed", "error": str(e)}
+                continue
+            total = time.perf_counter() - started
+            with self._lock:
+                self._status[entry] = {
+                    "state": "ready",
+                    "seconds": round(total, 2),
+                    "warmup_seconds": round(warmup_seconds, 2) if warmup_seconds is not None else None,
+                }
+            logger.info(f"Preloaded '{model_name}' on {device} in {total:.1f}s")
+        self.finished_at = time.time()
+        self._done.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until preloading has finished; returns False on timeout."""
+        return self._done.wait(timeout)
+
+    @property
+    def ready(self) -> bool:
+        if not self._done.is_set():
+            return False
+        with self._lock:
+            return all(status["state"] == "ready" for status in self._status.values())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = [
+                {"model": entry[0], "device": entry[1], "compute_type": entry[2], **status}
+                for entry, status in self._status.items()
+            ]
+        return {
+            "ready": self.ready,
+            "finished": self._done.is_set(),
+            "seconds": round(self.finished_at - self.started_at, 2)
+            if self.started_at and self.finished_at else None,
+            "entries": entries,
+        }